@@ -14,6 +14,7 @@ from pathlib import Path
 from dotenv import load_dotenv
 import os
 import sys
+import tempfile
 import dj_database_url
 from datetime import timedelta
 
@@ -107,14 +108,26 @@ DATABASES = {
 # REST FRAMEWORK
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.StatelessJWTAuthentication",
     ]
 }
+
+# Page size of keyset-paginated lists (core.pagination); clients can ask
+# for up to PAGINATION_MAX_PAGE_SIZE rows with ?page_size=
+PAGINATION_PAGE_SIZE = 100
+PAGINATION_MAX_PAGE_SIZE = int(os.getenv("PAGINATION_MAX_PAGE_SIZE", "500"))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Users' current token versions (core.authentication) are cached for this
+# many seconds. Revoking clears the entry; unless the default cache is
+# shared (DEFAULT_CACHE_BACKEND), other workers can accept revoked tokens
+# until it expires.
+TOKEN_VERSION_CACHE_TTL = 60
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # Vite default port
@@ -176,5 +189,103 @@ AWS_S3_REGION_NAME = "us-east-1"
 AWS_QUERYSTRING_AUTH = False
 AWS_DEFAULT_ACL = None
 
-DEFAULT_FILE_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
-MEDIA_URL = f"https://{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com/"
\ No newline at end of file
+# "s3" stores uploaded media (submission audio/video) in the bucket above,
+# "local" keeps it under MEDIA_ROOT for development and offline tests
+MEDIA_STORAGE_BACKEND = os.getenv("MEDIA_STORAGE_BACKEND", "s3").lower()
+
+# Submission media is served through GET /api/submissions/{id}/media (see
+# core.streaming). Signed links in API responses are valid for
+# MEDIA_TOKEN_MAX_AGE seconds; with S3 the endpoint redirects to presigned
+# URLs that expire after MEDIA_PRESIGNED_URL_EXPIRE seconds.
+MEDIA_TOKEN_MAX_AGE = 6 * 60 * 60
+MEDIA_PRESIGNED_URL_EXPIRE = 15 * 60
+
+if MEDIA_STORAGE_BACKEND == "local":
+    DEFAULT_STORAGE_BACKEND = "django.core.files.storage.FileSystemStorage"
+    DEFAULT_STORAGE_OPTIONS = {}
+    MEDIA_ROOT = BASE_DIR / "media"
+    MEDIA_URL = "/media/"
+else:
+    DEFAULT_STORAGE_BACKEND = "storages.backends.s3boto3.S3Boto3Storage"
+    # Media objects stay private and are only reachable through presigned URLs
+    DEFAULT_STORAGE_OPTIONS = {
+        "querystring_auth": True,
+        "querystring_expire": MEDIA_PRESIGNED_URL_EXPIRE,
+    }
+    MEDIA_URL = f"https://{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com/"
+
+# Resumable uploads (core.uploads) stage chunks here until completed.
+# Every worker serving /api/uploads/ must see the same directory.
+MEDIA_UPLOAD_TEMP_DIR = os.getenv("MEDIA_UPLOAD_TEMP_DIR", os.path.join(tempfile.gettempdir(), "odaap-uploads"))
+MEDIA_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# Smaller chunks (other than the last) would let one upload create
+# millions of chunk rows and files
+MEDIA_UPLOAD_MIN_CHUNK_SIZE = 256 * 1024
+MEDIA_UPLOAD_MAX_CHUNK_SIZE = 32 * 1024 * 1024
+MEDIA_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
+# Responses to writes sent with an Idempotency-Key header are replayed to
+# retries for this many seconds (see core.idempotency)
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Accept single submissions into a staging table and answer 202 with a
+# receipt instead of writing them inline. Needs a drain_submission_queue
+# worker running (see core.ingestion).
+SUBMISSION_QUEUE_ENABLED = os.getenv("SUBMISSION_QUEUE_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Roster imports (core.roster): row limit per upload, and how long the
+# invite token of an account created by an import stays valid
+ROSTER_MAX_ROWS = 20000
+INVITE_TOKEN_TTL = 14 * 24 * 60 * 60
+
+# A submission claimed from the grading queue (core.grading_queue) is held
+# for the grader this many seconds, then handed to the next one who asks
+GRADING_CLAIM_TTL = 15 * 60
+
+# Compiled answer keys (core.autograde) are cached for this many seconds,
+# under their question's updated_at, so an edited key is never used again.
+ANSWER_KEY_CACHE_TTL = 5 * 60
+
+# Module lists and questions (core.content_cache) are cached pre-serialized
+# in the 'content' cache. The default local-memory backend evicts the least
+# recently used entries past CONTENT_CACHE_MAX_ENTRIES. Set
+# CONTENT_CACHE_BACKEND and CONTENT_CACHE_LOCATION to a shared backend (such
+# as django.core.cache.backends.redis.RedisCache) so workers share entries.
+# Keys include the rows' update stamps, so no backend serves stale entries.
+CONTENT_CACHE_TTL = int(os.getenv("CONTENT_CACHE_TTL", str(60 * 60)))
+CONTENT_CACHE_MAX_ENTRIES = int(os.getenv("CONTENT_CACHE_MAX_ENTRIES", "5000"))
+
+# The default cache holds membership maps, token versions and answer keys.
+# Its local-memory default is per process, so an invalidation only reaches
+# other workers when their entries expire. Set DEFAULT_CACHE_BACKEND and
+# DEFAULT_CACHE_LOCATION to a shared backend (such as
+# django.core.cache.backends.redis.RedisCache) to apply it everywhere at once.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DEFAULT_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("DEFAULT_CACHE_LOCATION", ""),
+    },
+    "content": {
+        "BACKEND": os.getenv("CONTENT_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CONTENT_CACHE_LOCATION", "content"),
+        "TIMEOUT": CONTENT_CACHE_TTL,
+    },
+}
+if CACHES["content"]["BACKEND"].endswith("LocMemCache"):
+    CACHES["content"]["OPTIONS"] = {"MAX_ENTRIES": CONTENT_CACHE_MAX_ENTRIES}
+
+# Students may reuse posted modules and their questions this many seconds
+# before revalidating them by ETag (core.conditional); other content reads
+# are revalidated every time.
+PUBLISHED_CONTENT_MAX_AGE = int(os.getenv("PUBLISHED_CONTENT_MAX_AGE", "60"))
+
+# A user's course memberships (core.membership) are cached for this many
+# seconds. Enrollment changes switch the user to a fresh entry; unless the
+# default cache is shared (DEFAULT_CACHE_BACKEND), other workers can use the
+# old one until it expires.
+MEMBERSHIP_CACHE_TTL = 10 * 60
+
+STORAGES = {
+    "default": {"BACKEND": DEFAULT_STORAGE_BACKEND, "OPTIONS": DEFAULT_STORAGE_OPTIONS},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
\ No newline at end of file
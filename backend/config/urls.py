@@ -22,7 +22,8 @@ from core.serializers import CustomTokenObtainPairSerializer
 
 # views
 from core.views import (
-    CourseViewSet, ModuleViewSet, QuestionViewSet, SubmissionViewSet, register
+    CourseViewSet, ModuleViewSet, QuestionViewSet, SubmissionViewSet, MediaUploadViewSet, register,
+    accept_invite
 )
 
 # Create router and register viewsets
@@ -31,6 +32,7 @@ router.register(r'courses', CourseViewSet, basename='course')
 router.register(r'modules', ModuleViewSet, basename='module')
 router.register(r'questions', QuestionViewSet, basename='question')
 router.register(r'submissions', SubmissionViewSet, basename='submission')
+router.register(r'uploads', MediaUploadViewSet, basename='upload')
 
 # Custom token view that uses email
 class EmailTokenObtainPairView(TokenObtainPairView):
@@ -41,6 +43,7 @@ urlpatterns = [
     path("api/token/", EmailTokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("api/register/", register, name="register"),
+    path("api/invites/accept/", accept_invite, name="accept-invite"),
     # Include router URLs (provides all ViewSet endpoints)
     path('api/', include(router.urls)),
 ]
@@ -1,15 +1,22 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from .authentication import revoke_tokens
 from .models import (
     User, Course, Module, Question, Submission,
     CourseToStudents, CourseToTeachers, CourseToModules,
     ModuleToQuestions, QuestionToCorrectAnswers,
-    UserModuleGrade, UserCourseGrade, UserQuestionGrade
+    UserModuleGrade, UserCourseGrade, UserQuestionGrade, UserModuleProgress
 )
 
 # Register your models here.
 
-admin.site.register(User, UserAdmin)
+@admin.register(User)
+class CoreUserAdmin(UserAdmin):
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Tokens carry isStudent, and must stop working for disabled accounts
+        if change and {'isStudent', 'is_active'} & set(form.changed_data):
+            revoke_tokens(obj)
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
@@ -68,6 +75,11 @@ class UserModuleGradeAdmin(admin.ModelAdmin):
 class UserCourseGradeAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'course', 'score', 'total']
 
+@admin.register(UserModuleProgress)
+class UserModuleProgressAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'module', 'answered_count', 'is_completed', 'completed_at']
+    list_filter = ['is_completed']
+
 @admin.register(UserQuestionGrade)
 class UserQuestionGradeAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'question', 'score', 'total', 'is_overdue']
@@ -0,0 +1,80 @@
+"""
+JWT authentication without a user query on every request.
+
+Tokens issued by issue_tokens() carry the user's isStudent flag and
+token_version. StatelessJWTAuthentication rebuilds request.user from those
+claims as a TokenUser, which only reads the users table if a view touches
+another field (email, names, ...).
+
+Revocation: raising a user's token_version (revoke_tokens()) invalidates
+every token issued before. The current version is checked on each request
+against a cached copy, so the check costs one indexed lookup per user per
+TOKEN_VERSION_CACHE_TTL seconds. Tokens issued without the claims fall
+back to loading the user.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import TokenUser, User
+
+IS_STUDENT_CLAIM = 'isStudent'
+TOKEN_VERSION_CLAIM = 'token_version'
+
+
+def issue_tokens(user):
+    """A refresh token (and, through .access_token, an access token) for user"""
+    token = RefreshToken.for_user(user)
+    token[IS_STUDENT_CLAIM] = user.isStudent
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    return token
+
+
+def _cache_key(user_id):
+    return f'token-version:{user_id}'
+
+
+def current_token_version(user_id):
+    """The version a user's tokens must carry, or None if they cannot log in"""
+    key = _cache_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        row = User.objects.filter(id=user_id).values_list('token_version', 'is_active').first()
+        version = row[0] if row and row[1] else -1
+        cache.set(key, version, settings.TOKEN_VERSION_CACHE_TTL)
+    return None if version == -1 else version
+
+
+def revoke_tokens(user):
+    """Invalidate every token issued to user so far"""
+    User.objects.filter(id=user.id).update(token_version=F('token_version') + 1)
+    user.refresh_from_db(fields=['token_version'])
+    key = _cache_key(user.id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that trusts the isStudent and token_version claims"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        if IS_STUDENT_CLAIM not in validated_token or TOKEN_VERSION_CLAIM not in validated_token:
+            user = super().get_user(validated_token)
+            if user.token_version != 0:
+                raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+            return user
+
+        version = validated_token[TOKEN_VERSION_CLAIM]
+        if current_token_version(user_id) != version:
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return TokenUser.from_claims(user_id, validated_token[IS_STUDENT_CLAIM], version)
@@ -0,0 +1,188 @@
+"""
+Automatic grading from answer keys (QuestionToCorrectAnswers).
+
+A question's correct answers are compiled into an AnswerKey, a set of
+accepted responses:
+
+- multiple_choice answers must match one of the correct options exactly,
+  and anything else scores 0;
+- written answers are compared after normalize() (Unicode NFKC, case
+  folding, runs of whitespace collapsed). A match earns score_total; a
+  miss is left for a teacher, since free text can be right in ways the key
+  does not list.
+
+Audio and video answers, and questions without correct answers, are
+never auto-graded. Compiled keys are cached (ANSWER_KEY_CACHE_TTL) under
+the question's updated_at, which every change to the question or its
+correct answers moves (see core.content_cache), so no worker can grade
+with an outdated key.
+
+autograde_submissions() runs as answers are saved (core.submissions), and
+regrade_questions() re-runs a changed key over every stored answer to the
+question in batches. Grades a teacher entered are never overwritten.
+"""
+import unicodedata
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, Value
+
+from .grading import apply_submission_grades, remove_submission_grades
+from .models import Module, Question, QuestionType, Submission, UserQuestionGrade
+
+BATCH_SIZE = 2000
+# Columns a stored submission needs to be graded
+GRADING_FIELDS = (
+    'id', 'user_id', 'module_id', 'question_id', 'submission_type', 'submission_response', 'time_submitted'
+)
+
+
+def normalize(text):
+    """Written answers are compared case-insensitively, ignoring extra whitespace"""
+    return ' '.join(unicodedata.normalize('NFKC', text).casefold().split())
+
+
+class AnswerKey(NamedTuple):
+    question_type: str
+    answers: frozenset
+    score_total: int
+
+    @classmethod
+    def compile(cls, question_type, correct_answers, score_total):
+        if question_type == QuestionType.MULTIPLE_CHOICE:
+            answers = frozenset(correct_answers)
+        elif question_type == QuestionType.WRITTEN:
+            answers = frozenset(normalize(answer) for answer in correct_answers)
+        else:
+            answers = frozenset()
+        return cls(question_type, answers, score_total)
+
+    def score(self, submission_type, response):
+        """Score for an answer, or None when it needs a teacher"""
+        if not self.answers or submission_type != self.question_type:
+            return None
+        if self.question_type == QuestionType.MULTIPLE_CHOICE:
+            return self.score_total if response in self.answers else 0
+        return self.score_total if normalize(response) in self.answers else None
+
+
+def _cache_key(question_id, updated_at):
+    return f'answer-key:{question_id}:{updated_at.isoformat()}'
+
+
+def load_answer_keys(question_ids):
+    """Compile {question_id: AnswerKey} from the database"""
+    questions = (
+        Question.objects.filter(id__in=question_ids)
+        .annotate(correct_answers=ArrayAgg(
+            'questiontocorrectanswers__correct_answer',
+            filter=Q(questiontocorrectanswers__isnull=False),
+            default=Value([])
+        ))
+        .values_list('id', 'question_type', 'correct_answers', 'score_total')
+    )
+    return {
+        question_id: AnswerKey.compile(question_type, correct_answers, score_total)
+        for question_id, question_type, correct_answers, score_total in questions
+    }
+
+
+def answer_keys(question_ids):
+    """{question_id: AnswerKey} for question_ids, compiling only what is not cached"""
+    stamps = Question.objects.filter(id__in=question_ids).values_list('id', 'updated_at')
+    cache_keys = {question_id: _cache_key(question_id, updated_at) for question_id, updated_at in stamps}
+    cached = cache.get_many(cache_keys.values())
+    keys = {
+        question_id: cached[cache_key]
+        for question_id, cache_key in cache_keys.items()
+        if cache_key in cached
+    }
+    missing = set(cache_keys) - set(keys)
+    if missing:
+        loaded = load_answer_keys(missing)
+        cache.set_many(
+            {cache_keys[question_id]: key for question_id, key in loaded.items() if question_id in cache_keys},
+            settings.ANSWER_KEY_CACHE_TTL
+        )
+        keys.update(loaded)
+    return keys
+
+
+def _grade(submissions, keys):
+    """
+    Grade submissions whose question is in keys. Answers the key cannot
+    decide lose an earlier automatic grade. Returns the number graded.
+    """
+    candidates = [submission for submission in submissions if submission.question_id in keys]
+    if not candidates:
+        return 0
+
+    with transaction.atomic():
+        pairs = {(submission.question_id, submission.user_id) for submission in candidates}
+        existing = {
+            (question_id, user_id): is_autograded
+            for question_id, user_id, is_autograded in UserQuestionGrade.objects.select_for_update()
+            .filter(
+                question_id__in={question_id for question_id, _ in pairs},
+                user_id__in={user_id for _, user_id in pairs}
+            )
+            .values_list('question_id', 'user_id', 'is_autograded')
+        }
+        due_dates = dict(
+            Module.objects.filter(id__in={submission.module_id for submission in candidates})
+            .values_list('id', 'due_date')
+        )
+
+        graded, cleared = [], []
+        for submission in candidates:
+            pair = (submission.question_id, submission.user_id)
+            if existing.get(pair) is False:
+                continue  # graded by a teacher
+            key = keys[submission.question_id]
+            score = key.score(submission.submission_type, submission.submission_response)
+            if score is None:
+                if pair in existing:
+                    cleared.append(submission)
+                continue
+            due_date = due_dates.get(submission.module_id)
+            is_overdue = due_date is not None and submission.time_submitted > due_date
+            graded.append((submission, score, key.score_total, is_overdue))
+
+        apply_submission_grades(graded, autograded=True)
+        remove_submission_grades(cleared)
+    return len(graded)
+
+
+def autograde_submissions(submissions):
+    """Grade just-saved submissions whose question has an answer key"""
+    keys = answer_keys({submission.question_id for submission in submissions})
+    return _grade(submissions, {question_id: key for question_id, key in keys.items() if key.answers})
+
+
+def regrade_questions(question_ids):
+    """
+    Re-grade every stored answer to question_ids against their current
+    keys, BATCH_SIZE submissions at a time. Call after changing a key,
+    question type or score_total. Returns the number of answers graded.
+    """
+    question_ids = list(question_ids)
+    if not question_ids:
+        return 0
+    keys = load_answer_keys(question_ids)
+
+    graded, last_id = 0, 0
+    with transaction.atomic():
+        while True:
+            batch = list(
+                Submission.objects.filter(question_id__in=keys, id__gt=last_id)
+                .only(*GRADING_FIELDS)
+                .order_by('id')[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            graded += _grade(batch, keys)
+            last_id = batch[-1].id
+    return graded
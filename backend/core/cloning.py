@@ -0,0 +1,83 @@
+"""
+Deep copies of modules and courses, for reusing content between terms.
+
+A copy takes a fixed number of queries whatever its size: one read each
+for the modules, questions and answer keys, then one bulk_create per table.
+Postgres returns the new primary keys from bulk_create, so foreign keys
+are remapped in memory. Students, submissions and grades are never copied.
+
+With reset_schedule the copies are unposted and have no due date, ready
+to be scheduled for the new term.
+"""
+from django.db import transaction
+from django.db.models import Max
+
+from .content_cache import bump_course
+from .membership import bump_membership_version
+from .models import CourseToTeachers, Module, Question, QuestionToCorrectAnswers
+
+COURSE_FIELDS = ['course_description', 'zoom_link', 'score_total']
+MODULE_FIELDS = ['module_name', 'module_description', 'youtube_link', 'score_total', 'is_posted', 'due_date']
+QUESTION_FIELDS = ['question_type', 'question_text', 'mcq_options', 'question_order', 'score_total']
+
+
+def _copy(instance, fields, **overrides):
+    values = {field: getattr(instance, field) for field in fields}
+    values.update(overrides)
+    return type(instance)(**values)
+
+
+def _copy_modules(sources, course, reset_schedule, module_orders):
+    """Copy sources (with their questions and answer keys) into course"""
+    source_ids = [module.id for module in sources]
+    questions = list(Question.objects.filter(module_id__in=source_ids).order_by('module_id', 'question_order', 'id'))
+    answers = list(
+        QuestionToCorrectAnswers.objects.filter(question__module_id__in=source_ids)
+        .order_by('id')
+        .values_list('question_id', 'correct_answer')
+    )
+
+    schedule = {'is_posted': False, 'due_date': None} if reset_schedule else {}
+    modules = [
+        _copy(module, MODULE_FIELDS, course=course, module_order=order, **schedule)
+        for module, order in zip(sources, module_orders)
+    ]
+    Module.objects.bulk_create(modules)
+    bump_course(course.id)
+    module_map = {source.id: module for source, module in zip(sources, modules)}
+
+    copies = [_copy(question, QUESTION_FIELDS, module=module_map[question.module_id]) for question in questions]
+    Question.objects.bulk_create(copies)
+    question_map = {question.id: copy.id for question, copy in zip(questions, copies)}
+
+    QuestionToCorrectAnswers.objects.bulk_create([
+        QuestionToCorrectAnswers(question_id=question_map[question_id], correct_answer=answer)
+        for question_id, answer in answers
+    ])
+    return modules, len(copies)
+
+
+def clone_module(module, course, reset_schedule=True):
+    """Copy module to the end of course. Returns the new module."""
+    with transaction.atomic():
+        last = Module.objects.filter(course=course).aggregate(last=Max('module_order'))['last']
+        modules, _ = _copy_modules([module], course, reset_schedule, [(last or 0) + 1])
+    return modules[0]
+
+
+def clone_course(course, course_name=None, reset_schedule=True, teachers=()):
+    """
+    Copy course with all its modules, questions and answer keys, and make
+    teachers its teachers. Returns (new course, module count, question count).
+    """
+    with transaction.atomic():
+        copy = _copy(course, COURSE_FIELDS, course_name=course_name or course.course_name)
+        copy.save()
+        CourseToTeachers.objects.bulk_create([CourseToTeachers(course=copy, user=user) for user in teachers])
+        bump_membership_version(*(user.id for user in teachers))
+
+        sources = list(Module.objects.filter(course=course).order_by('module_order', 'id'))
+        modules, question_count = _copy_modules(
+            sources, copy, reset_schedule, [module.module_order for module in sources]
+        )
+    return copy, len(modules), question_count
@@ -0,0 +1,48 @@
+"""
+Conditional GETs for course, module and question reads.
+
+Each read endpoint names the few columns its payload depends on (Course,
+Module and Question .updated_at, and .content_updated_at, which
+core.content_cache stamps whenever a course's module list or a module's
+questions change), plus anything else that shapes the payload, such as the
+reader's role or the page URL. Those parts hash into a strong ETag, so a
+request whose If-None-Match still matches gets a 304 before anything is
+loaded or serialized.
+
+Cache-Control: posted modules and their questions, as read by students,
+may be reused for PUBLISHED_CONTENT_MAX_AGE seconds; everything else
+(unposted drafts, teacher views with answer keys, course lists) must be
+revalidated on every use. Responses are private and vary on Authorization,
+since they depend on who is asking.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+
+def etag(*parts):
+    """A strong ETag for a payload that only changes when parts do"""
+    digest = hashlib.sha256('\x1f'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def conditional(request, parts, build, published=False):
+    """
+    304 Not Modified if the client holds the version identified by parts,
+    otherwise build() (a Response). Call it after access checks, so only
+    readers allowed to see the payload learn that it is unchanged.
+    """
+    tag = etag(*parts)
+    response = get_conditional_response(request, etag=tag)
+    if response is None:
+        response = build()
+        if response.status_code != 200:
+            return response
+    response['ETag'] = tag
+    if published:
+        patch_cache_control(response, private=True, max_age=settings.PUBLISHED_CONTENT_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+    return response
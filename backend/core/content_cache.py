@@ -0,0 +1,174 @@
+"""
+Read-through cache for course content: a course's module list and a
+module's questions, as every enrolled student reads them.
+
+Payloads are stored already serialized in the 'content' cache (see
+CACHES), under keys that include the updated_at / content_updated_at
+columns of the rows they were built from. Callers load those columns anyway
+for their ETags (core.conditional), so a changed row simply leads to a new
+key, in every worker and whatever the backend; stale payloads are never
+read again and age out of the cache.
+
+Saving or deleting a Module, Question or QuestionToCorrectAnswers stamps
+content_updated_at on the course or module whose payloads it affects (the
+receivers at the bottom). Answer key changes also stamp their question's
+updated_at, which compiled keys are cached under (core.autograde). Bulk
+writes, which send no signals, call bump_course() / bump_module() /
+bump_answers() themselves.
+
+Hits and misses are counted per payload name in this process; see stats().
+"""
+import threading
+from collections import Counter
+
+from django.core.cache import caches
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Course, Module, Question, QuestionToCorrectAnswers
+
+CACHE_ALIAS = 'content'
+COURSE = 'course'
+MODULE = 'module'
+
+_counts = Counter()
+_counts_lock = threading.Lock()
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def bump_course(*course_ids):
+    """The module lists of course_ids changed"""
+    course_ids = {course_id for course_id in course_ids if course_id is not None}
+    if course_ids:
+        Course.objects.filter(id__in=course_ids).update(content_updated_at=timezone.now())
+
+
+def bump_module(*module_ids):
+    """The questions or answer keys of module_ids changed"""
+    module_ids = {module_id for module_id in module_ids if module_id is not None}
+    if module_ids:
+        Module.objects.filter(id__in=module_ids).update(content_updated_at=timezone.now())
+
+
+def bump_answers(*question_ids):
+    """The answer keys of question_ids changed"""
+    question_ids = {question_id for question_id in question_ids if question_id is not None}
+    if question_ids:
+        now = timezone.now()
+        Question.objects.filter(id__in=question_ids).update(updated_at=now)
+        Module.objects.filter(question__id__in=question_ids).update(content_updated_at=now)
+
+
+def cached(name, scope_id, stamps, variant, build):
+    """
+    The name payload of scope_id (in its variant, e.g. per role) as of
+    stamps, the timestamps of the rows it is built from, calling build() to
+    serialize it on a miss
+    """
+    cache = _cache()
+    version = '-'.join(stamp.isoformat() for stamp in stamps)
+    key = f'content:{name}:{scope_id}:{version}:{variant}'
+    payload = cache.get(key)
+    hit = payload is not None
+    if not hit:
+        payload = build()
+        cache.set(key, payload)
+    with _counts_lock:
+        _counts[name, 'hits' if hit else 'misses'] += 1
+    return payload
+
+
+def stats():
+    """{name: {'hits': n, 'misses': n}} since the process started (or reset_stats())"""
+    with _counts_lock:
+        counts = dict(_counts)
+    names = sorted({name for name, _ in counts})
+    return {name: {kind: counts.get((name, kind), 0) for kind in ('hits', 'misses')} for name in names}
+
+
+def reset_stats():
+    with _counts_lock:
+        _counts.clear()
+
+
+# ----------------------------------------------------------------------
+# Invalidation
+# ----------------------------------------------------------------------
+
+def _stored(model, pk, field):
+    """field of the saved row, before an update changes it"""
+    return model.objects.filter(pk=pk).values_list(field, flat=True).first()
+
+
+def _moving(instance, field, update_fields):
+    """Whether saving instance may move it to another parent"""
+    return not instance._state.adding and instance.pk is not None and (
+        update_fields is None or field in update_fields
+    )
+
+
+def _first_bump(origin, scope, scope_id):
+    """
+    Whether deleting origin has not bumped scope_id yet: a cascade sends one
+    post_delete per row, but each parent needs stamping only once
+    """
+    if origin is None:
+        return True
+    bumped = origin.__dict__.setdefault('_content_bumped', set())
+    if (scope, scope_id) in bumped:
+        return False
+    bumped.add((scope, scope_id))
+    return True
+
+
+@receiver(pre_save, sender=Module)
+def _module_moving(sender, instance, update_fields=None, **kwargs):
+    # Stamped after the save, so no reader sees the new stamp with the old rows
+    if _moving(instance, 'course', update_fields):
+        instance._content_old_course_id = _stored(Module, instance.pk, 'course_id')
+
+
+@receiver([post_save, post_delete], sender=Module)
+def _module_changed(sender, instance, origin=None, **kwargs):
+    # Course payload edits change Course.updated_at, which is part of the keys
+    old_course_id = instance.__dict__.pop('_content_old_course_id', None)
+    if old_course_id not in (None, instance.course_id):
+        bump_course(old_course_id)
+    if _first_bump(origin, COURSE, instance.course_id):
+        bump_course(instance.course_id)
+
+
+@receiver(pre_save, sender=Question)
+def _question_moving(sender, instance, update_fields=None, **kwargs):
+    if _moving(instance, 'module', update_fields):
+        instance._content_old_module_id = _stored(Question, instance.pk, 'module_id')
+
+
+@receiver([post_save, post_delete], sender=Question)
+def _question_changed(sender, instance, origin=None, **kwargs):
+    old_module_id = instance.__dict__.pop('_content_old_module_id', None)
+    if old_module_id not in (None, instance.module_id):
+        bump_module(old_module_id)
+    if _first_bump(origin, MODULE, instance.module_id):
+        bump_module(instance.module_id)
+
+
+@receiver(pre_delete, sender=QuestionToCorrectAnswers)
+def _answers_deleting(sender, instance, origin=None, **kwargs):
+    # Deleting a question or module stamps its parent itself. A queryset
+    # of answers is stamped once, not once per answer.
+    if isinstance(origin, QuerySet) and origin.model is QuestionToCorrectAnswers:
+        if _first_bump(origin, 'answers', None):
+            bump_answers(*set(origin.values_list('question_id', flat=True)))
+    elif isinstance(origin, QuestionToCorrectAnswers):
+        bump_answers(instance.question_id)
+
+
+@receiver(post_save, sender=QuestionToCorrectAnswers)
+def _answer_saved(sender, instance, **kwargs):
+    bump_answers(instance.question_id)
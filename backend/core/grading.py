@@ -0,0 +1,250 @@
+"""
+Grade writes and the UserModuleGrade / UserCourseGrade rollups.
+
+Rollups hold the sum of the student's UserQuestionGrade rows for a module
+or course. apply_question_grade() keeps them current by adding the change
+in score and total, in the same transaction as the question grade.
+apply_submission_grades() and remove_submission_grades() do the same for
+many grades at once, with one statement per rollup table.
+rebuild_rollups() recomputes them from scratch with INSERT ... SELECT.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+
+from .models import (
+    Module, Question, Submission, UserCourseGrade, UserModuleGrade, UserQuestionGrade
+)
+
+
+def _add_to_rollups(model, scope_field, deltas):
+    """
+    Add {(scope_id, user_id): (score_delta, total_delta)} to rollup rows,
+    creating the ones that do not exist yet, with one statement
+    """
+    if not deltas:
+        return
+    table = model._meta.db_table
+    # A fixed row order keeps concurrent writers from deadlocking
+    keys = sorted(deltas)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} ({scope_field}, user_id, score, total)
+            SELECT * FROM unnest(%s::bigint[], %s::bigint[], %s::integer[], %s::integer[])
+            ON CONFLICT ({scope_field}, user_id) DO UPDATE SET
+                score = COALESCE({table}.score, 0) + EXCLUDED.score,
+                total = COALESCE({table}.total, 0) + EXCLUDED.total
+            """,
+            [
+                [scope_id for scope_id, _ in keys],
+                [user_id for _, user_id in keys],
+                [deltas[key][0] for key in keys],
+                [deltas[key][1] for key in keys],
+            ]
+        )
+
+
+def _apply_rollup_deltas(changes):
+    """Add (module_id, course_id, user_id, score_delta, total_delta) changes to both rollups"""
+    module_deltas = defaultdict(lambda: [0, 0])
+    course_deltas = defaultdict(lambda: [0, 0])
+    for module_id, course_id, user_id, score_delta, total_delta in changes:
+        for deltas, scope_id in ((module_deltas, module_id), (course_deltas, course_id)):
+            deltas[scope_id, user_id][0] += score_delta
+            deltas[scope_id, user_id][1] += total_delta
+    _add_to_rollups(UserModuleGrade, 'module_id', module_deltas)
+    _add_to_rollups(UserCourseGrade, 'course_id', course_deltas)
+
+
+def _locked_grades(submissions):
+    """Lock the existing grades of submissions: {(question_id, user_id): (id, score, total)}"""
+    pairs = {(submission.question_id, submission.user_id) for submission in submissions}
+    rows = (
+        UserQuestionGrade.objects.select_for_update()
+        .filter(
+            question_id__in={question_id for question_id, _ in pairs},
+            user_id__in={user_id for _, user_id in pairs}
+        )
+        .order_by('id')
+        .values_list('id', 'question_id', 'user_id', 'score', 'total')
+    )
+    return {
+        (question_id, user_id): (grade_id, score or 0, total or 0)
+        for grade_id, question_id, user_id, score, total in rows
+        if (question_id, user_id) in pairs
+    }
+
+
+def _course_ids(submissions):
+    return dict(
+        Module.objects.filter(id__in={submission.module_id for submission in submissions})
+        .values_list('id', 'course_id')
+    )
+
+
+def apply_question_grade(question, user, score, total, is_overdue=False):
+    """
+    Create or update a student's grade for a question and push the change
+    into their module and course rollups. The student's submission leaves
+    the grading queue. Returns the UserQuestionGrade.
+    """
+    with transaction.atomic():
+        # INSERT ... ON CONFLICT DO NOTHING, then lock the row: a concurrent
+        # first grade waits for this one instead of failing on
+        # unique_user_question_grade, and then reads the score written here
+        UserQuestionGrade.objects.bulk_create(
+            [UserQuestionGrade(question=question, user=user)], ignore_conflicts=True
+        )
+        grade = UserQuestionGrade.objects.select_for_update().get(question=question, user=user)
+        # New (or never scored) grades may not have rollup rows yet
+        created = grade.score is None and grade.total is None
+        old_score, old_total = grade.score or 0, grade.total or 0
+
+        grade.score = score
+        grade.total = total
+        grade.is_overdue = is_overdue
+        grade.is_autograded = False
+        grade.save(update_fields=['score', 'total', 'is_overdue', 'is_autograded'])
+        Submission.objects.filter(question=question, user=user).update(
+            is_graded=True, claimed_by=None, claim_expires_at=None
+        )
+
+        score_delta = (score or 0) - old_score
+        total_delta = (total or 0) - old_total
+        if created or score_delta or total_delta:
+            module = question.module
+            _apply_rollup_deltas([(module.id, module.course_id, user.id, score_delta, total_delta)])
+    return grade
+
+
+def apply_submission_grades(entries, autograded=False):
+    """
+    Grade many submissions at once. entries are (submission, score, total,
+    is_overdue) tuples, at most one per student and question. The grades
+    are written with one INSERT ... ON CONFLICT DO UPDATE, the submissions
+    leave the grading queue and the score changes are added to the
+    rollups with one statement per table. Returns the number of grades
+    written.
+    """
+    if not entries:
+        return 0
+    with transaction.atomic():
+        submissions = [submission for submission, *_ in entries]
+        old = _locked_grades(submissions)
+        UserQuestionGrade.objects.bulk_create(
+            [
+                UserQuestionGrade(
+                    question_id=submission.question_id, user_id=submission.user_id,
+                    score=score, total=total, is_overdue=is_overdue, is_autograded=autograded
+                )
+                for submission, score, total, is_overdue in entries
+            ],
+            update_conflicts=True,
+            unique_fields=['question', 'user'],
+            update_fields=['score', 'total', 'is_overdue', 'is_autograded']
+        )
+        Submission.objects.filter(id__in=[submission.id for submission in submissions]).update(
+            is_graded=True, claimed_by=None, claim_expires_at=None
+        )
+
+        course_ids = _course_ids(submissions)
+        changes = []
+        for submission, score, total, _ in entries:
+            _, old_score, old_total = old.get((submission.question_id, submission.user_id), (None, 0, 0))
+            changes.append((
+                submission.module_id, course_ids[submission.module_id], submission.user_id,
+                (score or 0) - old_score, (total or 0) - old_total
+            ))
+        _apply_rollup_deltas(changes)
+    return len(entries)
+
+
+def remove_submission_grades(submissions):
+    """
+    Delete the grades of submissions, put them back in the grading queue and
+    take their scores out of the rollups. Returns the number of grades
+    removed.
+    """
+    if not submissions:
+        return 0
+    with transaction.atomic():
+        old = _locked_grades(submissions)
+        removed = [s for s in submissions if (s.question_id, s.user_id) in old]
+        if not removed:
+            return 0
+        UserQuestionGrade.objects.filter(id__in=[grade_id for grade_id, _, _ in old.values()]).delete()
+        Submission.objects.filter(id__in=[submission.id for submission in removed]).update(is_graded=False)
+
+        course_ids = _course_ids(removed)
+        changes = []
+        for submission in removed:
+            _, old_score, old_total = old[submission.question_id, submission.user_id]
+            changes.append((
+                submission.module_id, course_ids[submission.module_id], submission.user_id,
+                -old_score, -old_total
+            ))
+        _apply_rollup_deltas(changes)
+    return len(removed)
+
+
+def rebuild_rollups(module_ids=None, course_ids=None):
+    """
+    Recompute module and course rollups from UserQuestionGrade with
+    set-based SQL. With module_ids or course_ids, only those modules, the
+    courses containing them and those courses are rebuilt (pass course_ids
+    for a course whose module was just deleted).
+    """
+    module_table = UserModuleGrade._meta.db_table
+    course_table = UserCourseGrade._meta.db_table
+    grade_table = UserQuestionGrade._meta.db_table
+    question_table = Question._meta.db_table
+    modules_table = Module._meta.db_table
+
+    module_filter, course_filter = '', ''
+    module_params, course_params = [], []
+    if module_ids is not None or course_ids is not None:
+        module_ids = list(module_ids or ())
+        course_ids = set(course_ids or ()) | set(
+            Module.objects.filter(id__in=module_ids).values_list('course_id', flat=True)
+        )
+        if not module_ids and not course_ids:
+            return
+        course_ids = list(course_ids)
+        module_filter = 'WHERE q.module_id = ANY(%s)'
+        course_filter = 'WHERE m.course_id = ANY(%s)'
+        module_params = [module_ids]
+        course_params = [course_ids]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {module_table} {module_filter.replace('q.', '')}",
+            module_params
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {module_table} (module_id, user_id, score, total)
+            SELECT q.module_id, g.user_id, SUM(COALESCE(g.score, 0)), SUM(COALESCE(g.total, 0))
+            FROM {grade_table} g
+            JOIN {question_table} q ON q.id = g.question_id
+            {module_filter}
+            GROUP BY q.module_id, g.user_id
+            """,
+            module_params
+        )
+        cursor.execute(
+            f"DELETE FROM {course_table} {course_filter.replace('m.', '')}",
+            course_params
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {course_table} (course_id, user_id, score, total)
+            SELECT m.course_id, g.user_id, SUM(COALESCE(g.score, 0)), SUM(COALESCE(g.total, 0))
+            FROM {grade_table} g
+            JOIN {question_table} q ON q.id = g.question_id
+            JOIN {modules_table} m ON m.id = q.module_id
+            {course_filter}
+            GROUP BY m.course_id, g.user_id
+            """,
+            course_params
+        )
@@ -0,0 +1,79 @@
+"""
+Grading work queue.
+
+Graders of a course ask for "the next ungraded submission" instead of
+picking from a list, so several TAs can work through the same course
+without grading the same answer twice. claim_next() takes the oldest
+ungraded, unclaimed submission with SELECT ... FOR UPDATE SKIP LOCKED: two
+graders asking at the same moment lock different rows rather than waiting
+on (or both taking) the same one. The claim is a lease: a submission that
+is not graded within GRADING_CLAIM_TTL seconds goes back in the queue.
+
+Submission.is_graded is set by core.grading.apply_question_grade, which
+also clears the claim, and cleared again when a student changes the answer
+(core.submissions). The partial indexes submission_ungraded_idx (one
+module, in order) and submission_ungraded_time_idx (a whole course, in
+order) cover only rows still waiting for a grade.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Module, Submission
+
+
+def _queue(course, module_id=None):
+    """Ungraded submissions of a course, oldest first"""
+    modules = Module.objects.filter(course=course)
+    if module_id is not None:
+        modules = modules.filter(id=module_id)
+    # Literal ids rather than a join or subquery: FOR UPDATE only locks
+    # submissions, and the planner sees how many modules it is looking in
+    # when it picks one of the ungraded indexes
+    module_ids = list(modules.values_list('id', flat=True))
+    submissions = Submission.objects.filter(is_graded=False, module_id__in=module_ids)
+    return submissions.order_by('time_submitted', 'id')
+
+
+def claim_next(course, grader, module_id=None):
+    """
+    Claim the oldest ungraded submission in course (or one of its modules)
+    for grader. A grader who already holds an unexpired claim gets the same
+    submission back, so a retried request does not take a second one.
+    Returns the Submission, or None when there is nothing left to grade.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.GRADING_CLAIM_TTL)
+    queue = _queue(course, module_id)
+    with transaction.atomic():
+        submission = (
+            queue.select_for_update(skip_locked=True)
+            .filter(claimed_by=grader, claim_expires_at__gt=now)
+            .first()
+        )
+        if submission is None:
+            submission = (
+                queue.select_for_update(skip_locked=True)
+                .filter(Q(claimed_by__isnull=True) | Q(claim_expires_at__lte=now))
+                .first()
+            )
+        if submission is None:
+            return None
+        submission.claimed_by = grader
+        submission.claim_expires_at = expires_at
+        submission.save(update_fields=['claimed_by', 'claim_expires_at'])
+    return submission
+
+
+def release_claim(submission_id, grader, course):
+    """
+    Hand a submission of course claimed by grader back to the queue without
+    grading it. Returns False when grader does not hold a claim on it.
+    """
+    return bool(
+        _queue(course).filter(id=submission_id, claimed_by=grader)
+        .update(claimed_by=None, claim_expires_at=None)
+    )
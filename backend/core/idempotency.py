@@ -0,0 +1,101 @@
+"""
+Idempotency-Key support for write endpoints.
+
+A client that sends "Idempotency-Key: <unique value>" can retry the request
+(after a timeout, a token refresh or a double click) without repeating its
+effect. The first request claims the key and its response is stored; a
+retry with the same key and body gets that response back with
+"Idempotent-Replayed: true". A retry while the first request is still
+running gets 409, and reusing a key for a different request gets 422.
+Keys are scoped to the user and expire after IDEMPOTENCY_KEY_TTL seconds.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def request_hash(request):
+    """Fingerprint of the method, path and body a key was first used with"""
+    data = request.data.dict() if hasattr(request.data, 'dict') else request.data
+    files = sorted((name, f.name, f.size) for name, f in request.FILES.items())
+    payload = json.dumps([request.method, request.path, data, files], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _claim(user, key, fingerprint):
+    """Return (record, claimed): claimed is True when this request should run"""
+    record, created = IdempotencyKey.objects.get_or_create(
+        user=user, key=key, defaults={'request_hash': fingerprint}
+    )
+    if created:
+        return record, True
+
+    # An expired key is free to be used again
+    cutoff = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    reclaimed = IdempotencyKey.objects.filter(id=record.id, created_at__lt=cutoff).update(
+        request_hash=fingerprint, response_status=None, response_body=None, created_at=timezone.now()
+    )
+    if reclaimed:
+        record.refresh_from_db()
+        return record, True
+    return record, False
+
+
+def idempotent(view):
+    """Make a viewset write method honour the Idempotency-Key header"""
+    @functools.wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": f"{HEADER} cannot be longer than {MAX_KEY_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = request_hash(request)
+        record, claimed = _claim(request.user, key, fingerprint)
+        if not claimed:
+            if record.request_hash != fingerprint:
+                return Response(
+                    {"error": f"{HEADER} was already used for a different request"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.response_status is None:
+                return Response(
+                    {"error": f"A request with this {HEADER} is still being processed"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return Response(
+                record.response_body,
+                status=record.response_status,
+                headers={'Idempotent-Replayed': 'true'}
+            )
+
+        try:
+            response = view(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            # Let the client retry a failure instead of replaying it
+            record.delete()
+        else:
+            record.response_status = response.status_code
+            record.response_body = response.data
+            record.save(update_fields=['response_status', 'response_body'])
+        return response
+
+    return wrapper
@@ -0,0 +1,103 @@
+"""
+Write-behind ingestion of submissions.
+
+With SUBMISSION_QUEUE_ENABLED on, SubmissionViewSet.create validates an
+answer, appends it to the QueuedSubmission staging table with one INSERT
+and answers 202 with a receipt, so a due-date rush costs each request a
+single write. The drain_submission_queue worker then moves queued answers
+into Submission in batches:
+
+- pending rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so
+  several workers can drain side by side;
+- the latest answer per student and question wins, and so does a direct
+  write that happened after the answer was accepted;
+- winners are upserted with one bulk statement (core.submissions) and
+  progress is refreshed once per batch.
+
+time_submitted is the moment the answer was accepted, not when the worker
+caught up, so overdue decisions are unaffected by queue lag.
+"""
+import functools
+
+from django.db import transaction
+from django.utils import timezone
+
+from .media import delete_media
+from .models import QueuedSubmission, QueuedSubmissionStatus, Submission
+from .progress import refresh_progress_for
+from .submissions import save_submissions
+
+
+def enqueue_submission(user, question, submission_type, response='', stored=None):
+    """Durably accept an answer for later processing. Returns the queue row."""
+    return QueuedSubmission.objects.create(
+        user=user,
+        module_id=question.module_id,
+        question=question,
+        submission_type=submission_type,
+        submission_response='' if stored else response,
+        **(stored.as_fields() if stored else {})
+    )
+
+
+def drain_batch(batch_size=500):
+    """Write up to batch_size queued answers to Submission. Returns how many were processed."""
+    with transaction.atomic():
+        batch = list(
+            QueuedSubmission.objects.select_for_update(skip_locked=True)
+            .filter(status=QueuedSubmissionStatus.PENDING)
+            .order_by('id')[:batch_size]
+        )
+        if not batch:
+            return 0
+
+        latest = {}
+        for queued in batch:
+            key = (queued.user_id, queued.question_id)
+            if key not in latest or queued.accepted_at >= latest[key].accepted_at:
+                latest[key] = queued
+
+        # Answers written directly after this one was accepted are newer
+        submitted_at = {
+            (user_id, question_id): time_submitted
+            for user_id, question_id, time_submitted in Submission.objects.select_for_update().filter(
+                user_id__in={user_id for user_id, _ in latest},
+                question_id__in={question_id for _, question_id in latest}
+            ).values_list('user_id', 'question_id', 'time_submitted')
+        }
+        winners = [
+            queued for key, queued in latest.items()
+            if key not in submitted_at or submitted_at[key] <= queued.accepted_at
+        ]
+
+        submissions = [
+            Submission(
+                user_id=queued.user_id,
+                module_id=queued.module_id,
+                question_id=queued.question_id,
+                submission_type=queued.submission_type,
+                submission_response=queued.submission_response,
+                time_submitted=queued.accepted_at,
+                media_key=queued.media_key,
+                media_content_type=queued.media_content_type,
+                media_size=queued.media_size,
+                media_checksum=queued.media_checksum
+            )
+            for queued in winners
+        ]
+        save_submissions(submissions)
+        refresh_progress_for((queued.user_id, queued.module_id) for queued in winners)
+
+        saved = {queued.id: submission for queued, submission in zip(winners, submissions)}
+        now = timezone.now()
+        for queued in batch:
+            queued.processed_at = now
+            if queued.id in saved:
+                queued.status = QueuedSubmissionStatus.SAVED
+                queued.submission = saved[queued.id]
+            else:
+                queued.status = QueuedSubmissionStatus.SUPERSEDED
+                if queued.media_key:
+                    transaction.on_commit(functools.partial(delete_media, queued.media_key))
+        QueuedSubmission.objects.bulk_update(batch, ['status', 'processed_at', 'submission'])
+    return len(batch)
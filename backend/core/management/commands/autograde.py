@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.autograde import regrade_questions
+from core.models import Question, QuestionType
+
+
+class Command(BaseCommand):
+    help = "Grade stored multiple choice and written answers against their questions' answer keys"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, help='Only grade this course')
+        parser.add_argument('--question', type=int, action='append', help='Only grade this question (repeatable)')
+
+    def handle(self, *args, **options):
+        questions = Question.objects.filter(
+            question_type__in=[QuestionType.MULTIPLE_CHOICE, QuestionType.WRITTEN],
+            questiontocorrectanswers__isnull=False
+        )
+        if options['question']:
+            questions = questions.filter(id__in=options['question'])
+        elif options['course']:
+            questions = questions.filter(module__course_id=options['course'])
+
+        question_ids = list(questions.values_list('id', flat=True).distinct())
+        graded = 0
+        for question_id in question_ids:
+            graded += regrade_questions([question_id])
+        self.stdout.write(self.style.SUCCESS(
+            f"Auto-graded {graded} answers to {len(question_ids)} questions"
+        ))
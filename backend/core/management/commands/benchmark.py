@@ -0,0 +1,200 @@
+"""
+Time bulk operations against the configured database.
+
+    python manage.py benchmark roster --rows 10000
+    python manage.py benchmark clone --modules 50 --questions 40
+    python manage.py benchmark grading --rows 200
+    python manage.py benchmark autograde --rows 20000
+    python manage.py benchmark questions --questions 50 --requests 200
+
+Each scenario builds its own fixtures and runs inside a transaction that is
+rolled back afterwards, so it can be pointed at a development database
+without leaving anything behind. Reports wall time and query count.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.autograde import regrade_questions
+from core.cloning import clone_course
+from core.content_cache import reset_stats, stats
+from core.grading import apply_question_grade, apply_submission_grades
+from core.models import (
+    Course, CourseToStudents, CourseToTeachers, Module, Question, QuestionToCorrectAnswers, Submission, User
+)
+from core.roster import import_roster
+from core.views import ModuleViewSet
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Time bulk operations (roster import, course cloning, grading, auto-grading, question reads) and report their query counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=['roster', 'clone', 'grading', 'autograde', 'questions'])
+        parser.add_argument('--rows', type=int, default=10000, help='Roster rows to import, or submissions to grade')
+        parser.add_argument('--modules', type=int, default=50, help='Modules in the cloned course')
+        parser.add_argument('--questions', type=int, default=40, help='Questions per cloned or read module')
+        parser.add_argument('--requests', type=int, default=100, help='Requests to time per role')
+
+    def handle(self, *args, **options):
+        scenario = getattr(self, f"scenario_{options['scenario']}")
+        try:
+            with transaction.atomic():
+                scenario(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def measure(self, label, func):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label}: {elapsed:.2f}s, {len(context.captured_queries)} queries")
+        return result
+
+    def make_course(self):
+        teacher = User.objects.create_user(
+            username='benchmark-teacher@example.com', email='benchmark-teacher@example.com',
+            password=None, isStudent=False
+        )
+        course = Course.objects.create(course_name='Benchmark course')
+        CourseToTeachers.objects.create(course=course, user=teacher)
+        return teacher, course
+
+    # ------------------------------------------------------------------
+    # Scenarios
+    # ------------------------------------------------------------------
+
+    def scenario_roster(self, options):
+        _, course = self.make_course()
+
+        rows = [
+            {'email': f'benchmark-{i}@example.com', 'first_name': 'Student', 'last_name': str(i)}
+            for i in range(options['rows'])
+        ]
+        report = self.measure(
+            f"Import {len(rows)} new users", lambda: import_roster(course, rows)
+        )
+        self.stdout.write(f"  {report['summary']}")
+        report = self.measure(
+            f"Re-import {len(rows)} enrolled users", lambda: import_roster(course, rows)
+        )
+        self.stdout.write(f"  {report['summary']}")
+
+    def scenario_clone(self, options):
+        teacher, course = self.make_course()
+        modules = Module.objects.bulk_create([
+            Module(course=course, module_name=f'Module {order}', module_order=order, is_posted=True)
+            for order in range(1, options['modules'] + 1)
+        ])
+        questions = Question.objects.bulk_create([
+            Question(
+                module=module, question_type='multiple_choice', question_text=f'Question {order}',
+                mcq_options=['a', 'b', 'c'], question_order=order, score_total=10
+            )
+            for module in modules
+            for order in range(1, options['questions'] + 1)
+        ])
+        QuestionToCorrectAnswers.objects.bulk_create([
+            QuestionToCorrectAnswers(question=question, correct_answer='a') for question in questions
+        ])
+
+        self.measure(
+            f"Clone {len(modules)} modules, {len(questions)} questions",
+            lambda: clone_course(course, teachers=[teacher])
+        )
+
+    def make_answers(self, course, question_type, responses):
+        """One student per response, each answering a single question"""
+        students = User.objects.bulk_create([
+            User(username=f'benchmark-{i}@example.com', email=f'benchmark-{i}@example.com', password='!')
+            for i in range(len(responses))
+        ])
+        CourseToStudents.objects.bulk_create([CourseToStudents(course=course, user=s) for s in students])
+        module = Module.objects.create(course=course, module_name='Quiz', module_order=1, is_posted=True)
+        question = Question.objects.create(
+            module=module, question_type=question_type, question_text='Question', question_order=1,
+            mcq_options=['a', 'b', 'c'] if question_type == 'multiple_choice' else [], score_total=10
+        )
+        submissions = Submission.objects.bulk_create([
+            Submission(
+                user=s, module=module, question=question,
+                submission_type=question_type, submission_response=response
+            )
+            for s, response in zip(students, responses)
+        ])
+        return question, submissions
+
+    def scenario_grading(self, options):
+        _, course = self.make_course()
+        question, submissions = self.make_answers(course, 'written', ['answer'] * options['rows'])
+
+        self.measure(
+            f"Grade {len(submissions)} submissions one at a time",
+            lambda: [apply_question_grade(question, s.user, 5, 10) for s in submissions]
+        )
+        self.measure(
+            f"Grade {len(submissions)} submissions in bulk",
+            lambda: apply_submission_grades([(s, 7, 10, False) for s in submissions])
+        )
+
+    def scenario_autograde(self, options):
+        _, course = self.make_course()
+        question, submissions = self.make_answers(
+            course, 'multiple_choice', ['abc'[i % 3] for i in range(options['rows'])]
+        )
+        QuestionToCorrectAnswers.objects.create(question=question, correct_answer='a')
+
+        self.measure(f"Grade {len(submissions)} stored answers", lambda: regrade_questions([question.id]))
+        QuestionToCorrectAnswers.objects.filter(question=question).update(correct_answer='b')
+        self.measure(f"Re-grade {len(submissions)} answers after a key change", lambda: regrade_questions([question.id]))
+
+    def scenario_questions(self, options):
+        teacher, course = self.make_course()
+        student = User.objects.create_user(
+            username='benchmark-student@example.com', email='benchmark-student@example.com', password=None
+        )
+        CourseToStudents.objects.create(course=course, user=student)
+        module = Module.objects.create(course=course, module_name='Module', module_order=1, is_posted=True)
+        questions = Question.objects.bulk_create([
+            Question(
+                module=module, question_type='multiple_choice', question_text=f'Question {order}',
+                mcq_options=['a', 'b', 'c', 'd'], question_order=order, score_total=10
+            )
+            for order in range(1, options['questions'] + 1)
+        ])
+        QuestionToCorrectAnswers.objects.bulk_create([
+            QuestionToCorrectAnswers(question=question, correct_answer=answer)
+            for question in questions
+            for answer in ('a', 'b')
+        ])
+
+        view = ModuleViewSet.as_view({'get': 'get_all_questions'})
+        factory = APIRequestFactory()
+        for role, user in (('student', student), ('teacher', teacher)):
+            reset_stats()
+            timings = []
+            for _ in range(options['requests']):
+                request = factory.get(f'/api/modules/{module.id}/questions/')
+                force_authenticate(request, user=user)
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    response = view(request, pk=module.id)
+                    response.render()
+                    timings.append(time.perf_counter() - started)
+            self.stdout.write(
+                f"GET module questions as {role} ({len(questions)} questions): "
+                f"median {statistics.median(timings) * 1000:.2f}ms, "
+                f"p95 {statistics.quantiles(timings, n=20)[-1] * 1000:.2f}ms, "
+                f"{len(context.captured_queries)} queries, {len(response.content)} bytes, "
+                f"content cache {stats()['module-questions']}"
+            )
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.ingestion import drain_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Write answers accepted by the submission queue (SUBMISSION_QUEUE_ENABLED) to the "
+        "Submission table. Several workers can run at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Queued answers written per transaction')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when the queue is empty')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait between polls of an empty queue')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = drain_batch(options['batch_size'])
+            total += processed
+            if processed:
+                self.stdout.write(f"Processed {processed} queued submissions")
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Queue drained: {total} submissions processed"))
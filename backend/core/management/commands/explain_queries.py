@@ -0,0 +1,293 @@
+"""
+Print EXPLAIN ANALYZE plans for the queries views.py runs on every request.
+
+    python manage.py explain_queries --seed   # fill an EMPTY database first
+    python manage.py explain_queries > QUERY_PLANS.md
+
+--seed builds a synthetic dataset with set-based INSERT ... SELECT
+generate_series statements (PostgreSQL only). The defaults produce
+5,000 students x 10 courses x 20 modules x 10 questions = 1,000,000
+submissions.
+"""
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import (
+    Course, CourseToStudents, CourseToTeachers, Module, Question,
+    QuestionToCorrectAnswers, Submission, User, UserModuleGrade, UserModuleProgress,
+    UserQuestionGrade
+)
+from core.grading import rebuild_rollups
+from core.grading_queue import _queue
+from core.membership import load_memberships
+from core.progress import has_incomplete_previous_modules
+
+INDEX_NODE = re.compile(r'Index Scan|Index Only Scan|Bitmap Index Scan')
+SEQ_SCAN_NODE = re.compile(r'Seq Scan on (\w+)')
+
+# Tables up to this many 8 kB pages (1 MB) are read whole more cheaply than
+# through an index, so a sequential scan of them is expected
+SMALL_TABLE_PAGES = 128
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN plans for the hot views.py queries as a markdown report"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Populate an empty database with synthetic data first')
+        parser.add_argument('--courses', type=int, default=10)
+        parser.add_argument('--students-per-course', type=int, default=500)
+        parser.add_argument('--modules-per-course', type=int, default=20)
+        parser.add_argument('--questions-per-module', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('explain_queries requires PostgreSQL')
+
+        if options['seed']:
+            if Submission.objects.exists() or Course.objects.exists():
+                raise CommandError('--seed only runs against an empty database')
+            self.seed(options)
+
+        self.report()
+
+    # ------------------------------------------------------------------
+    # Synthetic data
+    # ------------------------------------------------------------------
+
+    def seed(self, options):
+        params = {
+            'courses': options['courses'],
+            'students': options['students_per_course'],
+            'modules': options['modules_per_course'],
+            'questions': options['questions_per_module'],
+        }
+        tables = {
+            'user': User._meta.db_table,
+            'course': Course._meta.db_table,
+            'module': Module._meta.db_table,
+            'question': Question._meta.db_table,
+            'answer': QuestionToCorrectAnswers._meta.db_table,
+            'student': CourseToStudents._meta.db_table,
+            'teacher': CourseToTeachers._meta.db_table,
+            'submission': Submission._meta.db_table,
+            'grade': UserQuestionGrade._meta.db_table,
+            'progress': UserModuleProgress._meta.db_table,
+        }
+        statements = [
+            # One teacher per course, then every student in exactly one course
+            """
+            INSERT INTO {user} (password, is_superuser, username, first_name, last_name, email,
+                                is_staff, is_active, date_joined, "isStudent", token_version)
+            SELECT '!', false, 'teacher' || c || '@seed', 'Teacher', c::text, 'teacher' || c || '@seed',
+                   false, true, now(), false, 0
+            FROM generate_series(1, %(courses)s) c
+            """,
+            """
+            INSERT INTO {user} (password, is_superuser, username, first_name, last_name, email,
+                                is_staff, is_active, date_joined, "isStudent", token_version)
+            SELECT '!', false, 'student' || s || '@seed', 'Student', s::text, 'student' || s || '@seed',
+                   false, true, now(), true, 0
+            FROM generate_series(1, %(courses)s * %(students)s) s
+            """,
+            """
+            INSERT INTO {course} (course_name, score_total, updated_at, content_updated_at)
+            SELECT 'Course ' || c, 0, now(), now() FROM generate_series(1, %(courses)s) c
+            """,
+            """
+            INSERT INTO {teacher} (course_id, user_id)
+            SELECT c.id, u.id FROM {course} c
+            JOIN {user} u ON u.username = 'teacher' || substr(c.course_name, 8) || '@seed'
+            """,
+            """
+            INSERT INTO {student} (course_id, user_id)
+            SELECT c.id, u.id
+            FROM (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM {user} WHERE "isStudent") u
+            JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM {course}) c
+              ON c.n = u.n %% %(courses)s
+            """,
+            """
+            INSERT INTO {module} (course_id, module_name, module_order, score_total, is_posted,
+                                  updated_at, content_updated_at)
+            SELECT c.id, 'Module ' || m, m, 0, true, now(), now()
+            FROM {course} c, generate_series(1, %(modules)s) m
+            """,
+            """
+            INSERT INTO {question} (module_id, question_type, question_text, mcq_options,
+                                    question_order, score_total, updated_at)
+            SELECT m.id, 'written', 'Question ' || q, '[]'::jsonb, q, 10, now()
+            FROM {module} m, generate_series(1, %(questions)s) q
+            """,
+            """
+            INSERT INTO {answer} (question_id, correct_answer)
+            SELECT id, 'answer' FROM {question}
+            """,
+            """
+            INSERT INTO {submission} (user_id, module_id, question_id, submission_type,
+                                      submission_response, time_submitted,
+                                      media_key, media_content_type, media_checksum, is_graded)
+            SELECT cs.user_id, q.module_id, q.id, 'written', 'answer',
+                   now() - (random() * interval '120 days'), '', '', '', false
+            FROM {student} cs
+            JOIN {module} m ON m.course_id = cs.course_id
+            JOIN {question} q ON q.module_id = m.id
+            """,
+            """
+            INSERT INTO {grade} (question_id, user_id, score, total, is_overdue, is_autograded)
+            SELECT question_id, user_id, 7, 10, false, false FROM {submission} WHERE id %% 2 = 0
+            """,
+            """
+            UPDATE {submission} SET is_graded = true WHERE id %% 2 = 0
+            """,
+            """
+            INSERT INTO {progress} (module_id, user_id, answered_count, is_completed, completed_at)
+            SELECT module_id, user_id, count(*), true, max(time_submitted)
+            FROM {submission} GROUP BY module_id, user_id
+            """,
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement.format(**tables), params)
+        rebuild_rollups()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stderr.write(f'Seeded {Submission.objects.count()} submissions')
+
+    # ------------------------------------------------------------------
+    # Report
+    # ------------------------------------------------------------------
+
+    def hot_queries(self):
+        """(view, queryset) pairs mirroring what views.py executes"""
+        student = User.objects.filter(isStudent=True).order_by('id').first()
+        teacher = User.objects.filter(isStudent=False).order_by('id').first()
+        enrollment = CourseToStudents.objects.filter(user=student).first()
+        if not (student and teacher and enrollment):
+            raise CommandError('Database has no enrolled students, run with --seed first')
+        course = enrollment.course
+        module = Module.objects.filter(course=course).order_by('-module_order').first()
+        question = Question.objects.filter(module=module).first()
+
+        return [
+            ('core.membership.load_memberships (student)',
+             _ExistsQuery(lambda: load_memberships(student))),
+            ('core.membership.load_memberships (teacher)',
+             _ExistsQuery(lambda: load_memberships(teacher))),
+            ('CourseViewSet.get_queryset',
+             Course.objects.filter(id__in=list(load_memberships(student)))),
+            ('CourseViewSet.get_course_modules / ModuleViewSet.get_queryset',
+             Module.objects.filter(course=course).order_by('module_order')),
+            ('CourseViewSet.get_course_students',
+             User.objects.filter(coursetostudents__course=course).distinct()),
+            ('CourseViewSet.get_course_dashboard (progress)',
+             UserModuleProgress.objects.filter(user=student, module__course=course)
+             .values('module_id', 'answered_count', 'is_completed')),
+            ('CourseViewSet.get_course_dashboard (grades)',
+             UserModuleGrade.objects.filter(user=student, module__course=course)
+             .values('module_id', 'score', 'total')),
+            ('ModuleViewSet.get_all_questions',
+             Question.objects.filter(module=module).order_by('question_order')),
+            ('ModuleViewSet._is_module_accessible',
+             _ExistsQuery(lambda: has_incomplete_previous_modules(module, student))),
+            ('ModuleViewSet._is_module_completed',
+             UserModuleProgress.objects.filter(user=student, module=module, is_completed=True)),
+            ('QuestionSerializer.get_correct_answers',
+             QuestionToCorrectAnswers.objects.filter(question=question)),
+            ('SubmissionViewSet.get_queryset (module_id)',
+             Submission.objects.filter(user=student, module=module).order_by('-time_submitted')),
+            ('SubmissionViewSet.get_queryset (question_id)',
+             Submission.objects.filter(user=student, question=question).order_by('-time_submitted')),
+            ('SubmissionViewSet.get_user_question_submission',
+             Submission.objects.filter(user_id=student.id, question_id=question.id)),
+            ('SubmissionSerializer.get_grade / grade_submission',
+             UserQuestionGrade.objects.filter(question=question, user=student)),
+            ('grading_queue.claim_next (without FOR UPDATE SKIP LOCKED)',
+             _queue(course).filter(claimed_by__isnull=True)[:1]),
+            ('grading_queue.claim_next with module_id (without FOR UPDATE SKIP LOCKED)',
+             _queue(course, module.id).filter(claimed_by__isnull=True)[:1]),
+            ('progress.refresh_user_progress',
+             Submission.objects.filter(user=student, module=module).values('question_id').distinct()),
+        ]
+
+    def report(self):
+        counts = {
+            model._meta.verbose_name_plural: model.objects.count()
+            for model in (Course, Module, Question, User, Submission, UserQuestionGrade)
+        }
+
+        out = self.stdout
+        out.write('# Query plans for hot views.py lookups\n\n')
+        out.write('Generated by `python manage.py explain_queries` (PostgreSQL, after ANALYZE) against:\n\n')
+        for label, count in counts.items():
+            out.write(f'- {count:,} {label.lower()}\n')
+
+        missing = []
+        for name, queryset in self.hot_queries():
+            plan = queryset.explain(analyze=True)
+            uses_index = bool(INDEX_NODE.search(plan))
+            out.write(f'\n## {name}\n')
+            out.write(f'Uses index: {"yes" if uses_index else "NO"}\n')
+            out.write(f'```\n{plan}\n```\n')
+            if not uses_index:
+                # Tables that fit in a few pages are cheaper to scan than to
+                # probe; say so, and show that the index is still eligible
+                # for the query
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                    forced = queryset.explain(analyze=True)
+                note = self.small_table_note(plan)
+                if note and INDEX_NODE.search(forced):
+                    out.write(f'{note} With `enable_seqscan = off`:\n')
+                    out.write(f'```\n{forced}\n```\n')
+                else:
+                    out.write('**No index serves this query at this data size.**\n')
+                    missing.append(name)
+
+        if missing:
+            self.stderr.write(self.style.WARNING(f'No index used by: {", ".join(missing)}'))
+
+    def small_table_note(self, plan):
+        """
+        Why a sequential scan is expected: the size of the tables plan reads
+        whole, or None if one of them is too big for that to be the reason
+        """
+        tables = sorted(set(SEQ_SCAN_NODE.findall(plan)))
+        if not tables:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT relname, reltuples::bigint, relpages FROM pg_class WHERE relname = ANY(%s)',
+                [tables]
+            )
+            sizes = {table: (rows, pages) for table, rows, pages in cursor.fetchall()}
+        if any(sizes.get(table, (0, SMALL_TABLE_PAGES + 1))[1] > SMALL_TABLE_PAGES for table in tables):
+            return None
+        described = ', '.join(
+            f'`{table}` ({sizes[table][0]:,} rows in {sizes[table][1]} '
+            f'{"page" if sizes[table][1] == 1 else "pages"})'
+            for table in tables
+        )
+        return (
+            f'Sequential scan expected: {described} {"is" if len(tables) == 1 else "are"} '
+            'read whole more cheaply than through an index. The planner switches to the '
+            'index as the table grows.'
+        )
+
+
+class _ExistsQuery:
+    """Capture the single query a helper runs so it can be explained"""
+
+    def __init__(self, run):
+        self.run = run
+
+    def explain(self, **options):
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as captured:
+            self.run()
+        sql = captured.captured_queries[-1]['sql']
+        prefix = 'EXPLAIN ANALYZE ' if options.get('analyze') else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            return '\n'.join(row[0] for row in cursor.fetchall())
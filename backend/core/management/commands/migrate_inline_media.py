@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.media import InvalidMedia, delete_media, parse_data_url, store_media
+from core.models import Submission
+
+DEFAULT_CHECKPOINT = os.path.join(settings.BASE_DIR, '.inline_media_checkpoint.json')
+
+COUNTERS = ('migrated', 'failed', 'bytes_reclaimed', 'bytes_stored')
+
+
+class Command(BaseCommand):
+    help = (
+        "Move audio/video answers stored inline as base64 data URLs out of "
+        "Submission.submission_response and into file storage. Safe to kill and rerun: "
+        "progress is checkpointed after every batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Rows fetched per keyset batch')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+        parser.add_argument(
+            '--max-bytes-per-second', type=int, default=0,
+            help='Throttle writes to storage to roughly this rate (0 = unlimited)'
+        )
+        parser.add_argument('--limit', type=int, default=0, help='Stop after this many rows (0 = all)')
+        parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help='Progress file used to resume')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would move without writing')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        state = {'last_id': 0, **{name: 0 for name in COUNTERS}}
+        if not options['restart'] and os.path.exists(options['checkpoint']):
+            with open(options['checkpoint']) as f:
+                state.update(json.load(f))
+            self.stdout.write(f"Resuming after submission {state['last_id']}")
+
+        pending = Submission.objects.filter(
+            media_key='', submission_response__startswith='data:'
+        ).only('id', 'user_id', 'question_id', 'submission_response').order_by('id')
+
+        started = time.monotonic()
+        stored_this_run = 0
+        seen = 0
+        while True:
+            batch = pending.filter(id__gt=state['last_id'])[:options['batch_size']]
+            rows = 0
+            # Each row can be megabytes, so stream them instead of caching the batch
+            for submission in batch.iterator(chunk_size=options['batch_size']):
+                rows += 1
+                seen += 1
+                state['last_id'] = submission.id
+                inline_size = len(submission.submission_response)
+                if dry_run:
+                    state['migrated'] += 1
+                    state['bytes_reclaimed'] += inline_size
+                    continue
+
+                stored = self.migrate(submission)
+                if stored is None:
+                    state['failed'] += 1
+                else:
+                    state['migrated'] += 1
+                    state['bytes_reclaimed'] += inline_size
+                    state['bytes_stored'] += stored.size
+                    stored_this_run += stored.size
+                    self.throttle(options['max_bytes_per_second'], stored_this_run, started)
+                if options['limit'] and seen >= options['limit']:
+                    break
+
+            if not dry_run and rows:
+                self.save_checkpoint(options['checkpoint'], state)
+            if rows < options['batch_size'] or (options['limit'] and seen >= options['limit']):
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        prefix = 'Would migrate' if dry_run else 'Migrated'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {state['migrated']} submissions, {state['failed']} failed; "
+            f"reclaimed {state['bytes_reclaimed']} bytes of inline data "
+            f"({state['bytes_stored']} bytes written to storage)"
+        ))
+        if not dry_run and state['migrated']:
+            self.stdout.write(
+                "Run VACUUM (or VACUUM FULL / pg_repack to return space to the OS) on core_submission"
+            )
+
+    def migrate(self, submission):
+        """Copy one row's payload to storage and point the row at it"""
+        parsed = parse_data_url(submission.submission_response)
+        if parsed is None:
+            self.stderr.write(f"Submission {submission.id}: not a base64 data URL")
+            return None
+        content_type, reader = parsed
+        try:
+            stored = store_media(reader, content_type, submission.user_id, submission.question_id)
+        except InvalidMedia as e:
+            self.stderr.write(f"Submission {submission.id}: {e}")
+            return None
+
+        # Skip rows the student re-answered while the file was being copied
+        updated = Submission.objects.filter(
+            id=submission.id, media_key='', submission_response__startswith='data:'
+        ).update(**stored.as_fields())
+        if not updated:
+            self.stderr.write(f"Submission {submission.id}: changed during migration, skipped")
+            delete_media(stored.key)
+            return None
+        return stored
+
+    def throttle(self, max_bytes_per_second, stored_bytes, started):
+        if not max_bytes_per_second:
+            return
+        ahead = stored_bytes / max_bytes_per_second - (time.monotonic() - started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+    def save_checkpoint(self, path, state):
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
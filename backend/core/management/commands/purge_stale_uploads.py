@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import MediaUpload, UploadStatus
+from core.uploads import discard_chunks
+
+
+class Command(BaseCommand):
+    help = "Delete chunked uploads that were never completed, along with their staged chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=48, help='Age after which a pending upload is stale')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = MediaUpload.objects.filter(status=UploadStatus.PENDING, created_at__lt=cutoff)
+
+        purged = 0
+        for upload in stale.iterator():
+            discard_chunks(upload)
+            upload.delete()
+            purged += 1
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} stale uploads"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Module
+from core.progress import rebuild_progress
+
+
+class Command(BaseCommand):
+    help = "Rebuild UserModuleProgress from the Submission table (backfill and drift repair)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, help='Only rebuild modules in this course')
+        parser.add_argument('--module', type=int, action='append', help='Only rebuild this module (repeatable)')
+
+    def handle(self, *args, **options):
+        module_ids = None
+        if options['module']:
+            module_ids = options['module']
+        elif options['course']:
+            module_ids = list(
+                Module.objects.filter(course_id=options['course']).values_list('id', flat=True)
+            )
+
+        written = rebuild_progress(module_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} progress rows"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.grading import rebuild_rollups
+from core.models import Module, UserCourseGrade, UserModuleGrade
+
+
+class Command(BaseCommand):
+    help = "Rebuild UserModuleGrade and UserCourseGrade rollups from UserQuestionGrade"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, help='Only rebuild this course')
+        parser.add_argument('--module', type=int, action='append', help='Only rebuild this module (repeatable)')
+
+    def handle(self, *args, **options):
+        module_ids = None
+        if options['module']:
+            module_ids = options['module']
+        elif options['course']:
+            module_ids = list(
+                Module.objects.filter(course_id=options['course']).values_list('id', flat=True)
+            )
+
+        rebuild_rollups(module_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt rollups: {UserModuleGrade.objects.count()} module grades, "
+            f"{UserCourseGrade.objects.count()} course grades"
+        ))
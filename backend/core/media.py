@@ -0,0 +1,150 @@
+"""
+Storage of audio/video submission payloads.
+
+Media answers are written to the default storage backend (S3 in production,
+the filesystem when MEDIA_STORAGE_BACKEND=local) and the Submission row only
+keeps the storage key, content type, size and sha256 checksum. Payloads are
+copied in fixed-size chunks so a worker never holds a whole recording in
+memory twice.
+"""
+import base64
+import binascii
+import hashlib
+import re
+import tempfile
+import uuid
+from dataclasses import dataclass
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from .models import QuestionType
+
+MEDIA_TYPES = (QuestionType.AUDIO, QuestionType.VIDEO)
+
+CHUNK_SIZE = 64 * 1024
+# Spool to disk once a payload is bigger than this
+SPOOL_MAX_SIZE = 1024 * 1024
+
+DATA_URL = re.compile(r'^data:(?P<content_type>[\w.+-]+/[\w.+-]+)(?:;[\w=.+-]+)*;base64,')
+
+EXTENSIONS = {
+    'audio/webm': '.webm',
+    'video/webm': '.webm',
+    'audio/ogg': '.ogg',
+    'audio/mpeg': '.mp3',
+    'audio/mp4': '.m4a',
+    'audio/wav': '.wav',
+    'video/mp4': '.mp4',
+    'video/quicktime': '.mov',
+}
+
+
+class InvalidMedia(ValueError):
+    pass
+
+
+@dataclass
+class StoredMedia:
+    key: str
+    content_type: str
+    size: int
+    checksum: str
+
+    def as_fields(self):
+        """Submission field values that point the row at this media"""
+        return {
+            'media_key': self.key,
+            'media_content_type': self.content_type,
+            'media_size': self.size,
+            'media_checksum': self.checksum,
+            'submission_response': '',
+        }
+
+
+# Field values for a submission that has no stored media
+NO_MEDIA = {
+    'media_key': '',
+    'media_content_type': '',
+    'media_size': None,
+    'media_checksum': '',
+}
+
+
+class Base64Reader:
+    """File-like object that decodes a base64 string a chunk at a time"""
+
+    def __init__(self, encoded, start=0):
+        self.encoded = encoded
+        self.position = start
+
+    def read(self, size=CHUNK_SIZE):
+        # 4 base64 characters decode to 3 bytes
+        length = max(4, (size // 3) * 4)
+        piece = self.encoded[self.position:self.position + length]
+        self.position += length
+        if not piece:
+            return b''
+        try:
+            return base64.b64decode(piece, validate=True)
+        except (binascii.Error, ValueError) as e:
+            raise InvalidMedia(f'Invalid base64 media payload: {e}')
+
+
+def parse_data_url(value):
+    """Return (content_type, reader) for a base64 data URL, or None"""
+    if not isinstance(value, str):
+        return None
+    match = DATA_URL.match(value)
+    if not match:
+        return None
+    return match.group('content_type'), Base64Reader(value, start=match.end())
+
+
+def media_from_request(request, submission_type):
+    """
+    Find an audio/video payload in a submission request. Accepts a multipart
+    file under "media" or a base64 data URL under "response". Returns
+    (reader, content_type) or None when the submission is not media.
+    """
+    if submission_type not in MEDIA_TYPES:
+        return None
+    upload = request.FILES.get('media') if hasattr(request, 'FILES') else None
+    if upload is not None:
+        return upload, upload.content_type or 'application/octet-stream'
+    parsed = parse_data_url(
+        request.data.get('response') or request.data.get('submission_response')
+    )
+    if parsed is None:
+        return None
+    content_type, reader = parsed
+    return reader, content_type
+
+
+def media_key(user_id, question_id, content_type):
+    extension = EXTENSIONS.get(content_type.split(';')[0], '.bin')
+    return f'submissions/{user_id}/{question_id}/{uuid.uuid4().hex}{extension}'
+
+
+def store_media(reader, content_type, user_id, question_id):
+    """Copy a payload into the default storage backend and describe it"""
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as buffer:
+        while True:
+            chunk = reader.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            buffer.write(chunk)
+        if size == 0:
+            raise InvalidMedia('Media payload is empty')
+        buffer.seek(0)
+        key = default_storage.save(media_key(user_id, question_id, content_type), File(buffer))
+    return StoredMedia(key=key, content_type=content_type, size=size, checksum=digest.hexdigest())
+
+
+def delete_media(key):
+    if key:
+        default_storage.delete(key)
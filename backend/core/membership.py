@@ -0,0 +1,153 @@
+"""
+Course membership lookups.
+
+Which courses a user studies or teaches in is loaded once, as a
+{course_id: role} map, and reused:
+
+- within a request it is kept on the request object, so however many
+  checks an endpoint makes they share one lookup;
+- across requests it is cached under a per-user version token
+  (MEMBERSHIP_CACHE_TTL). bump_membership_version() replaces the token
+  whenever an enrollment changes, which orphans the old map instead of
+  racing to delete it. Saving or deleting a CourseToStudents or
+  CourseToTeachers row bumps its user (the receivers at the bottom); bulk
+  writes, which send no signals, call it themselves.
+
+A user listed both as a student and as a teacher of a course gets the role
+matching their account type, which is how the views always resolved it.
+
+The permission classes at the bottom check a view's object (a Course, or
+anything with a course_id) against the same map.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.permissions import BasePermission
+
+from .models import Course, CourseToStudents, CourseToTeachers
+
+STUDENT = 'student'
+TEACHER = 'teacher'
+
+
+def _version_key(user_id):
+    return f'membership-version:{user_id}'
+
+
+def _version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_membership_version(*user_ids):
+    """
+    Invalidate the cached memberships of user_ids. Done again once the
+    transaction commits, so a request reading the old rows in the meantime
+    cannot cache them under the new version.
+    """
+    def bump():
+        cache.set_many({_version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
+
+    if user_ids:
+        bump()
+        transaction.on_commit(bump)
+
+
+def load_memberships(user):
+    """{course_id: role} from the database, in one query"""
+    rows = CourseToStudents.objects.filter(user=user).values_list('course_id', Value(STUDENT)).union(
+        CourseToTeachers.objects.filter(user=user).values_list('course_id', Value(TEACHER)),
+        all=True
+    )
+    preferred = STUDENT if user.isStudent else TEACHER
+    roles = {}
+    for course_id, role in rows:
+        if roles.get(course_id) != preferred:
+            roles[course_id] = role
+    return roles
+
+
+def user_memberships(user):
+    """user's {course_id: role}, from the cache when their memberships have not changed"""
+    key = f'memberships:{user.id}:{_version(user.id)}'
+    roles = cache.get(key)
+    if roles is None:
+        roles = load_memberships(user)
+        cache.set(key, roles, settings.MEMBERSHIP_CACHE_TTL)
+    return roles
+
+
+def memberships(request):
+    """The requesting user's {course_id: role}, looked up at most once per request"""
+    roles = getattr(request, '_course_roles', None)
+    if roles is None:
+        roles = user_memberships(request.user) if request.user.is_authenticated else {}
+        request._course_roles = roles
+    return roles
+
+
+def course_role(request, course_id):
+    """STUDENT, TEACHER or None"""
+    return memberships(request).get(course_id)
+
+
+def is_course_student(request, course_id):
+    return course_role(request, course_id) == STUDENT
+
+
+def is_course_teacher(request, course_id):
+    return course_role(request, course_id) == TEACHER
+
+
+def course_ids(request, role=None):
+    """Ids of the courses the user has role in; by default the role of their account type"""
+    if role is None:
+        role = STUDENT if request.user.isStudent else TEACHER
+    return [course_id for course_id, course_role in memberships(request).items() if course_role == role]
+
+
+def _course_id(obj):
+    return obj.id if isinstance(obj, Course) else obj.course_id
+
+
+class IsCourseMember(BasePermission):
+    """The user studies or teaches in the object's course"""
+    message = "You don't have access to this course"
+
+    def has_object_permission(self, request, view, obj):
+        return course_role(request, _course_id(obj)) is not None
+
+
+class IsCourseStudent(BasePermission):
+    """The user is a student of the object's course"""
+    message = "Only students of this course can do this"
+
+    def has_object_permission(self, request, view, obj):
+        return is_course_student(request, _course_id(obj))
+
+
+class IsCourseTeacher(BasePermission):
+    """The user is a teacher of the object's course"""
+    message = "Only teachers of this course can do this"
+
+    def has_object_permission(self, request, view, obj):
+        return is_course_teacher(request, _course_id(obj))
+
+
+# ----------------------------------------------------------------------
+# Invalidation
+# ----------------------------------------------------------------------
+
+@receiver([post_save, post_delete], sender=CourseToStudents)
+@receiver([post_save, post_delete], sender=CourseToTeachers)
+def _enrollment_changed(sender, instance, **kwargs):
+    bump_membership_version(instance.user_id)
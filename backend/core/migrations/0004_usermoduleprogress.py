@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Access checks read progress from this table, so it must cover every
+# submission made before it existed. Same rules as
+# core.progress.rebuild_progress(), in SQL against the schema as it is here:
+# completed_at is when the last question was first answered.
+BACKFILL = """
+    INSERT INTO core_usermoduleprogress (user_id, module_id, answered_count, is_completed, completed_at)
+    SELECT a.user_id, a.module_id, a.answered,
+           t.total > 0 AND a.answered >= t.total,
+           CASE WHEN t.total > 0 AND a.answered >= t.total THEN a.last_answered END
+    FROM (
+        SELECT user_id, module_id, COUNT(*) AS answered, MAX(first_answered) AS last_answered
+        FROM (
+            SELECT user_id, module_id, question_id, MIN(time_submitted) AS first_answered
+            FROM core_submission
+            GROUP BY user_id, module_id, question_id
+        ) first_answers
+        GROUP BY user_id, module_id
+    ) a
+    JOIN (
+        SELECT m.id, COUNT(q.id) AS total
+        FROM core_module m
+        LEFT JOIN core_question q ON q.module_id = m.id
+        GROUP BY m.id
+    ) t ON t.id = a.module_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_course_options_alter_coursetomodules_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserModuleProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answered_count', models.IntegerField(default=0)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.module')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'User Module Progress',
+                'constraints': [models.UniqueConstraint(fields=('user', 'module'), name='unique_user_module_progress')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
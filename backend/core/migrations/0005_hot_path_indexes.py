@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:31
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def delete_duplicates(model, fields, keep):
+    """Delete all but one row per combination of fields, keeping keep('id')"""
+    duplicates = (
+        model.objects.values(*fields)
+        .annotate(keep_id=keep('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for group in duplicates.iterator():
+        keep_id = group.pop('keep_id')
+        group.pop('rows')
+        model.objects.filter(**group).exclude(id=keep_id).delete()
+
+
+def dedupe(apps, schema_editor):
+    # Enrollments are identical rows, keep the original one. For grades the
+    # latest row is the one update_or_create would have been writing to.
+    delete_duplicates(apps.get_model('core', 'CourseToStudents'), ['course_id', 'user_id'], Min)
+    delete_duplicates(apps.get_model('core', 'CourseToTeachers'), ['course_id', 'user_id'], Min)
+    delete_duplicates(apps.get_model('core', 'UserQuestionGrade'), ['question_id', 'user_id'], Max)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_usermoduleprogress'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='module',
+            index=models.Index(fields=['course', 'module_order'], name='module_course_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['module', 'question_order'], name='question_module_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['user', 'question'], name='submission_user_q_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['user', 'module', '-time_submitted'], name='submission_user_module_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='coursetostudents',
+            constraint=models.UniqueConstraint(fields=('course', 'user'), name='unique_course_student'),
+        ),
+        migrations.AddConstraint(
+            model_name='coursetoteachers',
+            constraint=models.UniqueConstraint(fields=('course', 'user'), name='unique_course_teacher'),
+        ),
+        migrations.AddConstraint(
+            model_name='userquestiongrade',
+            constraint=models.UniqueConstraint(fields=('question', 'user'), name='unique_user_question_grade'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        # Nothing maintained these tables before, so whatever they hold
+        # (including the duplicates the constraints below would reject) is
+        # dropped here and rebuilt from the question grades by the next
+        # migration. Deleting from them queues no foreign key checks, so the
+        # constraints can still be added in this transaction.
+        migrations.RunSQL('DELETE FROM core_usermodulegrade', migrations.RunSQL.noop),
+        migrations.RunSQL('DELETE FROM core_usercoursegrade', migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='usercoursegrade',
+            constraint=models.UniqueConstraint(fields=('course', 'user'), name='unique_user_course_grade'),
+        ),
+        migrations.AddConstraint(
+            model_name='usermodulegrade',
+            constraint=models.UniqueConstraint(fields=('module', 'user'), name='unique_user_module_grade'),
+        ),
+    ]
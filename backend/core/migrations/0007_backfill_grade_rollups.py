@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:34
+
+from django.db import migrations
+
+# From here on the rollups are only adjusted by deltas (core.grading), so
+# they start as the sums of the question grades. This runs in its own
+# migration: inserting rollup rows queues deferred foreign key checks, and
+# PostgreSQL refuses to ALTER a table with pending checks in the same
+# transaction.
+MODULE_ROLLUPS = """
+    INSERT INTO core_usermodulegrade (module_id, user_id, score, total)
+    SELECT q.module_id, g.user_id, SUM(COALESCE(g.score, 0)), SUM(COALESCE(g.total, 0))
+    FROM core_userquestiongrade g
+    JOIN core_question q ON q.id = g.question_id
+    GROUP BY q.module_id, g.user_id
+"""
+
+COURSE_ROLLUPS = """
+    INSERT INTO core_usercoursegrade (course_id, user_id, score, total)
+    SELECT m.course_id, g.user_id, SUM(COALESCE(g.score, 0)), SUM(COALESCE(g.total, 0))
+    FROM core_userquestiongrade g
+    JOIN core_question q ON q.id = g.question_id
+    JOIN core_module m ON m.id = q.module_id
+    GROUP BY m.course_id, g.user_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_grade_rollup_constraints'),
+    ]
+
+    operations = [
+        migrations.RunSQL(MODULE_ROLLUPS, 'DELETE FROM core_usermodulegrade'),
+        migrations.RunSQL(COURSE_ROLLUPS, 'DELETE FROM core_usercoursegrade'),
+    ]
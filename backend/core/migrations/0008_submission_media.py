@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_backfill_grade_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='media_checksum',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='media_content_type',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='media_key',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='media_size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
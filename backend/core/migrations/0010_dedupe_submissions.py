@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:45
+
+from django.db import migrations
+
+
+def dedupe_submissions(apps, schema_editor):
+    # Keep each student's latest answer to a question, the one the frontend
+    # and get_user_question_submission treat as current. Stored media of the
+    # deleted rows is left in storage.
+    superseded = """
+        SELECT older.id FROM core_submission older
+        JOIN core_submission newer
+          ON older.user_id = newer.user_id
+         AND older.question_id = newer.question_id
+         AND (older.time_submitted, older.id) < (newer.time_submitted, newer.id)
+    """
+    # MediaUpload.submission is SET_NULL, which the database does not do for us
+    schema_editor.execute(
+        f"UPDATE core_mediaupload SET submission_id = NULL WHERE submission_id IN ({superseded})"
+    )
+    schema_editor.execute(
+        """
+        DELETE FROM core_submission older
+        USING core_submission newer
+        WHERE older.user_id = newer.user_id
+          AND older.question_id = newer.question_id
+          AND (older.time_submitted, older.id) < (newer.time_submitted, newer.id)
+        """
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_media_uploads'),
+    ]
+
+    # Deleting submissions queues deferred foreign key checks, and
+    # PostgreSQL refuses to ALTER a table with pending checks, so the
+    # unique constraint is added by the next migration
+    operations = [
+        migrations.RunPython(dedupe_submissions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:50
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_submission_idempotency'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='submission',
+            name='time_submitted',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name='QueuedSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('receipt', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('submission_type', models.CharField(choices=[('multiple_choice', 'Multiple Choice'), ('audio', 'Audio'), ('written', 'Written'), ('video', 'Video')], max_length=20)),
+                ('submission_response', models.TextField(blank=True, default='')),
+                ('media_key', models.CharField(blank=True, default='', max_length=255)),
+                ('media_content_type', models.CharField(blank=True, default='', max_length=100)),
+                ('media_size', models.BigIntegerField(blank=True, null=True)),
+                ('media_checksum', models.CharField(blank=True, default='', max_length=64)),
+                ('accepted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('saved', 'Saved'), ('superseded', 'Superseded')], default='pending', max_length=20)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.module')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.question')),
+                ('submission', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.submission')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='queued_submission_pending_idx')],
+            },
+        ),
+    ]
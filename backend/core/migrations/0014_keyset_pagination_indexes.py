@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_user_invites'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='module',
+            name='module_course_order_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='question',
+            name='question_module_order_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='submission',
+            name='submission_user_module_idx',
+        ),
+        migrations.AddIndex(
+            model_name='module',
+            index=models.Index(fields=['course', 'module_order', 'id'], name='module_course_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['module', 'question_order', 'id'], name='question_module_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['user', '-time_submitted', '-id'], name='submission_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['user', 'module', '-time_submitted', '-id'], name='submission_user_module_idx'),
+        ),
+    ]
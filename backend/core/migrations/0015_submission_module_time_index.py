@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['module', '-time_submitted', '-id'], name='submission_module_time_idx'),
+        ),
+    ]
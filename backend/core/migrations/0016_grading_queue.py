@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def mark_graded(apps, schema_editor):
+    Submission = apps.get_model('core', 'Submission')
+    UserQuestionGrade = apps.get_model('core', 'UserQuestionGrade')
+    Submission.objects.filter(Exists(UserQuestionGrade.objects.filter(
+        question_id=OuterRef('question_id'), user_id=OuterRef('user_id')
+    ))).update(is_graded=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_submission_module_time_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='claim_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='grading_claims', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='is_graded',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_graded, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('is_graded', False)), fields=['module', 'time_submitted', 'id'], name='submission_ungraded_idx'),
+        ),
+    ]
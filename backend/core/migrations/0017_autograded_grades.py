@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_grading_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userquestiongrade',
+            name='is_autograded',
+            field=models.BooleanField(default=False),
+        ),
+    ]
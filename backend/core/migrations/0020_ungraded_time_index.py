@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_content_timestamps'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('is_graded', False)), fields=['time_submitted', 'id'], name='submission_ungraded_time_idx'),
+        ),
+    ]
@@ -1,5 +1,11 @@
+import uuid
+
 from django.db import models
+from django.db.models import F, FilteredRelation, Prefetch, Q
+from django.db.models.functions import Substr
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 from django.conf import settings
 import json
 # Create your models here.
@@ -10,19 +16,96 @@ class QuestionType(models.TextChoices):
     WRITTEN = "written"
     VIDEO = "video"
 
+# QUERYSETS
+# List endpoints build their querysets from these so serializers can read
+# related data from memory instead of issuing one query per row.
+
+class QuestionQuerySet(models.QuerySet):
+    def with_correct_answers(self):
+        """Prefetch answer keys into question.prefetched_correct_answers"""
+        return self.prefetch_related(Prefetch(
+            'questiontocorrectanswers_set',
+            queryset=QuestionToCorrectAnswers.objects.order_by('id'),
+            to_attr='prefetched_correct_answers'
+        ))
+
+    def for_students(self):
+        """Only the columns students are shown; answer keys are never loaded"""
+        return self.only(
+            'id', 'module_id', 'question_text', 'question_type', 'mcq_options', 'question_order', 'score_total',
+            'updated_at'
+        )
+
+
+class SubmissionQuerySet(models.QuerySet):
+    def with_grade(self):
+        """
+        Join the student's UserQuestionGrade for each submission (grade_id,
+        grade_score, grade_total, grade_is_overdue) and the user/question
+        rows the serializer displays.
+        """
+        return self.select_related('user', 'question').annotate(
+            grade=FilteredRelation(
+                'question__userquestiongrade',
+                condition=Q(question__userquestiongrade__user=F('user'))
+            ),
+            grade_id=F('grade__id'),
+            grade_score=F('grade__score'),
+            grade_total=F('grade__total'),
+            grade_is_overdue=F('grade__is_overdue')
+        )
+
+    def with_preview(self, length):
+        """
+        Defer submission_response, which can hold a whole essay or legacy
+        base64 media, and annotate response_head with its first length + 1
+        characters instead.
+        """
+        return self.defer('submission_response').annotate(
+            response_head=Substr('submission_response', 1, length + 1)
+        )
+
+
 # MAIN TABLES 
 class User(AbstractUser):
     isStudent = models.BooleanField(default=True)
+    # Embedded in issued tokens; raising it revokes them (core.authentication)
+    token_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.get_full_name()
 
 
+class TokenUser(User):
+    """
+    A user rebuilt from access token claims by core.authentication, with
+    only id, isStudent and token_version set. Reading any other field
+    loads all of them in one query.
+    """
+    CLAIM_FIELDS = ('id', 'isStudent', 'token_version')
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, is_student, token_version):
+        return cls.from_db(None, cls.CLAIM_FIELDS, (user_id, is_student, token_version))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.intersection(fields):
+            fields = deferred.union(fields)
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+
 class Course(models.Model):
     zoom_link = models.TextField(null=True, blank=True)
     course_name = models.TextField()
     course_description = models.TextField(null=True, blank=True)
     score_total = models.IntegerField(default=0)
+    # ETags (core.conditional): the row itself, and its list of modules
+    updated_at = models.DateTimeField(auto_now=True)
+    content_updated_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         verbose_name_plural = "Courses"
@@ -40,9 +123,15 @@ class Module(models.Model):
     score_total = models.IntegerField(default=0)
     is_posted = models.BooleanField(default=False)
     due_date = models.DateTimeField(null=True, blank=True)
+    # ETags (core.conditional): the row itself, and its questions and answer keys
+    updated_at = models.DateTimeField(auto_now=True)
+    content_updated_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         verbose_name_plural = "Modules"
+        indexes = [
+            models.Index(fields=['course', 'module_order', 'id'], name='module_course_order_idx'),
+        ]
 
     def __str__(self):
         return self.module_name
@@ -54,9 +143,15 @@ class Question(models.Model):
     mcq_options = models.JSONField(null=True, blank=True, default=list)  # List of strings for multiple choice options
     question_order = models.IntegerField() # order it should be in the module
     score_total = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = QuestionQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = "Questions"
+        indexes = [
+            models.Index(fields=['module', 'question_order', 'id'], name='question_module_order_idx'),
+        ]
 
     def __str__(self):
         return self.question_text
@@ -67,15 +162,180 @@ class Submission(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     submission_type = models.CharField(max_length=20, choices=QuestionType.choices)
     submission_response = models.TextField()
-    time_submitted = models.DateTimeField(auto_now_add=True)
+    # Set when the answer is accepted, which for queued submissions (see
+    # core.ingestion) is earlier than when the row is written
+    time_submitted = models.DateTimeField(default=timezone.now)
+    # Audio/video answers live in the default storage backend (see core.media);
+    # the row only keeps a reference to the stored file
+    media_key = models.CharField(max_length=255, blank=True, default='')
+    media_content_type = models.CharField(max_length=100, blank=True, default='')
+    media_size = models.BigIntegerField(null=True, blank=True)
+    media_checksum = models.CharField(max_length=64, blank=True, default='')  # sha256 hex digest
+    # Grading queue state (see core.grading_queue). is_graded is set when a
+    # UserQuestionGrade is written for the answer; a claim is a grader's
+    # lease on the submission until claim_expires_at.
+    is_graded = models.BooleanField(default=False)
+    claimed_by = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.SET_NULL, related_name='grading_claims'
+    )
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
+
+    objects = SubmissionQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = "Submissions"
+        indexes = [
+            models.Index(fields=['user', '-time_submitted', '-id'], name='submission_user_time_idx'),
+            models.Index(fields=['user', 'module', '-time_submitted', '-id'], name='submission_user_module_idx'),
+            models.Index(fields=['module', '-time_submitted', '-id'], name='submission_module_time_idx'),
+            # Only ungraded rows are indexed, so the queue scans stay small
+            # however much graded history a course has. A claim in one
+            # module reads the first row of that module's range; a claim
+            # across a course walks the backlog oldest first and stops at
+            # the first row in one of its modules.
+            models.Index(
+                fields=['module', 'time_submitted', 'id'], name='submission_ungraded_idx',
+                condition=models.Q(is_graded=False)
+            ),
+            models.Index(
+                fields=['time_submitted', 'id'], name='submission_ungraded_time_idx',
+                condition=models.Q(is_graded=False)
+            ),
+        ]
+        constraints = [
+            # One answer per student per question; resubmitting replaces it
+            # (see core.submissions). Also serves (user, question) lookups.
+            models.UniqueConstraint(fields=['user', 'question'], name='unique_user_question_submission'),
+        ]
 
     def __str__(self):
         return self.submission_response
 
 
+class UploadStatus(models.TextChoices):
+    PENDING = "pending"
+    COMPLETED = "completed"
+
+
+class MediaUpload(models.Model):
+    """
+    A resumable upload of a large audio/video answer. Chunks are written to
+    temporary files (see core.uploads) and attached to the student's
+    submission for the question when the upload is completed.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    submission = models.ForeignKey(Submission, on_delete=models.SET_NULL, null=True, blank=True)
+    content_type = models.CharField(max_length=100)
+    total_size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    status = models.CharField(max_length=20, choices=UploadStatus.choices, default=UploadStatus.PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Media Uploads"
+
+    def __str__(self):
+        return str(self.id)
+
+
+class MediaUploadChunk(models.Model):
+    upload = models.ForeignKey(MediaUpload, on_delete=models.CASCADE, related_name='chunks')
+    index = models.IntegerField()
+    size = models.IntegerField()
+
+    class Meta:
+        verbose_name_plural = "Media Upload Chunks"
+        constraints = [
+            models.UniqueConstraint(fields=['upload', 'index'], name='unique_upload_chunk')
+        ]
+
+    def __str__(self):
+        return f"{self.upload_id}:{self.index}"
+
+
+class QueuedSubmissionStatus(models.TextChoices):
+    PENDING = "pending"
+    SAVED = "saved"
+    SUPERSEDED = "superseded"
+
+
+class QueuedSubmission(models.Model):
+    """
+    An answer accepted while SUBMISSION_QUEUE_ENABLED is on, waiting for the
+    drain_submission_queue worker to write it to Submission (see
+    core.ingestion). receipt is handed to the client in the 202 response.
+    """
+    receipt = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    module = models.ForeignKey(Module, on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    submission_type = models.CharField(max_length=20, choices=QuestionType.choices)
+    submission_response = models.TextField(blank=True, default='')
+    media_key = models.CharField(max_length=255, blank=True, default='')
+    media_content_type = models.CharField(max_length=100, blank=True, default='')
+    media_size = models.BigIntegerField(null=True, blank=True)
+    media_checksum = models.CharField(max_length=64, blank=True, default='')
+    accepted_at = models.DateTimeField(default=timezone.now)
+    status = models.CharField(
+        max_length=20, choices=QueuedSubmissionStatus.choices, default=QueuedSubmissionStatus.PENDING
+    )
+    processed_at = models.DateTimeField(null=True, blank=True)
+    submission = models.ForeignKey(Submission, null=True, blank=True, on_delete=models.SET_NULL)
+
+    class Meta:
+        indexes = [
+            # The worker only ever scans the pending rows, oldest first
+            models.Index(
+                fields=['id'], name='queued_submission_pending_idx',
+                condition=Q(status='pending')
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.receipt)
+
+
+class UserInvite(models.Model):
+    """
+    Account created by a roster import (see core.roster). The user has an
+    unusable password until they accept the invite with the token, of which
+    only the sha256 hash is stored.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, null=True, blank=True, on_delete=models.SET_NULL)
+    token_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    accepted_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Invite for {self.user_id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The response to a write sent with an Idempotency-Key header, replayed
+    when the same request is retried (see core.idempotency). response_status
+    is null while the first request is still being processed.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_user_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
 # RELATIONSHIP TABLES 
 
 class UserModuleGrade(models.Model):
@@ -84,6 +344,11 @@ class UserModuleGrade(models.Model):
     score = models.IntegerField(null=True, blank=True)
     total = models.IntegerField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['module', 'user'], name='unique_user_module_grade')
+        ]
+
     def __str__(self):
         return self.module.module_name
 
@@ -93,16 +358,50 @@ class UserCourseGrade(models.Model):
     score = models.IntegerField(null=True, blank=True)
     total = models.IntegerField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'user'], name='unique_user_course_grade')
+        ]
+
     def __str__(self):
         return self.course.course_name
 
 
+class UserModuleProgress(models.Model):
+    """
+    How far a student has got through a module. Maintained by
+    core.progress whenever submissions or questions change so that
+    sequential unlocking is a single lookup.
+    """
+    module = models.ForeignKey(Module, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    answered_count = models.IntegerField(default=0)  # distinct questions with a submission
+    is_completed = models.BooleanField(default=False)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "User Module Progress"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'module'], name='unique_user_module_progress')
+        ]
+
+    def __str__(self):
+        return self.module.module_name
+
 class UserQuestionGrade(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     score = models.IntegerField(null=True, blank=True)
     total = models.IntegerField(null=True, blank=True)
     is_overdue = models.BooleanField(default=False)
+    # Set by core.autograde; a grade a teacher enters is never overwritten
+    # by the answer key
+    is_autograded = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'user'], name='unique_user_question_grade')
+        ]
 
     def __str__(self):
         return self.question.question_text
@@ -113,6 +412,9 @@ class CourseToStudents(models.Model):
 
     class Meta:
         verbose_name_plural = "Course to Students"
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'user'], name='unique_course_student')
+        ]
 
     def __str__(self):
         return self.course.course_name
@@ -123,6 +425,9 @@ class CourseToTeachers(models.Model):
 
     class Meta:
         verbose_name_plural = "Course to Teachers"
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'user'], name='unique_course_teacher')
+        ]
 
     def __str__(self):
         return self.course.course_name
@@ -0,0 +1,117 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+A page is fetched with WHERE (sort_key, id) > (last seen) ORDER BY sort_key,
+id LIMIT n instead of OFFSET, so page 500 costs the same index range scan
+as page 1, and rows inserted while a client pages through are neither
+skipped nor repeated. Views declare the order with `ordering`, a sort field
+followed by a unique tie-breaker, e.g. ('-time_submitted', '-id'), and each
+needs a composite index matching its filter plus that order.
+
+Cursors are opaque to clients: base64 of the last row's key values.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+    # Used when the view has no `ordering`, e.g. for a paginated @action
+    ordering = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = list(getattr(view, 'ordering', None) or self.ordering)
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.last = [self.key_value(rows[-1], field) for field in self.ordering] if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        page_size = settings.PAGINATION_PAGE_SIZE
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+            if requested > 0:
+                page_size = requested
+        except (KeyError, ValueError):
+            pass
+        return min(page_size, settings.PAGINATION_MAX_PAGE_SIZE)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last))
+
+    # ------------------------------------------------------------------
+    # Cursors
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def key_value(row, field):
+        return getattr(row, field.lstrip('-'))
+
+    def after(self, position):
+        """
+        Rows strictly after position in self.ordering, written as
+        a <= x AND (a < x OR (a = x AND id < y)) (for descending order) so
+        the leading range condition can be served by the composite index.
+        """
+        def beyond(field, value, inclusive=False):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            return Q(**{f"{field.lstrip('-')}__{lookup}{'e' if inclusive else ''}": value})
+
+        condition = beyond(self.ordering[-1], position[-1])
+        for field, value in reversed(list(zip(self.ordering[:-1], position[:-1]))):
+            condition = beyond(field, value) | (Q(**{field.lstrip('-'): value}) & condition)
+        return beyond(self.ordering[0], position[0], inclusive=True) & condition
+
+    def encode_cursor(self, values):
+        payload = json.dumps(values, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
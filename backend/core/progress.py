@@ -0,0 +1,198 @@
+"""
+Maintenance of UserModuleProgress rows.
+
+Every function here is expected to run inside the same transaction as the
+write that changed submissions or questions, so progress never drifts from
+the Submission table. rebuild_progress() recomputes everything from scratch
+for backfills and drift repair.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, Exists, ExpressionWrapper, F, Min, OuterRef, Q, Subquery, Value, When
+from django.db.models import BooleanField, IntegerField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Module, Question, Submission, UserModuleProgress
+
+
+def refresh_user_progress(user_id, module_id):
+    """Recompute one student's progress in one module after a submission write"""
+    answered = (
+        Submission.objects.filter(user_id=user_id, module_id=module_id)
+        .values('question_id').distinct().count()
+    )
+    total = Question.objects.filter(module_id=module_id).count()
+    is_completed = total > 0 and answered >= total
+
+    progress, created = UserModuleProgress.objects.select_for_update().get_or_create(
+        user_id=user_id,
+        module_id=module_id,
+        defaults={
+            'answered_count': answered,
+            'is_completed': is_completed,
+            'completed_at': timezone.now() if is_completed else None
+        }
+    )
+    if not created:
+        progress.answered_count = answered
+        if is_completed and not progress.is_completed:
+            progress.completed_at = timezone.now()
+        elif not is_completed:
+            progress.completed_at = None
+        progress.is_completed = is_completed
+        progress.save(update_fields=['answered_count', 'is_completed', 'completed_at'])
+    return progress
+
+
+def refresh_progress_for(pairs):
+    """
+    refresh_user_progress() for many (user_id, module_id) pairs at once, in
+    a fixed number of queries. Used by batch writers like the submission
+    queue worker.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return
+    user_ids = {user_id for user_id, _ in pairs}
+    module_ids = {module_id for _, module_id in pairs}
+
+    answered = {
+        (row['user_id'], row['module_id']): row['answered']
+        for row in Submission.objects.filter(user_id__in=user_ids, module_id__in=module_ids)
+        .values('user_id', 'module_id')
+        .annotate(answered=Count('question_id', distinct=True))
+        .order_by()
+    }
+    totals = dict(
+        Question.objects.filter(module_id__in=module_ids)
+        .values('module_id')
+        .annotate(total=Count('id'))
+        .order_by()
+        .values_list('module_id', 'total')
+    )
+    existing = {
+        (progress.user_id, progress.module_id): progress
+        for progress in UserModuleProgress.objects.select_for_update()
+        .filter(user_id__in=user_ids, module_id__in=module_ids)
+    }
+
+    now = timezone.now()
+    rows = []
+    for user_id, module_id in pairs:
+        count = answered.get((user_id, module_id), 0)
+        total = totals.get(module_id, 0)
+        is_completed = total > 0 and count >= total
+        previous = existing.get((user_id, module_id))
+        completed_at = None
+        if is_completed:
+            completed_at = previous.completed_at if previous and previous.is_completed else now
+        rows.append(UserModuleProgress(
+            user_id=user_id,
+            module_id=module_id,
+            answered_count=count,
+            is_completed=is_completed,
+            completed_at=completed_at
+        ))
+    UserModuleProgress.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['module', 'user'],
+        update_fields=['answered_count', 'is_completed', 'completed_at']
+    )
+
+
+def refresh_module_progress(module_id):
+    """
+    Recompute every student's progress in a module after its question set
+    changed. Runs as three set-based UPDATEs regardless of class size.
+    """
+    total = Question.objects.filter(module_id=module_id).count()
+    rows = UserModuleProgress.objects.filter(module_id=module_id)
+
+    answered = (
+        Submission.objects.filter(module_id=module_id, user_id=OuterRef('user_id'))
+        .order_by()
+        .values('module_id')
+        .annotate(answered=Count('question_id', distinct=True))
+        .values('answered')
+    )
+    rows.update(answered_count=Coalesce(Subquery(answered, output_field=IntegerField()), 0))
+    rows.update(is_completed=ExpressionWrapper(
+        Q(answered_count__gte=total) if total > 0 else Value(False),
+        output_field=BooleanField()
+    ))
+    rows.update(completed_at=Case(
+        When(is_completed=False, then=None),
+        When(completed_at__isnull=True, then=Value(timezone.now())),
+        default=F('completed_at')
+    ))
+
+
+def is_module_completed(module, user):
+    return UserModuleProgress.objects.filter(
+        user=user, module=module, is_completed=True
+    ).exists()
+
+
+def has_incomplete_previous_modules(module, user):
+    """True if any earlier posted module in the course is not completed"""
+    completed = UserModuleProgress.objects.filter(
+        user=user, module=OuterRef('pk'), is_completed=True
+    )
+    return Module.objects.filter(
+        course_id=module.course_id,
+        module_order__lt=module.module_order,
+        is_posted=True
+    ).exclude(Exists(completed)).exists()
+
+
+def rebuild_progress(module_ids=None):
+    """
+    Rebuild UserModuleProgress from the Submission table. completed_at is
+    taken as the moment the last question was first answered.
+    Returns the number of progress rows written.
+    """
+    submissions = Submission.objects.all()
+    modules = Module.objects.all()
+    if module_ids is not None:
+        submissions = submissions.filter(module_id__in=module_ids)
+        modules = modules.filter(id__in=module_ids)
+
+    question_totals = dict(
+        modules.annotate(total=Count('question')).values_list('id', 'total')
+    )
+
+    # First submission time per (user, module, question), folded into
+    # per-(user, module) answered counts
+    pairs = {}
+    first_answers = (
+        submissions.values('user_id', 'module_id', 'question_id')
+        .annotate(first=Min('time_submitted'))
+        .order_by()
+    )
+    for row in first_answers.iterator(chunk_size=5000):
+        key = (row['user_id'], row['module_id'])
+        answered, last_first = pairs.get(key, (0, None))
+        if last_first is None or row['first'] > last_first:
+            last_first = row['first']
+        pairs[key] = (answered + 1, last_first)
+
+    rows = []
+    for (user_id, module_id), (answered, last_first) in pairs.items():
+        total = question_totals.get(module_id, 0)
+        is_completed = total > 0 and answered >= total
+        rows.append(UserModuleProgress(
+            user_id=user_id,
+            module_id=module_id,
+            answered_count=answered,
+            is_completed=is_completed,
+            completed_at=last_first if is_completed else None
+        ))
+
+    with transaction.atomic():
+        stale = UserModuleProgress.objects.all()
+        if module_ids is not None:
+            stale = stale.filter(module_id__in=module_ids)
+        stale.delete()
+        UserModuleProgress.objects.bulk_create(rows, batch_size=5000)
+    return len(rows)
@@ -0,0 +1,140 @@
+"""
+Bulk editing of a module's questions.
+
+apply_question_list() takes the full list of questions a module should
+have, in order, and diffs it against what is stored:
+
+- items without an id are created with one bulk_create;
+- items with an id are updated with one bulk_update (changed fields only);
+- stored questions missing from the list are deleted;
+- question_order follows list position and is rewritten with one UPDATE
+  ... CASE for the questions that moved;
+- answer keys are only rewritten for questions whose set changed, and
+  answers to questions whose key, type or score_total changed are
+  re-graded (see core.autograde).
+
+Everything runs in one transaction, so an editor never sees a half-saved
+module and progress and grade rollups are refreshed once.
+"""
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from .autograde import regrade_questions
+from .content_cache import bump_answers, bump_module
+from .grading import rebuild_rollups
+from .models import Question, QuestionToCorrectAnswers
+from .progress import refresh_module_progress
+
+# Question columns an item can set; question_order comes from list position
+EDITABLE_FIELDS = ['question_text', 'question_type', 'mcq_options', 'score_total']
+# Changing one of these changes how stored answers are auto-graded
+KEY_FIELDS = {'question_type', 'score_total'}
+
+
+class QuestionListError(ValueError):
+    pass
+
+
+def apply_question_list(module, items):
+    """
+    Make module's questions match items (validated BulkQuestionItemSerializer
+    data). Returns a summary of what changed.
+    """
+    with transaction.atomic():
+        current = {
+            question.id: question
+            for question in Question.objects.select_for_update()
+            .filter(module=module)
+            .with_correct_answers()
+        }
+
+        ids = [item['id'] for item in items if 'id' in item]
+        unknown = set(ids) - set(current)
+        if unknown:
+            raise QuestionListError(f"Questions {sorted(unknown)} are not in this module")
+        if len(ids) != len(set(ids)):
+            raise QuestionListError("A question appears more than once")
+        deleted = set(current) - set(ids)
+        if deleted and module.is_posted:
+            raise QuestionListError("Cannot delete questions in a posted module")
+
+        created, updated, moved = [], [], {}
+        changed_fields = set()
+        answer_sets = []
+        regraded = set()
+        for order, item in enumerate(items, start=1):
+            if 'id' not in item:
+                question = Question(
+                    module=module,
+                    question_order=order,
+                    **{field: item[field] for field in EDITABLE_FIELDS if field in item}
+                )
+                created.append(question)
+                answer_sets.append((question, item.get('correct_answers', [])))
+                continue
+
+            question = current[item['id']]
+            fields = {
+                field for field in EDITABLE_FIELDS
+                if field in item and getattr(question, field) != item[field]
+            }
+            for field in fields:
+                setattr(question, field, item[field])
+            if fields:
+                updated.append(question)
+                changed_fields |= fields
+            if fields & KEY_FIELDS:
+                regraded.add(question.id)
+            if question.question_order != order:
+                moved[question.id] = order
+            if 'correct_answers' in item:
+                stored = [answer.correct_answer for answer in question.prefetched_correct_answers]
+                if stored != [answer for answer in item['correct_answers'] if answer]:
+                    answer_sets.append((question, item['correct_answers']))
+
+        # bulk_update and update() skip auto_now
+        now = timezone.now()
+        if deleted:
+            Question.objects.filter(id__in=deleted).delete()
+        Question.objects.bulk_create(created)
+        if updated:
+            for question in updated:
+                question.updated_at = now
+            Question.objects.bulk_update(updated, sorted(changed_fields | {'updated_at'}))
+        if moved:
+            Question.objects.filter(id__in=moved).update(updated_at=now, question_order=Case(
+                *[When(id=question_id, then=Value(order)) for question_id, order in moved.items()]
+            ))
+
+        rewritten = [question.id for question, _ in answer_sets if question.id in current]
+        if rewritten:
+            QuestionToCorrectAnswers.objects.filter(question_id__in=rewritten).delete()
+            # Including questions that had no answers to delete
+            bump_answers(*rewritten)
+            regraded.update(rewritten)
+        QuestionToCorrectAnswers.objects.bulk_create([
+            QuestionToCorrectAnswers(question=question, correct_answer=answer)
+            for question, answers in answer_sets
+            for answer in answers
+            if answer
+        ])
+
+        regrade_questions(regraded)
+        if created or updated or moved or answer_sets:
+            # Bulk writes send no signals
+            bump_module(module.id)
+
+        if created or deleted:
+            refresh_module_progress(module.id)
+        if deleted:
+            # Grades of deleted questions were cascade-deleted with them
+            rebuild_rollups([module.id])
+
+    return {
+        'created': len(created),
+        'updated': len(updated),
+        'deleted': len(deleted),
+        'reordered': len(moved),
+        'answer_sets': len(answer_sets),
+    }
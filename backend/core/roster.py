@@ -0,0 +1,177 @@
+"""
+Bulk roster import for a course.
+
+import_roster() takes the rows of a CSV or JSON roster (email, first_name,
+last_name, role) and, in one transaction and a fixed number of queries:
+
+- creates the accounts that do not exist yet with bulk_create, giving them
+  an unusable password (no password hashing) and an invite token;
+- enrolls every account into CourseToStudents / CourseToTeachers with
+  bulk_create(ignore_conflicts=True), so re-importing a roster is harmless.
+
+It returns a per-row report. Invite tokens are only ever returned here; the
+database keeps their sha256 hash (see accept_invite).
+"""
+import codecs
+import csv
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .membership import bump_membership_version
+from .models import CourseToStudents, CourseToTeachers, User, UserInvite
+
+ROLES = {'student': True, 'teacher': False}
+BATCH_SIZE = 2000
+
+
+class RosterError(ValueError):
+    pass
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def read_csv(stream):
+    """Rows of a CSV roster, decoded from a binary stream as it is read"""
+    reader = csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+    if reader.fieldnames is None or 'email' not in [name.strip().lower() for name in reader.fieldnames]:
+        raise RosterError('CSV roster needs a header row with an "email" column')
+    for row in reader:
+        yield {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+
+
+def _parse(rows):
+    """Validate rows; returns (report, entries) where entries are the usable rows"""
+    report = []
+    entries = []
+    seen = set()
+    for number, row in enumerate(rows, start=1):
+        if number > settings.ROSTER_MAX_ROWS:
+            raise RosterError(f'A roster can have at most {settings.ROSTER_MAX_ROWS} rows')
+        if not isinstance(row, dict):
+            report.append({'row': number, 'status': 'error', 'error': 'Row must be an object'})
+            continue
+
+        email = str(row.get('email') or '').strip().lower()
+        role = str(row.get('role') or 'student').strip().lower()
+        result = {'row': number, 'email': email, 'role': role}
+        report.append(result)
+        try:
+            validate_email(email)
+        except ValidationError:
+            result.update(status='error', error='Invalid email')
+            continue
+        if role not in ROLES:
+            result.update(status='error', error='role must be "student" or "teacher"')
+            continue
+        if email in seen:
+            result.update(status='error', error='Duplicate email in roster')
+            continue
+        seen.add(email)
+        entries.append((result, {
+            'email': email,
+            'first_name': str(row.get('first_name') or '').strip()[:150],
+            'last_name': str(row.get('last_name') or '').strip()[:150],
+            'isStudent': ROLES[role],
+        }))
+    return report, entries
+
+
+def import_roster(course, rows):
+    """Create missing accounts and enroll everyone in course. Returns the report."""
+    report, entries = _parse(rows)
+    emails = [entry['email'] for _, entry in entries]
+
+    with transaction.atomic():
+        existing = {
+            user.email_lower: user
+            for user in User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=emails)
+            .only('id', 'email', 'isStudent')
+        }
+
+        new_users = []
+        for result, entry in entries:
+            if entry['email'] not in existing:
+                new_users.append(User(
+                    username=entry['email'],
+                    password=make_password(None),
+                    **entry
+                ))
+        User.objects.bulk_create(new_users, batch_size=BATCH_SIZE)
+
+        invites = []
+        created = {}
+        for user in new_users:
+            token = secrets.token_urlsafe(32)
+            created[user.email] = (user, token)
+            invites.append(UserInvite(user=user, course=course, token_hash=hash_token(token)))
+        UserInvite.objects.bulk_create(invites, batch_size=BATCH_SIZE)
+
+        user_ids = [user.id for user in existing.values()] + [user.id for user in new_users]
+        enrolled_students = set(
+            CourseToStudents.objects.filter(course=course, user_id__in=user_ids).values_list('user_id', flat=True)
+        )
+        enrolled_teachers = set(
+            CourseToTeachers.objects.filter(course=course, user_id__in=user_ids).values_list('user_id', flat=True)
+        )
+
+        students = []
+        teachers = []
+        for result, entry in entries:
+            if entry['email'] in created:
+                user, token = created[entry['email']]
+                result.update(status='created', user_id=user.id, invite_token=token)
+            else:
+                user = existing[entry['email']]
+                result['user_id'] = user.id
+                if user.isStudent != entry['isStudent']:
+                    actual = 'student' if user.isStudent else 'teacher'
+                    result.update(status='error', error=f'Existing account is a {actual}')
+                    continue
+                already = enrolled_students if user.isStudent else enrolled_teachers
+                result['status'] = 'already_enrolled' if user.id in already else 'enrolled'
+            if user.isStudent:
+                students.append(CourseToStudents(course=course, user_id=user.id))
+            else:
+                teachers.append(CourseToTeachers(course=course, user_id=user.id))
+
+        CourseToStudents.objects.bulk_create(students, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        CourseToTeachers.objects.bulk_create(teachers, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        bump_membership_version(*(
+            result['user_id'] for result in report if result['status'] in ('created', 'enrolled')
+        ))
+
+    summary = {'rows': len(report), 'created': 0, 'enrolled': 0, 'already_enrolled': 0, 'error': 0}
+    for result in report:
+        summary[result['status']] += 1
+    return {'summary': summary, 'rows': report}
+
+
+def accept_invite(token, password):
+    """Set the password of an invited account. Returns the user."""
+    cutoff = timezone.now() - timedelta(seconds=settings.INVITE_TOKEN_TTL)
+    with transaction.atomic():
+        invite = (
+            UserInvite.objects.select_for_update().select_related('user')
+            .filter(token_hash=hash_token(token), accepted_at__isnull=True, created_at__gte=cutoff)
+            .first()
+        )
+        if invite is None:
+            raise RosterError('Invite is invalid or has expired')
+        user = invite.user
+        user.set_password(password)
+        user.save(update_fields=['password'])
+        invite.accepted_at = timezone.now()
+        invite.save(update_fields=['accepted_at'])
+    return user
@@ -1,9 +1,13 @@
 
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import issue_tokens
 from django.contrib.auth import get_user_model
-from .models import Course, User, Module, Question, Submission, UserModuleGrade, UserCourseGrade, UserQuestionGrade, CourseToStudents, CourseToTeachers, CourseToModules, ModuleToQuestions, QuestionToCorrectAnswers
+from .streaming import legacy_media, media_url
+from .models import Course, User, Module, Question, Submission, UserModuleGrade, UserCourseGrade, UserQuestionGrade, CourseToStudents, CourseToTeachers, CourseToModules, ModuleToQuestions, QuestionToCorrectAnswers, MediaUpload, QueuedSubmission, QuestionType
 
 User = get_user_model()
 
@@ -17,8 +21,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     
     @classmethod
     def get_token(cls, user):
-        token = super().get_token(user)
-        return token
+        """Tokens carry isStudent and token_version (see core.authentication)"""
+        return issue_tokens(user)
     
     def validate(self, attrs):
         # Get email from request
@@ -81,7 +85,7 @@ class CourseSerializer(serializers.ModelSerializer):
        
 
 class ModuleSerializer(serializers.ModelSerializer):
-    course_id = serializers.IntegerField(source='course.id', read_only=True)
+    course_id = serializers.IntegerField(read_only=True)
     course_name = serializers.CharField(source='course.course_name', read_only=True)
     course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all(), write_only=True, required=False)
     
@@ -101,8 +105,34 @@ class ModuleSerializer(serializers.ModelSerializer):
             'due_date'
         ]
 
+class ModuleDashboardSerializer(ModuleSerializer):
+    """Module plus the per-user progress computed by the course dashboard"""
+    question_count = serializers.IntegerField(read_only=True)
+    submission_count = serializers.IntegerField(read_only=True)
+    answered_count = serializers.IntegerField(read_only=True)
+    is_completed = serializers.BooleanField(read_only=True)
+    is_accessible = serializers.BooleanField(read_only=True)
+    grade_score = serializers.IntegerField(read_only=True, allow_null=True)
+    grade_total = serializers.IntegerField(read_only=True, allow_null=True)
+
+    class Meta(ModuleSerializer.Meta):
+        fields = ModuleSerializer.Meta.fields + [
+            'question_count',
+            'submission_count',
+            'answered_count',
+            'is_completed',
+            'is_accessible',
+            'grade_score',
+            'grade_total'
+        ]
+
 class QuestionSerializer(serializers.ModelSerializer):
-    module_id = serializers.IntegerField(source='module.id', read_only=True)
+    """
+    A question as teachers see and edit it, with its answer key. List with
+    Question.objects.with_correct_answers(); students get
+    StudentQuestionSerializer instead.
+    """
+    module_id = serializers.IntegerField(read_only=True)
     correct_answers = serializers.SerializerMethodField()
     
     class Meta:
@@ -122,15 +152,71 @@ class QuestionSerializer(serializers.ModelSerializer):
     
     def get_correct_answers(self, obj):
         """Get all correct answers for this question"""
-        return list(QuestionToCorrectAnswers.objects.filter(question=obj).values_list('correct_answer', flat=True))
+        # Querysets built with Question.objects.with_correct_answers() already carry them
+        if hasattr(obj, 'prefetched_correct_answers'):
+            return [answer.correct_answer for answer in obj.prefetched_correct_answers]
+        return list(QuestionToCorrectAnswers.objects.filter(question=obj).order_by('id').values_list('correct_answer', flat=True))
+
+class StudentQuestionSerializer(serializers.ModelSerializer):
+    """
+    A question as students see it: read-only and without the answer key.
+    Use with Question.objects.for_students().
+    """
+    module_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Question
+        fields = [
+            'id',
+            'module',
+            'module_id',
+            'question_text',
+            'question_type',
+            'mcq_options',
+            'question_order',
+            'score_total'
+        ]
+        read_only_fields = fields
+
+class BulkQuestionItemSerializer(serializers.Serializer):
+    """One question in PATCH /api/modules/{module_id}/questions/bulk; omit id to create"""
+    id = serializers.IntegerField(required=False)
+    question_text = serializers.CharField(required=False)
+    question_type = serializers.ChoiceField(choices=QuestionType.choices, required=False)
+    mcq_options = serializers.ListField(child=serializers.CharField(allow_blank=True), required=False)
+    score_total = serializers.IntegerField(required=False)
+    correct_answers = serializers.ListField(child=serializers.CharField(allow_blank=True), required=False)
+
+    def validate(self, attrs):
+        if 'id' not in attrs and not {'question_text', 'question_type'} <= attrs.keys():
+            raise serializers.ValidationError("New questions need question_text and question_type")
+        return attrs
+
+class BulkGradeItemSerializer(serializers.Serializer):
+    """One grade in POST /api/submissions/grade/bulk; total defaults to the question's score_total"""
+    submission_id = serializers.IntegerField()
+    score = serializers.IntegerField()
+    total = serializers.IntegerField(required=False)
+    is_overdue = serializers.BooleanField(default=False)
+
+class CloneModuleSerializer(serializers.Serializer):
+    """Body of POST /api/modules/{module_id}/clone; course_id defaults to the module's course"""
+    course_id = serializers.IntegerField(required=False)
+    reset_schedule = serializers.BooleanField(default=True)
+
+class CloneCourseSerializer(serializers.Serializer):
+    """Body of POST /api/courses/{course_id}/clone"""
+    course_name = serializers.CharField(required=False)
+    reset_schedule = serializers.BooleanField(default=True)
 
 class SubmissionSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
-    module_id = serializers.IntegerField(source='module.id', read_only=True)
-    question_id = serializers.IntegerField(source='question.id', read_only=True)
+    module_id = serializers.IntegerField(read_only=True)
+    question_id = serializers.IntegerField(read_only=True)
     question_text = serializers.CharField(source='question.question_text', read_only=True)
     grade = serializers.SerializerMethodField()
+    media_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Submission
@@ -146,15 +232,49 @@ class SubmissionSerializer(serializers.ModelSerializer):
             'question_text',
             'submission_type',
             'submission_response',
+            'media_content_type',
+            'media_size',
+            'media_url',
             'time_submitted',
             'grade'
         ]
-        read_only_fields = ['time_submitted', 'user_id', 'module_id', 'question_id', 'user_name', 'question_text', 'grade']
+        read_only_fields = ['time_submitted', 'user_id', 'module_id', 'question_id', 'user_name', 'question_text', 'grade', 'media_content_type', 'media_size', 'media_url']
+        # Audio/video submissions are saved with an empty response and a
+        # reference to stored media instead
+        extra_kwargs = {'submission_response': {'required': False}}
+        # unique_user_question_submission is enforced by the upsert in
+        # core.submissions: a second answer replaces the first
+        validators = []
+    
+    def get_media_url(self, obj):
+        if not obj.media_key and legacy_media(obj) is None:
+            return None
+        return media_url(obj, self.context.get('request'))
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Answers recorded before media moved to file storage still hold a
+        # base64 data URL; list them by URL and size like stored media
+        legacy = legacy_media(instance)
+        if legacy is not None:
+            data['submission_response'] = ''
+            data['media_content_type'] = legacy[0]
+            data['media_size'] = legacy[2]
+        return data
     
     def get_grade(self, obj):
         """Get grade for this submission if it exists"""
+        # Querysets built with Submission.objects.with_grade() already carry it
+        if hasattr(obj, 'grade_id'):
+            if obj.grade_id is None:
+                return None
+            return {
+                'score': obj.grade_score,
+                'total': obj.grade_total,
+                'is_overdue': obj.grade_is_overdue
+            }
         try:
-            grade = UserQuestionGrade.objects.get(question=obj.question, user=obj.user)
+            grade = UserQuestionGrade.objects.get(question_id=obj.question_id, user_id=obj.user_id)
             return {
                 'score': grade.score,
                 'total': grade.total,
@@ -163,6 +283,134 @@ class SubmissionSerializer(serializers.ModelSerializer):
         except UserQuestionGrade.DoesNotExist:
             return None
 
+class SubmissionPreviewSerializer(SubmissionSerializer):
+    """
+    A submission in teacher listings. The answer body is not loaded: the
+    queryset must come from Submission.objects.with_grade().with_preview(
+    PREVIEW_LENGTH), and url links to the full submission.
+    """
+    PREVIEW_LENGTH = 200
+
+    response_preview = serializers.SerializerMethodField()
+    response_truncated = serializers.SerializerMethodField()
+    has_media = serializers.SerializerMethodField()
+    url = serializers.SerializerMethodField()
+
+    class Meta(SubmissionSerializer.Meta):
+        fields = [
+            'id',
+            'user_id',
+            'user_name',
+            'module_id',
+            'question_id',
+            'question_text',
+            'submission_type',
+            'response_preview',
+            'response_truncated',
+            'has_media',
+            'media_content_type',
+            'media_size',
+            'time_submitted',
+            'grade',
+            'url'
+        ]
+        read_only_fields = fields
+
+    def _inline_media(self, obj):
+        return not obj.media_key and obj.response_head.startswith('data:')
+
+    def get_response_preview(self, obj):
+        return '' if self._inline_media(obj) else obj.response_head[:self.PREVIEW_LENGTH]
+
+    def get_response_truncated(self, obj):
+        return not self._inline_media(obj) and len(obj.response_head) > self.PREVIEW_LENGTH
+
+    def get_has_media(self, obj):
+        return bool(obj.media_key) or self._inline_media(obj)
+
+    def get_url(self, obj):
+        url = reverse('submission-detail', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def to_representation(self, instance):
+        # Skip SubmissionSerializer's legacy media check, which reads the body
+        return serializers.ModelSerializer.to_representation(self, instance)
+
+class BatchSubmissionItemSerializer(serializers.Serializer):
+    """One answer in POST /api/modules/{module_id}/submissions/batch"""
+    question_id = serializers.IntegerField()
+    submission_type = serializers.ChoiceField(choices=QuestionType.choices, required=False)
+    response = serializers.CharField(required=False, allow_blank=True, trim_whitespace=False, default='')
+
+class QueuedSubmissionSerializer(serializers.ModelSerializer):
+    """Receipt for an answer accepted by the submission queue"""
+    question_id = serializers.IntegerField(read_only=True)
+    module_id = serializers.IntegerField(read_only=True)
+    submission_id = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = QueuedSubmission
+        fields = [
+            'receipt',
+            'status',
+            'question_id',
+            'module_id',
+            'submission_type',
+            'accepted_at',
+            'processed_at',
+            'submission_id'
+        ]
+        read_only_fields = fields
+
+class MediaUploadSerializer(serializers.ModelSerializer):
+    question_id = serializers.IntegerField()
+    chunk_size = serializers.IntegerField(required=False, min_value=1)
+    
+    class Meta:
+        model = MediaUpload
+        fields = [
+            'id',
+            'question_id',
+            'submission',
+            'content_type',
+            'total_size',
+            'chunk_size',
+            'status',
+            'created_at',
+            'completed_at'
+        ]
+        read_only_fields = ['id', 'submission', 'status', 'created_at', 'completed_at']
+    
+    def validate_content_type(self, value):
+        if not value.startswith(('audio/', 'video/')):
+            raise serializers.ValidationError('Only audio and video uploads are supported')
+        return value
+    
+    def validate_total_size(self, value):
+        if value <= 0 or value > settings.MEDIA_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'total_size must be between 1 and {settings.MEDIA_UPLOAD_MAX_SIZE} bytes'
+            )
+        return value
+    
+    def validate_chunk_size(self, value):
+        if value > settings.MEDIA_UPLOAD_MAX_CHUNK_SIZE:
+            raise serializers.ValidationError(
+                f'chunk_size cannot exceed {settings.MEDIA_UPLOAD_MAX_CHUNK_SIZE} bytes'
+            )
+        return value
+    
+    def validate(self, attrs):
+        # Only the last chunk may be smaller, so an upload smaller than the
+        # minimum goes up as one chunk
+        chunk_size = attrs.get('chunk_size')
+        if chunk_size is not None and chunk_size < min(settings.MEDIA_UPLOAD_MIN_CHUNK_SIZE, attrs['total_size']):
+            raise serializers.ValidationError({
+                'chunk_size': f'chunk_size must be at least {settings.MEDIA_UPLOAD_MIN_CHUNK_SIZE} bytes'
+            })
+        return attrs
+
 class UserModuleGradeSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserModuleGrade
@@ -0,0 +1,194 @@
+"""
+HTTP delivery of stored submission media.
+
+GET /api/submissions/{id}/media serves the file behind a submission. With
+filesystem storage the file is answered directly: full responses go through
+FileResponse (so the WSGI server can use sendfile), single byte ranges get a
+206 streamed in CHUNK_SIZE pieces, and ETag (the sha256 checksum) and
+Last-Modified let players revalidate without downloading again. With S3 the
+client is redirected to a short-lived presigned URL, which is cached so
+repeated seeks do not re-sign; S3 then handles Range itself.
+
+<audio>/<video> elements cannot send an Authorization header, so serialized
+submissions carry a media_url with a signed token. The token is tied to the
+submission's current media key and stops working once the media is replaced.
+"""
+import os
+import re
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+)
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from .media import CHUNK_SIZE, parse_data_url
+
+TOKEN_SALT = 'core.submission-media'
+
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def _signer(submission):
+    return signing.TimestampSigner(salt=f'{TOKEN_SALT}:{submission.media_key}')
+
+
+def media_token(submission):
+    return _signer(submission).sign(str(submission.pk))
+
+
+def check_media_token(submission, token):
+    try:
+        value = _signer(submission).unsign(token, max_age=settings.MEDIA_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return value == str(submission.pk)
+
+
+def legacy_media(submission):
+    """(content_type, reader, size) for a media answer still stored inline as base64"""
+    if submission.media_key:
+        return None
+    parsed = parse_data_url(submission.submission_response)
+    if parsed is None:
+        return None
+    content_type, reader = parsed
+    encoded = len(submission.submission_response) - reader.position
+    padding = submission.submission_response.count('=', -2)
+    return content_type, reader, encoded * 3 // 4 - padding
+
+
+def has_media(submission):
+    return bool(submission.media_key) or legacy_media(submission) is not None
+
+
+def media_url(submission, request=None):
+    url = f"{reverse('submission-media', args=[submission.pk])}?token={media_token(submission)}"
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def parse_range(header, size):
+    """
+    Return the inclusive (start, end) of a single "bytes=" range, or None to
+    send the whole file (no header, multiple ranges or another unit)
+    """
+    match = BYTE_RANGE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _read_all(reader):
+    while True:
+        chunk = reader.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+def presigned_url(key):
+    """Cached presigned URL, always handed out with at least a minute to spare"""
+    cache_key = f'media-url:{key}'
+    url = cache.get(cache_key)
+    if url is None:
+        expire = settings.MEDIA_PRESIGNED_URL_EXPIRE
+        url = default_storage.url(key, expire=expire)
+        cache.set(cache_key, url, max(expire - 60, 0))
+    return url
+
+
+def _local_response(request, submission, path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('Media file is missing')
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = f'"{submission.media_checksum}"' if submission.media_checksum else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        byte_range = None
+        if_range = request.headers.get('If-Range')
+        if if_range is None or if_range == etag or parse_http_date_safe(if_range) == last_modified:
+            try:
+                byte_range = parse_range(request.headers.get('Range'), size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        if byte_range is None:
+            response = FileResponse(open(path, 'rb'), content_type=submission.media_content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read_range(path, start, end - start + 1),
+                status=206,
+                content_type=submission.media_content_type
+            )
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = http_date(last_modified)
+    if etag:
+        response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+
+def media_response(request, submission):
+    """Response that delivers a submission's media to an authorized caller"""
+    if not submission.media_key:
+        legacy = legacy_media(submission)
+        if legacy is None:
+            raise Http404('Submission has no media')
+        content_type, reader, size = legacy
+        response = StreamingHttpResponse(_read_all(reader), content_type=content_type)
+        response['Content-Length'] = str(size)
+        response['Accept-Ranges'] = 'none'
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    try:
+        path = default_storage.path(submission.media_key)
+    except NotImplementedError:
+        # Remote storage: let the client fetch (and range over) the object itself
+        response = HttpResponseRedirect(presigned_url(submission.media_key))
+        response['Cache-Control'] = 'private, no-store'
+        return response
+    return _local_response(request, submission, path)
@@ -0,0 +1,115 @@
+"""
+Submission writes.
+
+A student has one Submission per question (unique_user_question_submission).
+save_submissions() writes answers with INSERT ... ON CONFLICT (user_id,
+question_id) DO UPDATE, so a double click, a retried request or a second
+tab replaces the answer instead of adding a row, and two concurrent writers
+cannot both insert. Answers to questions with an answer key are graded in
+the same transaction (see core.autograde).
+
+A grade belongs to the answer it was given for. A resubmission that changes
+the answer drops the old grade (taking it out of the rollups) and any
+grader's claim, and goes back in the grading queue; resending the same
+answer keeps both.
+"""
+import functools
+
+from django.db import transaction
+
+from .autograde import autograde_submissions
+from .grading import remove_submission_grades
+from .media import delete_media
+from .models import Submission
+
+# Columns a resubmission overwrites; user and question identify the row
+UPSERT_FIELDS = [
+    'module',
+    'submission_type',
+    'submission_response',
+    'time_submitted',
+    'media_key',
+    'media_content_type',
+    'media_size',
+    'media_checksum',
+    'is_graded',
+    'claimed_by',
+    'claim_expires_at',
+]
+
+# Grading state an unchanged answer keeps through a resubmission
+QUEUE_FIELDS = ['is_graded', 'claimed_by_id', 'claim_expires_at']
+
+
+def answer_of(submission):
+    """What a grade is given for; resubmitting the same answer keeps it"""
+    return (submission.submission_type, submission.submission_response, submission.media_checksum)
+
+
+def reopen_for_grading(submissions):
+    """
+    Put saved submissions whose answer changed back in the grading queue:
+    the grades of their previous answers are removed and claims dropped
+    """
+    Submission.objects.filter(id__in=[submission.id for submission in submissions]).update(
+        is_graded=False, claimed_by=None, claim_expires_at=None
+    )
+    remove_submission_grades(submissions)
+
+
+def save_submissions(submissions):
+    """
+    Insert or replace answers (unsaved Submission instances, at most one per
+    user and question) and set their primary keys. Returns the set of
+    (user_id, question_id) pairs that already had an answer. Files of
+    replaced recordings are deleted once the transaction commits.
+    """
+    if not submissions:
+        return set()
+
+    # No savepoint: callers usually already hold a transaction
+    with transaction.atomic(savepoint=False):
+        pairs = {(s.user_id, s.question_id) for s in submissions}
+        existing = {
+            (row['user_id'], row['question_id']): row
+            for row in Submission.objects.select_for_update()
+            .filter(
+                user_id__in={user_id for user_id, _ in pairs},
+                question_id__in={question_id for _, question_id in pairs}
+            )
+            .values(
+                'user_id', 'question_id', 'media_key', 'submission_type',
+                'submission_response', 'media_checksum', *QUEUE_FIELDS
+            )
+            if (row['user_id'], row['question_id']) in pairs
+        }
+
+        # New and changed answers are written ungraded and unclaimed
+        changed = []
+        for submission in submissions:
+            previous = existing.get((submission.user_id, submission.question_id))
+            if previous is None:
+                continue
+            if answer_of(submission) == (
+                previous['submission_type'], previous['submission_response'], previous['media_checksum']
+            ):
+                for field in QUEUE_FIELDS:
+                    setattr(submission, field, previous[field])
+            else:
+                changed.append(submission)
+
+        Submission.objects.bulk_create(
+            submissions,
+            update_conflicts=True,
+            unique_fields=['user', 'question'],
+            update_fields=UPSERT_FIELDS
+        )
+        remove_submission_grades(changed)
+        autograde_submissions(submissions)
+
+        new_keys = {submission.media_key for submission in submissions}
+        for previous in existing.values():
+            key = previous['media_key']
+            if key and key not in new_keys:
+                transaction.on_commit(functools.partial(delete_media, key))
+    return set(existing)
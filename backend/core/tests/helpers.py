@@ -0,0 +1,71 @@
+from rest_framework.test import APIClient
+
+from core.models import (
+    Course, CourseToStudents, CourseToTeachers, Module, Question, Submission, User
+)
+from core.membership import user_memberships
+from core.progress import refresh_user_progress
+
+
+def make_user(email, isStudent=True):
+    return User.objects.create_user(
+        username=email,
+        email=email,
+        password=None,
+        first_name=email.split('@')[0],
+        last_name='Test',
+        isStudent=isStudent
+    )
+
+
+def make_course(teacher=None, students=(), course_name='Test Course'):
+    course = Course.objects.create(course_name=course_name)
+    if teacher is not None:
+        CourseToTeachers.objects.create(course=course, user=teacher)
+    for student in students:
+        CourseToStudents.objects.create(course=course, user=student)
+    return course
+
+
+def make_module(course, module_order, questions=0, is_posted=True, **kwargs):
+    module = Module.objects.create(
+        course=course,
+        module_name=f'Module {module_order}',
+        module_order=module_order,
+        is_posted=is_posted,
+        **kwargs
+    )
+    for order in range(1, questions + 1):
+        Question.objects.create(
+            module=module,
+            question_type='written',
+            question_text=f'Question {order}',
+            question_order=order,
+            score_total=10
+        )
+    return module
+
+
+def warm_memberships(*users):
+    """Cache users' course memberships, as any earlier request would have"""
+    for user in users:
+        user_memberships(user)
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def submit_module(user, module, response='answer'):
+    """Answer every question in a module the way SubmissionViewSet.create does"""
+    for question in module.question_set.all():
+        Submission.objects.create(
+            user=user,
+            module=module,
+            question=question,
+            submission_type=question.question_type,
+            submission_response=response
+        )
+    refresh_user_progress(user.id, module.id)
@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.authentication import revoke_tokens
+from core.models import TokenUser
+from .helpers import make_course, make_user, warm_memberships
+
+
+def user_queries(context):
+    return [q['sql'] for q in context.captured_queries if 'FROM "core_user"' in q['sql']]
+
+
+class StatelessAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = make_user('student@odaap.com')
+        self.student.set_password('analytical-engine')
+        self.student.save()
+        self.course = make_course(make_user('teacher@odaap.com', isStudent=False), [self.student])
+
+    def login(self):
+        response = self.client.post('/api/token/', {'email': self.student.email, 'password': 'analytical-engine'})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def client_with(self, access):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return client
+
+    def test_requests_do_not_load_the_user(self):
+        client = self.client_with(self.login()['access'])
+        warm_memberships(self.student)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(client.get('/api/courses/').status_code, 200)
+        # Only the token version, which is then cached
+        self.assertEqual(len(user_queries(context)), 1)
+        self.assertIn('"core_user"."token_version"', user_queries(context)[0])
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/courses/')
+        self.assertEqual([course['id'] for course in response.data], [self.course.id])
+        self.assertEqual(user_queries(context), [])
+
+    def test_token_user_loads_other_fields_once(self):
+        user = TokenUser.from_claims(self.student.id, True, 0)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.isStudent)
+            self.assertEqual(user.pk, self.student.pk)
+            self.assertEqual(user, self.student)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, self.student.email)
+            self.assertEqual(user.get_full_name(), self.student.get_full_name())
+
+    def test_revoked_tokens_are_rejected(self):
+        tokens = self.login()
+        revoke_tokens(self.student)
+        self.assertEqual(self.client_with(tokens['access']).get('/api/courses/').status_code, 401)
+        refreshed = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']}).data['access']
+        self.assertEqual(self.client_with(refreshed).get('/api/courses/').status_code, 401)
+        self.assertEqual(self.client_with(self.login()['access']).get('/api/courses/').status_code, 200)
+
+    def test_refreshed_and_registered_tokens_carry_claims(self):
+        refreshed = self.client.post('/api/token/refresh/', {'refresh': self.login()['refresh']}).data['access']
+        self.assertEqual(self.client_with(refreshed).get('/api/courses/').status_code, 200)
+
+        response = self.client.post('/api/register/', {
+            'email': 'new@odaap.com', 'password': 'pw', 'first_name': 'New', 'last_name': 'User', 'isStudent': False
+        }, format='json')
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client_with(response.data['access']).get('/api/courses/').status_code, 200)
+        self.assertFalse(any('"core_user"."email"' in sql for sql in user_queries(context)))
+
+    def test_tokens_without_claims_load_the_user(self):
+        access = str(RefreshToken.for_user(self.student).access_token)
+        self.assertEqual(self.client_with(access).get('/api/courses/').status_code, 200)
+        revoke_tokens(self.student)
+        self.assertEqual(self.client_with(access).get('/api/courses/').status_code, 401)
+
+    def test_inactive_users_are_rejected(self):
+        access = self.login()['access']
+        self.student.is_active = False
+        self.student.save()
+        cache.clear()  # the cached token version expired
+        self.assertEqual(self.client_with(access).get('/api/courses/').status_code, 401)
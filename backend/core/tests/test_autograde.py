@@ -0,0 +1,150 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from core.autograde import AnswerKey, answer_keys, normalize, regrade_questions
+from core.grading import apply_question_grade
+from core.models import (
+    Question, QuestionToCorrectAnswers, Submission, UserCourseGrade, UserModuleGrade, UserQuestionGrade
+)
+from .helpers import client_for, make_course, make_module, make_user
+
+
+class AnswerKeyTests(TestCase):
+    def test_multiple_choice_needs_exact_option(self):
+        key = AnswerKey.compile('multiple_choice', ['Paris', 'paris'], 4)
+        self.assertEqual(key.score('multiple_choice', 'Paris'), 4)
+        self.assertEqual(key.score('multiple_choice', ' Paris'), 0)
+        self.assertEqual(key.score('multiple_choice', 'London'), 0)
+
+    def test_written_answers_are_normalized(self):
+        self.assertEqual(normalize('  The\tQUICK\n fox '), 'the quick fox')
+        key = AnswerKey.compile('written', ['Straße', 'ｆｕｌｌ width'], 2)
+        self.assertEqual(key.score('written', 'STRASSE'), 2)
+        self.assertEqual(key.score('written', 'full   Width'), 2)
+        # A miss is left for a teacher
+        self.assertIsNone(key.score('written', 'road'))
+
+    def test_no_key_or_other_answer_type_needs_a_teacher(self):
+        self.assertIsNone(AnswerKey.compile('multiple_choice', [], 4).score('multiple_choice', 'a'))
+        self.assertIsNone(AnswerKey.compile('audio', ['a'], 4).score('audio', 'a'))
+        self.assertIsNone(AnswerKey.compile('written', ['a'], 4).score('audio', 'a'))
+
+
+class AutogradeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.ada = make_user('ada@odaap.com')
+        self.bob = make_user('bob@odaap.com')
+        self.course = make_course(teacher=self.teacher, students=[self.ada, self.bob])
+        self.module = make_module(self.course, 1)
+        self.mcq = Question.objects.create(
+            module=self.module, question_type='multiple_choice', question_text='Capital?',
+            mcq_options=['Paris', 'London'], question_order=1, score_total=4
+        )
+        self.written = Question.objects.create(
+            module=self.module, question_type='written', question_text='Animal?',
+            question_order=2, score_total=6
+        )
+        QuestionToCorrectAnswers.objects.create(question=self.mcq, correct_answer='Paris')
+        QuestionToCorrectAnswers.objects.create(question=self.written, correct_answer='The Fox')
+
+    def answer(self, user, question, response, submission_type=None):
+        response = client_for(user).post('/api/submissions/', {
+            'question_id': question.id,
+            'submission_type': submission_type or question.question_type,
+            'response': response,
+        }, format='json')
+        self.assertIn(response.status_code, (200, 201), response.data)
+        return response
+
+    def grade(self, user, question):
+        return UserQuestionGrade.objects.filter(user=user, question=question).first()
+
+    def test_grades_on_submission_and_updates_rollups(self):
+        self.answer(self.ada, self.mcq, 'Paris')
+        self.answer(self.ada, self.written, '  the   FOX ')
+        self.answer(self.bob, self.mcq, 'London')
+        self.answer(self.bob, self.written, 'a dog')
+
+        self.assertEqual((self.grade(self.ada, self.mcq).score, self.grade(self.ada, self.mcq).total), (4, 4))
+        self.assertTrue(self.grade(self.ada, self.mcq).is_autograded)
+        self.assertEqual(self.grade(self.ada, self.written).score, 6)
+        self.assertEqual(self.grade(self.bob, self.mcq).score, 0)
+        self.assertIsNone(self.grade(self.bob, self.written))
+        self.assertFalse(Submission.objects.get(user=self.bob, question=self.written).is_graded)
+
+        self.assertEqual(UserModuleGrade.objects.get(user=self.ada).score, 10)
+        self.assertEqual(
+            (UserCourseGrade.objects.get(user=self.bob).score, UserCourseGrade.objects.get(user=self.bob).total),
+            (0, 4)
+        )
+
+    def test_resubmission_regrades_but_teacher_grades_stay(self):
+        self.answer(self.ada, self.mcq, 'London')
+        self.answer(self.ada, self.mcq, 'Paris')
+        self.assertEqual(self.grade(self.ada, self.mcq).score, 4)
+
+        apply_question_grade(self.mcq, self.ada, 1, 4)
+        self.answer(self.ada, self.mcq, 'Paris')
+        grade = self.grade(self.ada, self.mcq)
+        self.assertEqual((grade.score, grade.is_autograded), (1, False))
+
+    def test_overdue_answers_are_flagged(self):
+        self.module.due_date = timezone.now() - timedelta(days=1)
+        self.module.save()
+        self.answer(self.ada, self.mcq, 'Paris')
+        self.assertTrue(self.grade(self.ada, self.mcq).is_overdue)
+
+    def test_key_is_cached_until_the_question_changes(self):
+        self.answer(self.ada, self.mcq, 'London')
+        with self.assertNumQueries(1):  # the question's updated_at
+            answer_keys([self.mcq.id])
+
+        response = client_for(self.teacher).patch(
+            f'/api/questions/{self.mcq.id}/', {'correct_answers': ['London']}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(answer_keys([self.mcq.id])[self.mcq.id].answers, frozenset({'London'}))
+        # The stored answer was re-graded against the new key
+        self.assertEqual(self.grade(self.ada, self.mcq).score, 4)
+        self.assertEqual(UserModuleGrade.objects.get(user=self.ada).score, 4)
+
+    def test_keys_edited_elsewhere_are_not_used(self):
+        self.assertEqual(answer_keys([self.mcq.id])[self.mcq.id].answers, frozenset({'Paris'}))
+        # As another worker would edit it: the cached entry here is untouched
+        QuestionToCorrectAnswers.objects.filter(question=self.mcq).update(correct_answer='London')
+        Question.objects.filter(id=self.mcq.id).update(updated_at=timezone.now())
+        self.assertEqual(answer_keys([self.mcq.id])[self.mcq.id].answers, frozenset({'London'}))
+
+    def test_regrade_over_history(self):
+        # Answers stored before the question had a key
+        QuestionToCorrectAnswers.objects.filter(question=self.written).delete()
+        self.answer(self.ada, self.written, 'fox')
+        self.answer(self.bob, self.written, 'The fox')
+        self.assertEqual(UserQuestionGrade.objects.count(), 0)
+
+        QuestionToCorrectAnswers.objects.create(question=self.written, correct_answer='fox')
+        self.assertEqual(regrade_questions([self.written.id]), 1)
+        self.assertEqual(self.grade(self.ada, self.written).score, 6)
+        self.assertIsNone(self.grade(self.bob, self.written))
+
+        # Removing the key takes automatic grades back out
+        QuestionToCorrectAnswers.objects.filter(question=self.written).delete()
+        regrade_questions([self.written.id])
+        self.assertEqual(UserQuestionGrade.objects.count(), 0)
+        self.assertEqual(UserModuleGrade.objects.get(user=self.ada).score, 0)
+        self.assertFalse(Submission.objects.filter(is_graded=True).exists())
+
+    def test_bulk_question_edit_regrades_changed_keys(self):
+        self.answer(self.ada, self.mcq, 'London')
+        response = client_for(self.teacher).patch(f'/api/modules/{self.module.id}/questions/bulk/', {'questions': [
+            {'id': self.mcq.id, 'score_total': 8, 'correct_answers': ['London']},
+            {'id': self.written.id},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        grade = self.grade(self.ada, self.mcq)
+        self.assertEqual((grade.score, grade.total), (8, 8))
@@ -0,0 +1,104 @@
+import base64
+import shutil
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from core.models import Submission, UserModuleProgress, UserQuestionGrade
+from .helpers import client_for, make_course, make_module, make_user, warm_memberships
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
+)
+class BatchSubmissionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(teacher=self.teacher, students=[self.student])
+        self.module = make_module(self.course, 1, questions=3)
+        self.questions = list(self.module.question_set.order_by('question_order'))
+        self.url = f'/api/modules/{self.module.id}/submissions/batch/'
+        self.client = client_for(self.student)
+
+    def answers(self):
+        return [
+            {'question_id': question.id, 'submission_type': 'written', 'response': f'answer {question.id}'}
+            for question in self.questions
+        ]
+
+    def test_submits_whole_module_in_one_request(self):
+        UserQuestionGrade.objects.create(
+            question=self.questions[0], user=self.student, score=5, total=10
+        )
+        # module, questions, one upsert for every answer, the answer keys
+        # (their questions' stamps, compiled once, then cached), the
+        # progress refresh and grades;
+        # none of it grows with the number of questions
+        warm_memberships(self.student)
+        with self.assertNumQueries(15):
+            response = self.client.post(self.url, {'submissions': self.answers()}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual([r['status'] for r in response.data['results']], ['created'] * 3)
+        self.assertEqual(response.data['results'][0]['submission']['grade']['score'], 5)
+        self.assertEqual(Submission.objects.filter(user=self.student).count(), 3)
+        self.assertTrue(UserModuleProgress.objects.get(user=self.student).is_completed)
+
+    def test_one_bad_answer_rejects_the_batch(self):
+        other_question = make_module(self.course, 2, questions=1).question_set.get()
+        answers = self.answers()
+        answers[1]['question_id'] = other_question.id
+        answers[2]['submission_type'] = 'essay'
+        response = self.client.post(self.url, {'submissions': answers}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        statuses = [r['status'] for r in response.data['results']]
+        self.assertEqual(statuses, ['not_submitted', 'error', 'error'])
+        self.assertIn('question_id', response.data['results'][1]['errors'])
+        self.assertIn('submission_type', response.data['results'][2]['errors'])
+        self.assertFalse(Submission.objects.exists())
+
+    def test_duplicate_question_is_rejected(self):
+        answers = self.answers()
+        answers[2]['question_id'] = answers[0]['question_id']
+        response = self.client.post(self.url, {'submissions': answers}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Submission.objects.exists())
+
+    def test_audio_answers_go_to_storage(self):
+        payload = b'recording' * 100
+        answers = self.answers()
+        answers[0].update(
+            submission_type='audio',
+            response='data:audio/webm;base64,' + base64.b64encode(payload).decode()
+        )
+        response = self.client.post(self.url, {'submissions': answers}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        submission = Submission.objects.get(question=self.questions[0])
+        self.assertEqual(submission.submission_response, '')
+        self.assertEqual(submission.media_size, len(payload))
+        with default_storage.open(submission.media_key) as stored:
+            self.assertEqual(stored.read(), payload)
+
+    def test_access(self):
+        self.assertEqual(client_for(self.teacher).post(
+            self.url, {'submissions': self.answers()}, format='json'
+        ).status_code, 403)
+        outsider = client_for(make_user('outsider@odaap.com'))
+        self.assertEqual(outsider.post(
+            self.url, {'submissions': self.answers()}, format='json'
+        ).status_code, 404)
+        self.assertEqual(self.client.post(self.url, {'submissions': []}, format='json').status_code, 400)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.cloning import clone_course
+from core.models import (
+    Course, CourseToStudents, CourseToTeachers, Module, Question, QuestionToCorrectAnswers, Submission
+)
+from .helpers import client_for, make_course, make_module, make_user, submit_module
+
+
+class CloneTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(teacher=self.teacher, students=[self.student], course_name='Fall 25')
+        due = timezone.now() + timedelta(days=7)
+        self.modules = [make_module(self.course, order, questions=3, due_date=due) for order in (1, 2)]
+        for question in Question.objects.filter(module__course=self.course):
+            QuestionToCorrectAnswers.objects.create(question=question, correct_answer=f'key {question.question_order}')
+        submit_module(self.student, self.modules[0])
+        self.client = client_for(self.teacher)
+
+    def test_clones_course_content_but_not_students(self):
+        response = self.client.post(
+            f'/api/courses/{self.course.id}/clone/', {'course_name': 'Spring 26'}, format='json'
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data['module_count'], response.data['question_count']), (2, 6))
+
+        copy = Course.objects.get(id=response.data['course']['id'])
+        self.assertEqual(copy.course_name, 'Spring 26')
+        self.assertTrue(CourseToTeachers.objects.filter(course=copy, user=self.teacher).exists())
+        self.assertFalse(CourseToStudents.objects.filter(course=copy).exists())
+
+        modules = list(Module.objects.filter(course=copy).order_by('module_order'))
+        self.assertEqual([m.module_order for m in modules], [1, 2])
+        self.assertEqual({(m.is_posted, m.due_date) for m in modules}, {(False, None)})
+        questions = Question.objects.filter(module=modules[0]).order_by('question_order')
+        self.assertEqual(
+            [(q.question_text, q.questiontocorrectanswers_set.get().correct_answer) for q in questions],
+            [('Question 1', 'key 1'), ('Question 2', 'key 2'), ('Question 3', 'key 3')]
+        )
+        self.assertFalse(Submission.objects.filter(module__course=copy).exists())
+
+    def test_course_clone_query_count_is_constant(self):
+        def queries():
+            with CaptureQueriesContext(connection) as context:
+                clone_course(self.course, teachers=[self.teacher])
+            return len(context.captured_queries)
+
+        before = queries()
+        make_module(self.course, 3, questions=10)
+        self.assertEqual(queries(), before)
+
+    def test_clone_module_into_another_course(self):
+        other = make_course(teacher=self.teacher, course_name='Other')
+        make_module(other, 4)
+        response = self.client.post(
+            f'/api/modules/{self.modules[1].id}/clone/',
+            {'course_id': other.id, 'reset_schedule': False},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        copy = Module.objects.get(id=response.data['id'])
+        self.assertEqual((copy.course_id, copy.module_order), (other.id, 5))
+        self.assertEqual((copy.is_posted, copy.due_date), (True, self.modules[1].due_date))
+        self.assertEqual(copy.question_set.count(), 3)
+
+    def test_clone_requires_teaching_both_courses(self):
+        other = make_course(course_name='Not mine')
+        response = self.client.post(
+            f'/api/modules/{self.modules[0].id}/clone/', {'course_id': other.id}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+        response = client_for(self.student).post(f'/api/courses/{self.course.id}/clone/', {}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Course.objects.count(), 2)
@@ -0,0 +1,117 @@
+from django.test import TestCase
+
+from core.content_cache import reset_stats, stats
+from core.models import Question, QuestionToCorrectAnswers
+from .helpers import client_for, make_course, make_module, make_user, warm_memberships
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(self.teacher, [self.student])
+        self.module = make_module(self.course, 1, questions=2)
+        self.draft = make_module(self.course, 2, questions=1, is_posted=False)
+        self.question = self.module.question_set.order_by('question_order').first()
+        warm_memberships(self.teacher, self.student)
+
+    def get(self, user, url, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return client_for(user).get(url, **headers)
+
+    def assertRevalidates(self, user, url):
+        """The ETag of url, after checking a second read with it gets a 304"""
+        response = self.get(user, url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.get(user, url, etag).status_code, 304)
+        return etag
+
+    def assertChanged(self, user, url, etag):
+        response = self.get(user, url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response['ETag']
+
+    def test_not_modified_skips_serialization(self):
+        url = f'/api/modules/{self.module.id}/questions/'
+        etag = self.assertRevalidates(self.student, url)
+        reset_stats()
+        with self.assertNumQueries(2):  # module and the accessibility check only
+            response = self.get(self.student, url, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(stats(), {})
+
+    def test_cache_control_follows_posting(self):
+        response = self.get(self.student, f'/api/modules/{self.module.id}/questions/')
+        self.assertIn('max-age=60', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Authorization', response['Vary'])
+
+        for response in (
+            self.get(self.teacher, f'/api/modules/{self.module.id}/questions/'),
+            self.get(self.teacher, f'/api/modules/{self.draft.id}/questions/'),
+            self.get(self.student, f'/api/courses/{self.course.id}/modules/'),
+        ):
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('no-cache', response['Cache-Control'])
+            self.assertNotIn('max-age', response['Cache-Control'])
+
+    def test_roles_get_different_etags(self):
+        url = f'/api/questions/{self.question.id}/'
+        self.assertNotEqual(self.assertRevalidates(self.student, url), self.assertRevalidates(self.teacher, url))
+        self.assertEqual(self.get(self.student, f'/api/modules/{self.draft.id}/questions/').status_code, 403)
+
+    def test_question_edits_change_etags(self):
+        urls = [
+            f'/api/modules/{self.module.id}/questions/',
+            f'/api/questions/?module_id={self.module.id}',
+            f'/api/questions/{self.question.id}/',
+        ]
+        etags = [self.assertRevalidates(self.teacher, url) for url in urls]
+        self.question.question_text = 'Edited'
+        self.question.save()
+        etags = [self.assertChanged(self.teacher, url, etag) for url, etag in zip(urls, etags)]
+
+        QuestionToCorrectAnswers.objects.create(question=self.question, correct_answer='key')
+        etags = [self.assertChanged(self.teacher, url, etag) for url, etag in zip(urls, etags)]
+
+        response = client_for(self.teacher).patch(f'/api/modules/{self.module.id}/questions/bulk/', {'questions': [
+            {'id': question.id, 'question_text': f'Bulk {question.id}'}
+            for question in self.module.question_set.order_by('question_order')
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        for url, etag in zip(urls, etags):
+            self.assertChanged(self.teacher, url, etag)
+
+    def test_bulk_reorder_stamps_questions(self):
+        before = Question.objects.get(id=self.question.id).updated_at
+        response = client_for(self.teacher).patch(f'/api/modules/{self.module.id}/questions/bulk/', {'questions': [
+            {'id': question.id} for question in self.module.question_set.order_by('-question_order')
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertGreater(Question.objects.get(id=self.question.id).updated_at, before)
+
+    def test_course_and_module_changes_change_etags(self):
+        course_url = f'/api/courses/{self.course.id}/'
+        urls = ['/api/courses/', course_url, f'/api/courses/{self.course.id}/modules/',
+                f'/api/modules/?course_id={self.course.id}', f'/api/modules/{self.module.id}/']
+        etags = [self.assertRevalidates(self.student, url) for url in urls]
+
+        self.course.course_name = 'New term'
+        self.course.save()
+        etags = [self.assertChanged(self.student, url, etag) for url, etag in zip(urls, etags)]
+
+        # Module lists change when a module is added or removed
+        lists = urls[2:4]
+        etags = [self.assertRevalidates(self.student, url) for url in lists]
+        added = make_module(self.course, 3)
+        etags = [self.assertChanged(self.student, url, etag) for url, etag in zip(lists, etags)]
+        added.delete()
+        for url, etag in zip(lists, etags):
+            self.assertChanged(self.student, url, etag)
+
+        # Only members learn that a course is unchanged
+        outsider = make_user('outsider@odaap.com')
+        self.assertEqual(self.get(outsider, course_url, self.assertRevalidates(self.student, course_url)).status_code, 404)
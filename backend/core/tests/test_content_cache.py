@@ -0,0 +1,137 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from core.content_cache import reset_stats, stats
+from core.models import Module, Question, QuestionToCorrectAnswers
+from .helpers import client_for, make_course, make_module, make_user, warm_memberships
+
+
+class ContentCacheTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(self.teacher, [self.student])
+        self.other_course = make_course(self.teacher, [self.student], course_name='Other course')
+        self.module = make_module(self.course, 1, questions=2)
+        self.sibling = make_module(self.course, 2, questions=1, is_posted=False)
+        self.question = self.module.question_set.order_by('question_order').first()
+        QuestionToCorrectAnswers.objects.create(question=self.question, correct_answer='key')
+        warm_memberships(self.teacher, self.student)
+        reset_stats()
+
+    def get(self, user, url):
+        response = client_for(user).get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def questions(self, user=None, module=None):
+        return self.get(user or self.student, f'/api/modules/{(module or self.module).id}/questions/').data
+
+    def modules(self, course=None):
+        return self.get(self.student, f'/api/courses/{(course or self.course).id}/modules/').data
+
+    def assertServed(self, name, hits, misses):
+        self.assertEqual(stats().get(name, {'hits': 0, 'misses': 0}), {'hits': hits, 'misses': misses})
+
+    def test_repeated_reads_are_served_from_cache(self):
+        self.questions()
+        with self.assertNumQueries(2):  # module and the accessibility check only
+            data = self.questions()
+        self.assertServed('module-questions', 1, 1)
+        self.assertNotIn('correct_answers', data[0])
+
+        # Roles are cached separately
+        self.assertEqual(self.questions(self.teacher)[0]['correct_answers'], ['key'])
+        self.assertServed('module-questions', 1, 2)
+
+    def test_question_edits_invalidate_only_their_module(self):
+        self.questions()
+        self.questions(self.teacher, self.sibling)
+        self.modules()
+
+        self.question.question_text = 'Edited'
+        self.question.save()
+        self.assertEqual(self.questions()[0]['question_text'], 'Edited')
+        self.questions(self.teacher, self.sibling)
+        self.modules()
+        self.assertServed('module-questions', 1, 3)
+        self.assertServed('course-modules', 1, 1)
+
+        self.module.question_set.exclude(id=self.question.id).delete()
+        self.assertEqual(len(self.questions()), 1)
+
+    def test_rows_stamped_elsewhere_are_not_served_stale(self):
+        # As another worker would write them: no signals, no local cache access
+        url = f'/api/modules/{self.module.id}/questions/'
+        etag = self.get(self.student, url)['ETag']
+        Question.objects.filter(id=self.question.id).update(question_text='Edited elsewhere')
+        Module.objects.filter(id=self.module.id).update(content_updated_at=timezone.now())
+
+        response = client_for(self.student).get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['question_text'], 'Edited elsewhere')
+        self.assertEqual(client_for(self.student).get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.get(self.student, url).data[0]['question_text'], 'Edited elsewhere')
+        self.assertServed('module-questions', 1, 2)
+
+    def test_answer_key_changes_invalidate(self):
+        self.assertEqual(self.questions(self.teacher)[0]['correct_answers'], ['key'])
+        QuestionToCorrectAnswers.objects.create(question_id=self.question.id, correct_answer='other')
+        self.assertEqual(self.questions(self.teacher)[0]['correct_answers'], ['key', 'other'])
+
+        QuestionToCorrectAnswers.objects.filter(question=self.question, correct_answer='key').delete()
+        self.assertEqual(self.questions(self.teacher)[0]['correct_answers'], ['other'])
+        self.assertServed('module-questions', 0, 3)
+
+        response = client_for(self.teacher).patch(
+            f'/api/questions/{self.question.id}/', {'correct_answers': ['new']}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.questions(self.teacher)[0]['correct_answers'], ['new'])
+
+    def test_module_and_course_changes_invalidate_module_lists(self):
+        self.modules()
+        self.modules(self.other_course)
+
+        self.sibling.module_name = 'Renamed'
+        self.sibling.save()
+        self.assertEqual(self.modules()[1]['module_name'], 'Renamed')
+        self.modules(self.other_course)
+        self.assertServed('course-modules', 1, 3)
+
+        self.course.course_name = 'New term'
+        self.course.save()
+        self.assertEqual(self.modules()[0]['course_name'], 'New term')
+
+        # Moving a module changes both lists
+        self.sibling.course = self.other_course
+        self.sibling.save()
+        self.assertEqual(len(self.modules()), 1)
+        self.assertEqual(len(self.modules(self.other_course)), 1)
+
+    def test_bulk_writes_invalidate(self):
+        self.questions(self.teacher)
+        response = client_for(self.teacher).patch(f'/api/modules/{self.module.id}/questions/bulk/', {'questions': [
+            {'id': self.question.id, 'question_text': 'Bulk edited'},
+            *({'id': q.id} for q in self.module.question_set.exclude(id=self.question.id)),
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.questions(self.teacher)[0]['question_text'], 'Bulk edited')
+
+        self.modules(self.other_course)
+        response = client_for(self.teacher).post(
+            f'/api/modules/{self.sibling.id}/clone/', {'course_id': self.other_course.id}, format='json'
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(self.modules(self.other_course)), 1)
+
+    def test_question_list_pages_check_membership(self):
+        url = f'/api/questions/?module_id={self.module.id}&page_size=1'
+        first = self.get(self.student, url).data
+        self.assertEqual(self.get(self.student, url).data, first)
+        self.assertServed('module-question-page', 1, 1)
+        self.assertEqual(len(first['results']), 1)
+        self.assertIsNotNone(first['next'])
+
+        outsider = make_user('outsider@odaap.com')
+        self.assertEqual(self.get(outsider, url).data['results'], [])
@@ -0,0 +1,107 @@
+from django.test import TestCase
+
+from core.grading import apply_question_grade
+from core.models import UserModuleProgress
+from .helpers import client_for, make_course, make_module, make_user, submit_module, warm_memberships
+
+
+class CourseDashboardTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(self.teacher, [self.student])
+        self.client = client_for(self.student)
+
+    def submit(self, module, user=None):
+        submit_module(user or self.student, module)
+
+    def get_dashboard(self):
+        response = self.client.get(f'/api/courses/{self.course.id}/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return {m['module_order']: m for m in response.data['modules']}
+
+    def test_sequential_unlock_and_counts(self):
+        first = make_module(self.course, 1, questions=2)
+        make_module(self.course, 2, questions=3)
+        make_module(self.course, 3, questions=1)
+        make_module(self.course, 4, questions=1, is_posted=False)
+        self.submit(first)
+
+        modules = self.get_dashboard()
+
+        self.assertEqual(modules[1]['question_count'], 2)
+        self.assertEqual(modules[1]['submission_count'], 2)
+        self.assertTrue(modules[1]['is_completed'])
+        self.assertTrue(modules[2]['is_accessible'])
+        self.assertFalse(modules[2]['is_completed'])
+        self.assertFalse(modules[3]['is_accessible'])
+        self.assertFalse(modules[4]['is_accessible'])
+
+    def test_matches_per_module_endpoint(self):
+        modules = [make_module(self.course, order, questions=2) for order in range(1, 4)]
+        self.submit(modules[0])
+
+        dashboard = self.get_dashboard()
+        for module in modules:
+            response = self.client.get(f'/api/modules/{module.id}/is-accessible/')
+            entry = dashboard[module.module_order]
+            self.assertEqual(entry['is_accessible'], response.data['is_accessible'])
+            self.assertEqual(entry['is_completed'], response.data['is_completed'])
+
+    def test_completion_comes_from_module_progress(self):
+        first = make_module(self.course, 1, questions=2)
+        second = make_module(self.course, 2, questions=1)
+        # Progress is what the access checks read, even where it is ahead
+        # of the submissions this request could count
+        UserModuleProgress.objects.create(user=self.student, module=first, answered_count=2, is_completed=True)
+
+        modules = self.get_dashboard()
+        self.assertEqual((modules[1]['answered_count'], modules[1]['is_completed']), (2, True))
+        self.assertTrue(modules[2]['is_accessible'])
+        self.assertTrue(self.client.get(f'/api/modules/{second.id}/is-accessible/').data['is_accessible'])
+
+    def test_ignores_other_students_submissions(self):
+        other = make_user('other@odaap.com')
+        module = make_module(self.course, 1, questions=1)
+        self.submit(module, user=other)
+
+        modules = self.get_dashboard()
+        self.assertEqual(modules[1]['submission_count'], 0)
+        self.assertFalse(modules[1]['is_completed'])
+
+    def test_query_count_is_independent_of_module_count(self):
+        for order in range(1, 21):
+            module = make_module(self.course, order, questions=3)
+            if order <= 10:
+                self.submit(module)
+
+        # course lookup, annotated modules, progress and grades
+        warm_memberships(self.student)
+        with self.assertNumQueries(4):
+            modules = self.get_dashboard()
+        self.assertEqual(len(modules), 20)
+        self.assertTrue(modules[11]['is_accessible'])
+        self.assertFalse(modules[12]['is_accessible'])
+
+    def test_grade_totals(self):
+        module = make_module(self.course, 1, questions=2)
+        self.submit(module)
+        question = module.question_set.first()
+        apply_question_grade(question, self.student, 7, 10)
+
+        modules = self.get_dashboard()
+        self.assertEqual(modules[1]['grade_score'], 7)
+        self.assertEqual(modules[1]['grade_total'], 10)
+
+    def test_teacher_sees_everything_accessible(self):
+        make_module(self.course, 1, questions=1)
+        make_module(self.course, 2, questions=1, is_posted=False)
+        self.client = client_for(self.teacher)
+
+        modules = self.get_dashboard()
+        self.assertTrue(all(m['is_accessible'] for m in modules.values()))
+
+    def test_not_enrolled(self):
+        outsider = make_user('outsider@odaap.com')
+        response = client_for(outsider).get(f'/api/courses/{self.course.id}/dashboard/')
+        self.assertEqual(response.status_code, 404)
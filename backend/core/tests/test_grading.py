@@ -0,0 +1,204 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from core.grading import apply_question_grade
+from core.models import (
+    Submission, UserCourseGrade, UserModuleGrade, UserModuleProgress, UserQuestionGrade
+)
+from .helpers import client_for, make_course, make_module, make_user, submit_module, warm_memberships
+
+
+class GradeRollupTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(self.teacher, [self.student])
+        self.first = make_module(self.course, 1, questions=2)
+        self.second = make_module(self.course, 2, questions=1)
+
+    def rollups(self):
+        module_grades = {
+            (g.module_id, g.user_id): (g.score, g.total) for g in UserModuleGrade.objects.all()
+        }
+        course_grades = {
+            (g.course_id, g.user_id): (g.score, g.total) for g in UserCourseGrade.objects.all()
+        }
+        return module_grades, course_grades
+
+    def test_regrading_applies_delta(self):
+        q1, q2 = self.first.question_set.order_by('question_order')
+        q3 = self.second.question_set.get()
+
+        apply_question_grade(q1, self.student, 6, 10)
+        apply_question_grade(q2, self.student, 4, 10)
+        apply_question_grade(q3, self.student, 9, 10)
+        apply_question_grade(q1, self.student, 8, 10)
+
+        module_grades, course_grades = self.rollups()
+        self.assertEqual(module_grades[(self.first.id, self.student.id)], (12, 20))
+        self.assertEqual(module_grades[(self.second.id, self.student.id)], (9, 10))
+        self.assertEqual(course_grades[(self.course.id, self.student.id)], (21, 30))
+        self.assertEqual(UserQuestionGrade.objects.count(), 3)
+
+    def test_blank_grade_rows_count_as_first_grades(self):
+        # The row a concurrent first grade inserts before taking the lock
+        question = self.first.question_set.first()
+        UserQuestionGrade.objects.create(question=question, user=self.student)
+        apply_question_grade(question, self.student, 0, 10)
+        self.assertEqual(self.rollups()[0][(self.first.id, self.student.id)], (0, 10))
+        self.assertEqual(UserQuestionGrade.objects.count(), 1)
+
+    def test_grade_endpoint_updates_rollups(self):
+        question = self.first.question_set.first()
+        submission = Submission.objects.create(
+            user=self.student, module=self.first, question=question,
+            submission_type='written', submission_response='answer'
+        )
+
+        response = client_for(self.student).post(
+            f'/api/submissions/{submission.id}/grade/',
+            {'score': 7, 'total': 10}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        module_grades, course_grades = self.rollups()
+        self.assertEqual(module_grades[(self.first.id, self.student.id)], (7, 10))
+        self.assertEqual(course_grades[(self.course.id, self.student.id)], (7, 10))
+
+    def test_recompute_grades_matches_incremental(self):
+        other = make_user('other@odaap.com')
+        for question in self.first.question_set.all():
+            apply_question_grade(question, self.student, 5, 10)
+            apply_question_grade(question, other, 10, 10)
+        apply_question_grade(self.second.question_set.get(), self.student, 3, 10)
+        expected = self.rollups()
+
+        UserModuleGrade.objects.update(score=0)
+        UserCourseGrade.objects.all().delete()
+        call_command('recompute_grades', stdout=StringIO())
+        self.assertEqual(self.rollups(), expected)
+
+        UserModuleGrade.objects.filter(module=self.second).delete()
+        call_command('recompute_grades', module=[self.second.id], stdout=StringIO())
+        self.assertEqual(self.rollups(), expected)
+
+    def test_deleting_question_rebuilds_rollups(self):
+        module = make_module(self.course, 3, questions=2, is_posted=False)
+        q1, q2 = module.question_set.order_by('question_order')
+        apply_question_grade(q1, self.student, 5, 10)
+        apply_question_grade(q2, self.student, 7, 10)
+
+        response = client_for(self.teacher).delete(f'/api/questions/{q2.id}/')
+        self.assertEqual(response.status_code, 204)
+        module_grades, course_grades = self.rollups()
+        self.assertEqual(module_grades[(module.id, self.student.id)], (5, 10))
+        self.assertEqual(course_grades[(self.course.id, self.student.id)], (5, 10))
+
+
+    def test_deleting_module_rebuilds_course_rollups(self):
+        apply_question_grade(self.first.question_set.first(), self.student, 3, 10)
+        apply_question_grade(self.second.question_set.get(), self.student, 7, 10)
+
+        response = client_for(self.teacher).delete(f'/api/modules/{self.second.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.rollups()[1], {(self.course.id, self.student.id): (3, 10)})
+
+    def test_moving_question_moves_grades_and_progress(self):
+        other_course = make_course(self.teacher, [self.student], course_name='Other Course')
+        target = make_module(other_course, 1)
+        question = self.second.question_set.get()
+        submit_module(self.student, self.second)
+        apply_question_grade(self.first.question_set.first(), self.student, 3, 10)
+        apply_question_grade(question, self.student, 7, 10)
+
+        response = client_for(self.teacher).patch(
+            f'/api/questions/{question.id}/', {'module': target.id}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        module_grades, course_grades = self.rollups()
+        self.assertEqual(module_grades, {
+            (self.first.id, self.student.id): (3, 10),
+            (target.id, self.student.id): (7, 10),
+        })
+        self.assertEqual(course_grades, {
+            (self.course.id, self.student.id): (3, 10),
+            (other_course.id, self.student.id): (7, 10),
+        })
+        self.assertEqual(Submission.objects.get(question=question).module_id, target.id)
+        progress = {
+            p.module_id: (p.answered_count, p.is_completed)
+            for p in UserModuleProgress.objects.filter(user=self.student)
+        }
+        self.assertEqual(progress, {self.second.id: (0, False), target.id: (1, True)})
+
+
+class BulkGradingTests(TestCase):
+    url = '/api/submissions/grade/bulk/'
+
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.students = [make_user(f'student{i}@odaap.com') for i in range(4)]
+        self.course = make_course(self.teacher, self.students)
+        self.module = make_module(self.course, 1, questions=2)
+        for student in self.students:
+            submit_module(student, self.module)
+        self.submissions = list(Submission.objects.order_by('user_id', 'question__question_order'))
+        self.client = client_for(self.teacher)
+
+    def grade(self, grades):
+        return self.client.post(self.url, {'grades': grades}, format='json')
+
+    def test_grades_and_rebuilds_rollups(self):
+        apply_question_grade(self.submissions[0].question, self.students[0], 1, 10)
+        response = self.grade([
+            {'submission_id': submission.id, 'score': index % 10}
+            for index, submission in enumerate(self.submissions)
+        ])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['graded'], 8)
+        self.assertEqual(UserQuestionGrade.objects.count(), 8)
+        self.assertEqual(UserQuestionGrade.objects.get(user=self.students[0], question=self.submissions[0].question).score, 0)
+        self.assertFalse(Submission.objects.filter(is_graded=False).exists())
+
+        module_grades = {g.user_id: (g.score, g.total) for g in UserModuleGrade.objects.filter(module=self.module)}
+        course_grades = {g.user_id: (g.score, g.total) for g in UserCourseGrade.objects.filter(course=self.course)}
+        expected = {student.id: (4 * index + 1, 20) for index, student in enumerate(self.students)}
+        self.assertEqual(module_grades, expected)
+        self.assertEqual(course_grades, expected)
+
+    def test_query_count_does_not_grow_with_grades(self):
+        warm_memberships(self.teacher)
+        with CaptureQueriesContext(connection) as context:
+            self.grade([{'submission_id': self.submissions[0].id, 'score': 5}])
+        with self.assertNumQueries(len(context.captured_queries)):
+            self.grade([{'submission_id': submission.id, 'score': 5} for submission in self.submissions])
+
+    def test_invalid_item_saves_nothing(self):
+        outsider = make_course(make_user('other@odaap.com', isStudent=False), [self.students[0]])
+        foreign = make_module(outsider, 1, questions=1)
+        submit_module(self.students[0], foreign)
+        response = self.grade([
+            {'submission_id': self.submissions[0].id, 'score': 5},
+            {'submission_id': self.submissions[1].id, 'score': 11},
+            {'submission_id': Submission.objects.get(module=foreign).id, 'score': 1},
+            {'submission_id': self.submissions[0].id, 'score': 6},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data['errors']), 4)
+        self.assertEqual(response.data['errors'][0], {})
+        self.assertIn('score', response.data['errors'][1])
+        self.assertIn('submission_id', response.data['errors'][2])
+        self.assertIn('submission_id', response.data['errors'][3])
+        missing_score = self.grade([{'submission_id': self.submissions[2].id}])
+        self.assertIn('score', missing_score.data['errors'][0])
+        self.assertEqual(UserQuestionGrade.objects.count(), 0)
+
+    def test_students_cannot_bulk_grade(self):
+        response = client_for(self.students[0]).post(
+            self.url, {'grades': [{'submission_id': self.submissions[0].id, 'score': 10}]}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.grade([]).status_code, 400)
@@ -0,0 +1,149 @@
+import threading
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core.grading import apply_question_grade
+from core.models import CourseToTeachers, Submission, UserCourseGrade, UserQuestionGrade
+from .helpers import client_for, make_course, make_module, make_user
+
+
+def submit(user, question, **kwargs):
+    return Submission.objects.create(
+        user=user, module=question.module, question=question,
+        submission_type='written', submission_response='answer', **kwargs
+    )
+
+
+class GradingQueueTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.ta = make_user('ta@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(teacher=self.teacher, students=[self.student])
+        CourseToTeachers.objects.create(course=self.course, user=self.ta)
+        self.module = make_module(self.course, 1, questions=3)
+        self.q1, self.q2, self.q3 = self.module.question_set.order_by('question_order')
+        now = timezone.now()
+        self.oldest = submit(self.student, self.q2, time_submitted=now - timedelta(hours=2))
+        self.middle = submit(self.student, self.q1, time_submitted=now - timedelta(hours=1))
+        self.newest = submit(self.student, self.q3, time_submitted=now)
+        self.url = f'/api/courses/{self.course.id}/grading/next/'
+
+    def claim(self, user, data=None):
+        return client_for(user).post(self.url, data or {}, format='json')
+
+    def test_claims_oldest_ungraded_and_skips_claimed(self):
+        apply_question_grade(self.q2, self.student, 5, 10)
+        first = self.claim(self.teacher)
+        self.assertEqual(first.status_code, 200, first.data)
+        self.assertEqual(first.data['submission']['id'], self.middle.id)
+        self.assertIsNone(first.data['submission']['grade'])
+        self.assertIsNotNone(first.data['claim_expires_at'])
+
+        self.assertEqual(self.claim(self.ta).data['submission']['id'], self.newest.id)
+        self.assertEqual(self.claim(self.ta).data['submission']['id'], self.newest.id)
+        self.assertEqual(self.claim(make_user('other@odaap.com', isStudent=False)).status_code, 404)
+
+    def test_grading_removes_from_queue_and_empty_queue_is_204(self):
+        for expected in (self.oldest, self.middle, self.newest):
+            claimed = self.claim(self.teacher).data['submission']
+            self.assertEqual(claimed['id'], expected.id)
+            graded = client_for(self.teacher).post(f'/api/submissions/{claimed["id"]}/grade/', {'score': 8}, format='json')
+            self.assertEqual(graded.status_code, 200)
+        self.assertEqual(self.claim(self.teacher).status_code, 204)
+        self.assertFalse(Submission.objects.filter(is_graded=False).exists())
+        self.assertFalse(Submission.objects.filter(claimed_by__isnull=False).exists())
+
+    def test_expired_claim_returns_to_queue(self):
+        self.claim(self.teacher)
+        Submission.objects.filter(id=self.oldest.id).update(claim_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.claim(self.ta).data['submission']['id'], self.oldest.id)
+
+    @override_settings(GRADING_CLAIM_TTL=60)
+    def test_release_and_module_filter(self):
+        self.claim(self.teacher)
+        release = f'/api/courses/{self.course.id}/grading/release/'
+        self.assertEqual(client_for(self.ta).post(release, {'submission_id': self.oldest.id}, format='json').status_code, 404)
+        self.assertEqual(client_for(self.teacher).post(release, {'submission_id': self.oldest.id}, format='json').status_code, 200)
+        self.assertEqual(self.claim(self.ta).data['submission']['id'], self.oldest.id)
+
+        other = make_module(self.course, 2, questions=1)
+        later = submit(self.student, other.question_set.get(), time_submitted=timezone.now() - timedelta(days=1))
+        self.assertEqual(self.claim(self.teacher, {'module_id': other.id}).data['submission']['id'], later.id)
+        self.assertEqual(self.claim(self.teacher, {'module_id': 'x'}).status_code, 400)
+
+    def test_only_course_teachers_can_claim(self):
+        self.assertEqual(self.claim(self.student).status_code, 403)
+
+    def test_changed_answers_go_back_to_the_queue(self):
+        for question in (self.q1, self.q2, self.q3):
+            apply_question_grade(question, self.student, 8, 10)
+        self.assertEqual(self.claim(self.teacher).status_code, 204)
+
+        def resubmit(question, answer):
+            response = client_for(self.student).post('/api/submissions/', {
+                'question_id': question.id, 'submission_type': 'written', 'response': answer
+            }, format='json')
+            self.assertIn(response.status_code, (200, 201), response.data)
+
+        # Sending the same answer again keeps its grade
+        resubmit(self.q2, 'answer')
+        self.assertEqual(self.claim(self.teacher).status_code, 204)
+
+        resubmit(self.q2, 'a better answer')
+        claimed = self.claim(self.teacher).data['submission']
+        self.assertEqual((claimed['id'], claimed['grade']), (self.oldest.id, None))
+        self.assertFalse(UserQuestionGrade.objects.filter(question=self.q2).exists())
+        self.assertEqual(UserCourseGrade.objects.get(user=self.student).score, 16)
+
+        # Editing an answer drops a grader's claim on it
+        response = client_for(self.student).put(
+            f'/api/submissions/{self.oldest.id}/', {'response': 'edited'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.claim(self.ta).data['submission']['id'], self.oldest.id)
+        client_for(self.student).put(f'/api/submissions/{self.middle.id}/', {'response': 'edited'}, format='json')
+        self.assertEqual(self.claim(self.teacher).data['submission']['id'], self.middle.id)
+        self.assertEqual(UserCourseGrade.objects.get(user=self.student).score, 8)
+
+
+class ConcurrentGradingQueueTests(TransactionTestCase):
+    GRADERS = 6
+
+    def setUp(self):
+        self.student = make_user('student@odaap.com')
+        self.graders = [make_user(f'ta{index}@odaap.com', isStudent=False) for index in range(self.GRADERS)]
+        self.course = make_course(teacher=self.graders[0], students=[self.student])
+        for grader in self.graders[1:]:
+            CourseToTeachers.objects.create(course=self.course, user=grader)
+        module = make_module(self.course, 1, questions=self.GRADERS - 2)
+        for question in module.question_set.all():
+            submit(self.student, question)
+
+    def test_concurrent_graders_never_share_a_submission(self):
+        barrier = threading.Barrier(self.GRADERS)
+        claimed, statuses = [], []
+
+        def claim(grader):
+            client = client_for(grader)
+            barrier.wait()
+            try:
+                response = client.post(f'/api/courses/{self.course.id}/grading/next/', format='json')
+                statuses.append(response.status_code)
+                if response.status_code == 200:
+                    claimed.append(response.data['submission']['id'])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=claim, args=(grader,)) for grader in self.graders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [200] * (self.GRADERS - 2) + [204] * 2)
+        self.assertEqual(len(set(claimed)), self.GRADERS - 2)
+        self.assertEqual(Submission.objects.filter(claimed_by__isnull=False).count(), self.GRADERS - 2)
@@ -0,0 +1,120 @@
+import threading
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from core.models import IdempotencyKey, Submission, UserModuleProgress
+from .helpers import client_for, make_course, make_module, make_user
+
+
+class IdempotentSubmissionTests(TestCase):
+    def setUp(self):
+        self.student = make_user('student@odaap.com')
+        self.module = make_module(make_course(students=[self.student]), 1, questions=2)
+        self.question = self.module.question_set.order_by('question_order').first()
+        self.client = client_for(self.student)
+
+    def submit(self, response='answer', key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post('/api/submissions/', {
+            'question_id': self.question.id, 'submission_type': 'written', 'response': response
+        }, format='json', **headers)
+
+    def test_retry_replays_stored_response(self):
+        first = self.submit(key='abc')
+        self.assertEqual(first.status_code, 201)
+
+        retry = self.submit(key='abc')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(Submission.objects.count(), 1)
+
+    def test_key_reused_for_different_body(self):
+        self.submit(key='abc')
+        self.assertEqual(self.submit(response='changed', key='abc').status_code, 422)
+
+    def test_key_in_progress(self):
+        self.submit(key='abc')
+        # As if the first request had not finished yet
+        IdempotencyKey.objects.filter(key='abc').update(response_status=None, response_body=None)
+        self.assertEqual(self.submit(key='abc').status_code, 409)
+
+    def test_failed_request_is_not_replayed(self):
+        response = self.client.post('/api/submissions/', {'submission_type': 'written'},
+                                    format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(IdempotencyKey.objects.get(key='abc').response_status, 400)
+
+    def test_resubmitting_replaces_the_answer(self):
+        first = self.submit(response='first')
+        second = self.submit(response='second')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(Submission.objects.get().submission_response, 'second')
+
+        # Single-row lookups work again
+        response = self.client.get(
+            f'/api/submissions/users/{self.student.id}/questions/{self.question.id}/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(UserModuleProgress.objects.get().answered_count, 1)
+
+    def test_keys_are_per_user(self):
+        self.submit(key='abc')
+        other = make_user('other@odaap.com')
+        self.module.course.coursetostudents_set.create(user=other)
+        response = client_for(other).post('/api/submissions/', {
+            'question_id': self.question.id, 'submission_type': 'written', 'response': 'answer'
+        }, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Submission.objects.count(), 2)
+
+
+class ConcurrentSubmissionTests(TransactionTestCase):
+    THREADS = 8
+
+    def setUp(self):
+        self.student = make_user('student@odaap.com')
+        self.module = make_module(make_course(students=[self.student]), 1, questions=1)
+        self.question = self.module.question_set.get()
+
+    def hammer(self, key=None):
+        barrier = threading.Barrier(self.THREADS)
+        statuses = []
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+
+        def submit(index):
+            client = client_for(self.student)
+            barrier.wait()
+            try:
+                response = client.post('/api/submissions/', {
+                    'question_id': self.question.id,
+                    'submission_type': 'written',
+                    'response': 'answer' if key else f'answer {index}',
+                }, format='json', **headers)
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return statuses
+
+    def test_concurrent_submissions_leave_one_row(self):
+        statuses = self.hammer()
+        self.assertEqual(len(statuses), self.THREADS)
+        self.assertTrue(set(statuses) <= {200, 201}, statuses)
+        self.assertEqual(Submission.objects.filter(user=self.student).count(), 1)
+        self.assertEqual(UserModuleProgress.objects.get(user=self.student).answered_count, 1)
+
+    def test_concurrent_retries_with_one_key(self):
+        statuses = self.hammer(key='double-click')
+        self.assertEqual(len(statuses), self.THREADS)
+        self.assertEqual(statuses.count(201), 1, statuses)
+        self.assertTrue(set(statuses) <= {201, 409}, statuses)
+        self.assertEqual(Submission.objects.count(), 1)
@@ -0,0 +1,89 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.ingestion import drain_batch
+from core.models import QueuedSubmission, QueuedSubmissionStatus, Submission, UserModuleProgress
+from .helpers import client_for, make_course, make_module, make_user
+
+
+@override_settings(SUBMISSION_QUEUE_ENABLED=True)
+class SubmissionQueueTests(TestCase):
+    def setUp(self):
+        self.student = make_user('student@odaap.com')
+        self.module = make_module(make_course(students=[self.student]), 1, questions=2)
+        self.questions = list(self.module.question_set.order_by('question_order'))
+        self.client = client_for(self.student)
+
+    def submit(self, question, response='answer'):
+        return self.client.post('/api/submissions/', {
+            'question_id': question.id, 'submission_type': 'written', 'response': response
+        }, format='json')
+
+    def test_accepts_with_receipt_and_drains_later(self):
+        # Look up the question, then one INSERT
+        with self.assertNumQueries(2):
+            response = self.submit(self.questions[0])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertFalse(Submission.objects.exists())
+
+        receipt = response.data['receipt']
+        accepted_at = QueuedSubmission.objects.get().accepted_at
+        self.submit(self.questions[1])
+
+        self.assertEqual(drain_batch(), 2)
+        submission = Submission.objects.get(question=self.questions[0])
+        self.assertEqual(submission.time_submitted, accepted_at)
+        self.assertTrue(UserModuleProgress.objects.get(user=self.student).is_completed)
+
+        status = self.client.get(f'/api/submissions/receipts/{receipt}/').data
+        self.assertEqual(status['status'], 'saved')
+        self.assertEqual(status['submission']['id'], submission.id)
+        self.assertEqual(drain_batch(), 0)
+
+    def test_latest_answer_wins(self):
+        self.submit(self.questions[0], 'first')
+        self.submit(self.questions[0], 'second')
+        drain_batch()
+        self.assertEqual(Submission.objects.get().submission_response, 'second')
+        self.assertEqual(
+            sorted(QueuedSubmission.objects.values_list('status', flat=True)),
+            [QueuedSubmissionStatus.SAVED, QueuedSubmissionStatus.SUPERSEDED]
+        )
+
+    def test_newer_direct_answer_is_kept(self):
+        self.submit(self.questions[0], 'queued')
+        QueuedSubmission.objects.update(accepted_at=timezone.now() - timedelta(minutes=5))
+        Submission.objects.create(
+            user=self.student, module=self.module, question=self.questions[0],
+            submission_type='written', submission_response='direct'
+        )
+        drain_batch()
+        self.assertEqual(Submission.objects.get().submission_response, 'direct')
+        self.assertEqual(QueuedSubmission.objects.get().status, QueuedSubmissionStatus.SUPERSEDED)
+
+    def test_batches_and_command(self):
+        for question in self.questions:
+            self.submit(question)
+        self.assertEqual(drain_batch(batch_size=1), 1)
+        call_command('drain_submission_queue', '--batch-size', '10', stdout=io.StringIO())
+        self.assertEqual(Submission.objects.count(), 2)
+        self.assertFalse(QueuedSubmission.objects.filter(status=QueuedSubmissionStatus.PENDING).exists())
+
+    def test_rejects_invalid_answers_up_front(self):
+        response = self.client.post('/api/submissions/', {
+            'question_id': self.questions[0].id, 'submission_type': 'essay', 'response': 'x'
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        # Rejected inline as well, so never queued
+        self.assertEqual(self.submit(self.questions[0], response='').status_code, 400)
+        self.assertFalse(QueuedSubmission.objects.exists())
+
+    def test_receipts_are_private(self):
+        receipt = self.submit(self.questions[0]).data['receipt']
+        other = client_for(make_user('other@odaap.com'))
+        self.assertEqual(other.get(f'/api/submissions/receipts/{receipt}/').status_code, 404)
@@ -0,0 +1,306 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIClient
+
+from core.models import Submission
+from .helpers import client_for, make_course, make_module, make_user
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def data_url(payload, content_type='audio/webm'):
+    return f'data:{content_type};codecs=opus;base64,' + base64.b64encode(payload).decode()
+
+
+STATICFILES = {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}
+
+local_storage = override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': STATICFILES,
+    }
+)
+
+
+@local_storage
+class SubmissionMediaTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(students=[self.student])
+        self.module = make_module(self.course, 1, questions=1)
+        self.question = self.module.question_set.get()
+        self.question.question_type = 'audio'
+        self.question.save()
+        self.client = client_for(self.student)
+        self.payload = bytes(range(256)) * 1000  # spans several read chunks
+
+    def submit(self, **data):
+        return self.client.post('/api/submissions/', {
+            'question_id': self.question.id, 'submission_type': 'audio', **data
+        }, format='json')
+
+    def test_data_url_is_moved_to_storage(self):
+        response = self.submit(response=data_url(self.payload))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['submission_response'], '')
+        self.assertEqual(response.data['media_size'], len(self.payload))
+
+        submission = Submission.objects.get()
+        self.assertEqual(submission.submission_response, '')
+        self.assertEqual(submission.media_content_type, 'audio/webm')
+        self.assertEqual(submission.media_checksum, hashlib.sha256(self.payload).hexdigest())
+        self.assertTrue(submission.media_key.endswith('.webm'))
+        with default_storage.open(submission.media_key) as stored:
+            self.assertEqual(stored.read(), self.payload)
+
+    def test_multipart_upload(self):
+        upload = SimpleUploadedFile('clip.mp4', b'\x00video' * 100, content_type='video/mp4')
+        response = self.client.post('/api/submissions/', {
+            'question_id': self.question.id, 'submission_type': 'video', 'media': upload
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        submission = Submission.objects.get()
+        self.assertEqual(submission.media_content_type, 'video/mp4')
+        self.assertEqual(submission.media_size, 600)
+
+    def test_list_does_not_carry_payload(self):
+        self.submit(response=data_url(self.payload))
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/submissions/')
+        self.assertEqual(response.data['results'][0]['submission_response'], '')
+        self.assertLess(len(response.content), 2000)
+        self.assertEqual(len(captured), 1)
+
+    def test_written_answers_stay_inline(self):
+        response = self.client.post('/api/submissions/', {
+            'question_id': self.question.id, 'submission_type': 'written', 'response': 'hello'
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        submission = Submission.objects.get()
+        self.assertEqual(submission.submission_response, 'hello')
+        self.assertEqual(submission.media_key, '')
+
+    def test_rerecording_replaces_file(self):
+        created = self.submit(response=data_url(self.payload)).data
+        old_key = Submission.objects.get().media_key
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(f"/api/submissions/{created['id']}/", {
+                'submission_type': 'audio', 'response': data_url(b'new recording')
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        submission = Submission.objects.get()
+        self.assertNotEqual(submission.media_key, old_key)
+        self.assertEqual(submission.media_size, len(b'new recording'))
+        self.assertFalse(default_storage.exists(old_key))
+
+    def test_delete_removes_file(self):
+        created = self.submit(response=data_url(self.payload)).data
+        key = Submission.objects.get().media_key
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/submissions/{created['id']}/")
+        self.assertFalse(default_storage.exists(key))
+
+    def test_invalid_base64_is_rejected(self):
+        response = self.submit(response='data:audio/webm;base64,@@@@')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Submission.objects.exists())
+
+    def test_invalid_base64_is_rejected_on_update(self):
+        created = self.submit(response=data_url(self.payload)).data
+        old_key = Submission.objects.get().media_key
+        response = self.client.put(f"/api/submissions/{created['id']}/", {
+            'submission_type': 'audio', 'response': 'data:audio/webm;base64,@@@@'
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Submission.objects.get().media_key, old_key)
+        self.assertTrue(default_storage.exists(old_key))
+
+
+@local_storage
+class MediaDownloadTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(teacher=self.teacher, students=[self.student])
+        self.module = make_module(self.course, 1, questions=1)
+        self.question = self.module.question_set.get()
+        self.client = client_for(self.student)
+        self.payload = bytes(range(256)) * 1000
+        created = self.client.post('/api/submissions/', {
+            'question_id': self.question.id, 'submission_type': 'audio',
+            'response': data_url(self.payload)
+        }, format='json').data
+        self.submission = Submission.objects.get(id=created['id'])
+        self.url = f'/api/submissions/{self.submission.id}/media/'
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.payload)
+        self.assertEqual(response['Content-Length'], str(len(self.payload)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], f'"{self.submission.media_checksum}"')
+        self.assertIn('Last-Modified', response)
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.payload)}')
+        self.assertEqual(self.body(response), self.payload[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(self.body(response), self.payload[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=255000-')
+        self.assertEqual(self.body(response), self.payload[255000:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.payload)}-')
+        self.assertEqual(response.status_code, 416)
+
+        # A stale If-Range falls back to the full file
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_access(self):
+        self.assertEqual(client_for(self.teacher).get(self.url).status_code, 200)
+        outsider = client_for(make_user('outsider@odaap.com'))
+        self.assertEqual(outsider.get(self.url).status_code, 403)
+
+    def test_signed_url_from_list(self):
+        listed = self.client.get('/api/submissions/').data['results'][0]
+        self.assertEqual(listed['media_size'], len(self.payload))
+        anonymous = APIClient()
+        response = anonymous.get(listed['media_url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.payload)
+
+        self.assertEqual(anonymous.get(self.url + '?token=forged').status_code, 403)
+        self.assertEqual(anonymous.get(self.url).status_code, 403)
+
+        # Replacing the recording invalidates links to the old one
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(f'/api/submissions/{self.submission.id}/', {
+                'submission_type': 'audio', 'response': data_url(b'new')
+            }, format='json')
+        self.assertEqual(anonymous.get(listed['media_url']).status_code, 403)
+
+    def test_legacy_inline_media(self):
+        Submission.objects.filter(id=self.submission.id).update(
+            submission_response=data_url(b'old clip'), media_key='', media_size=None
+        )
+        listed = self.client.get('/api/submissions/').data['results'][0]
+        self.assertEqual(listed['submission_response'], '')
+        self.assertEqual(listed['media_size'], len(b'old clip'))
+        response = self.client.get(listed['media_url'])
+        self.assertEqual(self.body(response), b'old clip')
+        self.assertEqual(response['Content-Type'], 'audio/webm')
+
+    @override_settings(STORAGES={
+        'default': {
+            'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage',
+            'OPTIONS': {
+                'bucket_name': 'odaap-test', 'access_key': 'test', 'secret_key': 'test',
+                'region_name': 'us-east-1', 'querystring_auth': True,
+            },
+        },
+        'staticfiles': STATICFILES,
+    })
+    def test_s3_redirects_to_cached_presigned_url(self):
+        cache.clear()
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 302)
+        self.assertIn('odaap-test', first['Location'])
+        self.assertIn('Signature=', first['Location'])
+        self.assertEqual(self.client.get(self.url)['Location'], first['Location'])
+
+
+@local_storage
+class InlineMediaMigrationTests(TestCase):
+    def setUp(self):
+        self.student = make_user('student@odaap.com')
+        self.module = make_module(make_course(students=[self.student]), 1, questions=5)
+        self.payloads = {}
+        for question in self.module.question_set.order_by('question_order')[:3]:
+            payload = f'recording {question.id}'.encode() * 500
+            submission = Submission.objects.create(
+                user=self.student, module=self.module, question=question,
+                submission_type='audio', submission_response=data_url(payload)
+            )
+            self.payloads[submission.id] = payload
+        broken, written = self.module.question_set.order_by('question_order')[3:]
+        self.broken = Submission.objects.create(
+            user=self.student, module=self.module, question=broken,
+            submission_type='audio', submission_response='data:audio/webm;base64,@@@@'
+        )
+        Submission.objects.create(
+            user=self.student, module=self.module, question=written,
+            submission_type='written', submission_response='plain text'
+        )
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+
+    def run_command(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        call_command(
+            'migrate_inline_media', '--batch-size', '2', '--checkpoint', self.checkpoint,
+            *args, stdout=out, stderr=err
+        )
+        return out.getvalue()
+
+    def test_dry_run_changes_nothing(self):
+        output = self.run_command('--dry-run')
+        self.assertIn('Would migrate 4 submissions', output)
+        self.assertFalse(Submission.objects.exclude(media_key='').exists())
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_migrates_in_resumable_batches(self):
+        self.run_command('--limit', '2')
+        self.assertEqual(Submission.objects.exclude(media_key='').count(), 2)
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f)['migrated'], 2)
+
+        output = self.run_command()
+        self.assertIn('Migrated 3 submissions, 1 failed', output)
+        inline = sum(len(data_url(payload)) for payload in self.payloads.values())
+        self.assertIn(f'reclaimed {inline} bytes', output)
+
+        for submission_id, payload in self.payloads.items():
+            submission = Submission.objects.get(id=submission_id)
+            self.assertEqual(submission.submission_response, '')
+            self.assertEqual(submission.media_checksum, hashlib.sha256(payload).hexdigest())
+            with default_storage.open(submission.media_key) as stored:
+                self.assertEqual(stored.read(), payload)
+
+        self.broken.refresh_from_db()
+        self.assertEqual(self.broken.media_key, '')
+        self.assertEqual(
+            Submission.objects.get(submission_type='written').submission_response, 'plain text'
+        )
@@ -0,0 +1,101 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.membership import STUDENT, TEACHER, load_memberships, user_memberships
+from core.models import CourseToStudents, CourseToTeachers
+from core.views import CourseViewSet
+from .helpers import client_for, make_course, make_module, make_user, warm_memberships
+
+
+def membership_queries(context):
+    return [q['sql'] for q in context.captured_queries if 'core_coursetostudents' in q['sql']]
+
+
+class MembershipTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(self.teacher, [self.student])
+        self.other = make_course(self.teacher, course_name='Other course')
+
+    def course_ids(self, user):
+        return {course['id'] for course in client_for(user).get('/api/courses/').data}
+
+    def test_roles_are_cached(self):
+        self.assertEqual(user_memberships(self.teacher), {self.course.id: TEACHER, self.other.id: TEACHER})
+        with self.assertNumQueries(0):
+            self.assertEqual(user_memberships(self.teacher), {self.course.id: TEACHER, self.other.id: TEACHER})
+
+    def test_account_type_decides_between_roles(self):
+        CourseToStudents.objects.create(course=self.other, user=self.teacher)
+        CourseToTeachers.objects.create(course=self.course, user=self.student)
+        self.assertEqual(load_memberships(self.teacher)[self.other.id], TEACHER)
+        self.assertEqual(load_memberships(self.student)[self.course.id], STUDENT)
+
+    def test_one_lookup_per_request(self):
+        target = make_course(self.teacher, course_name='Target')
+        module = make_module(self.course, 1, questions=2)
+        with CaptureQueriesContext(connection) as context:
+            response = client_for(self.teacher).post(
+                f'/api/modules/{module.id}/clone/', {'course_id': target.id}, format='json'
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(membership_queries(context)), 1)
+
+        warm_memberships(self.student)
+        with CaptureQueriesContext(connection) as context:
+            client_for(self.student).get(f'/api/modules/?course_id={self.course.id}')
+        self.assertEqual(membership_queries(context), [])
+
+    def test_adding_and_removing_users_invalidates(self):
+        newcomer = make_user('newcomer@odaap.com')
+        self.assertEqual(self.course_ids(newcomer), set())
+
+        url = f'/api/courses/{self.other.id}/users/'
+        client = client_for(self.teacher)
+        self.assertEqual(client.post(url, {'user_id': newcomer.id}, format='json').status_code, 200)
+        self.assertEqual(self.course_ids(newcomer), {self.other.id})
+
+        # DELETE shares its URL with POST, which the router resolves first
+        remove = CourseViewSet.as_view({'delete': 'remove_user_from_course'})
+        request = APIRequestFactory().delete(url, {'user_id': newcomer.id}, format='json')
+        force_authenticate(request, user=self.teacher)
+        self.assertEqual(remove(request, pk=self.other.id).status_code, 200)
+        self.assertEqual(self.course_ids(newcomer), set())
+        self.assertEqual(client_for(newcomer).get(f'/api/courses/{self.other.id}/').status_code, 404)
+
+    def test_any_enrollment_write_invalidates(self):
+        # As the admin would: plain ORM writes, no view involved
+        module = make_module(self.other, 1, questions=1)
+        url = f'/api/modules/{module.id}/questions/'
+        warm_memberships(self.student)
+        self.assertEqual(client_for(self.student).get(url).status_code, 404)
+
+        enrollment = CourseToStudents.objects.create(course=self.other, user=self.student)
+        self.assertEqual(client_for(self.student).get(url).status_code, 200)
+        enrollment.delete()
+        self.assertEqual(client_for(self.student).get(url).status_code, 404)
+
+        newcomer = make_user('newcomer@odaap.com', isStudent=False)
+        self.assertEqual(self.course_ids(newcomer), set())
+        CourseToTeachers.objects.create(course=self.course, user=newcomer)
+        self.assertEqual(self.course_ids(newcomer), {self.course.id})
+        CourseToTeachers.objects.filter(user=newcomer).delete()
+        self.assertEqual(self.course_ids(newcomer), set())
+
+    def test_roster_import_and_clone_invalidate(self):
+        self.assertEqual(self.course_ids(self.student), {self.course.id})
+        client = client_for(self.teacher)
+        client.post(f'/api/courses/{self.other.id}/roster/', {'rows': [{'email': self.student.email}]}, format='json')
+        self.assertEqual(self.course_ids(self.student), {self.course.id, self.other.id})
+
+        copy = client.post(f'/api/courses/{self.course.id}/clone/', {}, format='json').data['course']
+        self.assertIn(copy['id'], self.course_ids(self.teacher))
+
+    def test_course_students_are_teacher_only(self):
+        url = f'/api/courses/{self.course.id}/students/'
+        self.assertEqual(client_for(self.student).get(url).status_code, 403)
+        self.assertEqual(client_for(make_user('outsider@odaap.com', isStudent=False)).get(url).status_code, 404)
+        self.assertEqual(client_for(self.teacher).get(url).status_code, 200)
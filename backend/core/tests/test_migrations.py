@@ -0,0 +1,165 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from core.grading import apply_question_grade
+from core.models import (
+    MediaUpload, Question, Submission, User, UserCourseGrade, UserModuleGrade, UserModuleProgress
+)
+
+
+class MigrationTestCase(TransactionTestCase):
+    """
+    Migrates the test database back to migrate_from, lets seed() write rows
+    through the models as they were there, then migrates forward the way
+    `migrate` does, one transaction per migration
+    """
+    migrate_from = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        target = [('core', self.migrate_from)]
+        executor.migrate(target)
+        self.seed(executor.loader.project_state(target).apps)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def seed(self, apps):
+        raise NotImplementedError
+
+
+class ModuleProgressBackfillTests(MigrationTestCase):
+    migrate_from = '0003_alter_course_options_alter_coursetomodules_options_and_more'
+
+    def seed(self, apps):
+        User = apps.get_model('core', 'User')
+        Course = apps.get_model('core', 'Course')
+        Module = apps.get_model('core', 'Module')
+        Question = apps.get_model('core', 'Question')
+        Submission = apps.get_model('core', 'Submission')
+
+        student = User.objects.create(username='student@odaap.com', email='student@odaap.com')
+        course = Course.objects.create(course_name='Test Course')
+        self.answered = {}
+        for module_order, answered in ((1, 2), (2, 1)):
+            module = Module.objects.create(
+                course=course, module_name=f'Module {module_order}', module_order=module_order
+            )
+            for order in (1, 2):
+                question = Question.objects.create(
+                    module=module, question_type='written', question_text=f'Question {order}',
+                    question_order=order, score_total=10
+                )
+                if order > answered:
+                    continue
+                # Resubmitting neither counts twice nor moves completed_at
+                for _ in range(2):
+                    submission = Submission.objects.create(
+                        user=student, module=module, question=question,
+                        submission_type='written', submission_response='answer'
+                    )
+                    self.answered.setdefault((module_order, order), submission.time_submitted)
+
+    def test_progress_covers_earlier_submissions(self):
+        progress = {
+            p.module.module_order: (p.answered_count, p.is_completed, p.completed_at)
+            for p in UserModuleProgress.objects.select_related('module')
+        }
+        self.assertEqual(progress, {1: (2, True, self.answered[1, 2]), 2: (1, False, None)})
+
+
+class GradeRollupBackfillTests(MigrationTestCase):
+    migrate_from = '0005_hot_path_indexes'
+
+    def seed(self, apps):
+        User = apps.get_model('core', 'User')
+        Course = apps.get_model('core', 'Course')
+        Module = apps.get_model('core', 'Module')
+        Question = apps.get_model('core', 'Question')
+        UserQuestionGrade = apps.get_model('core', 'UserQuestionGrade')
+        UserModuleGrade = apps.get_model('core', 'UserModuleGrade')
+
+        student = User.objects.create(username='student@odaap.com', email='student@odaap.com')
+        course = Course.objects.create(course_name='Test Course')
+        first = Module.objects.create(course=course, module_name='Module 1', module_order=1)
+        second = Module.objects.create(course=course, module_name='Module 2', module_order=2)
+        for module, order, score in ((first, 1, 7), (first, 2, 4), (second, 1, 9)):
+            question = Question.objects.create(
+                module=module, question_type='written', question_text=f'Question {order}',
+                question_order=order, score_total=10
+            )
+            UserQuestionGrade.objects.create(question=question, user=student, score=score, total=10)
+        # Rows written by hand before anything maintained the rollups
+        for _ in range(2):
+            UserModuleGrade.objects.create(module=first, user=student, score=1, total=1)
+
+    def rollups(self):
+        return (
+            dict(UserModuleGrade.objects.values_list('module__module_order', 'score')),
+            list(UserCourseGrade.objects.values_list('score', 'total')),
+        )
+
+    def test_rollups_are_rebuilt_from_question_grades(self):
+        self.assertEqual(self.rollups(), ({1: 11, 2: 9}, [(20, 30)]))
+        self.assertEqual(UserModuleGrade.objects.count(), 2)
+
+        # Later grades apply their deltas on top of the backfilled sums
+        question = Question.objects.get(module__module_order=1, question_order=1)
+        apply_question_grade(question, User.objects.get(), 8, 10)
+        self.assertEqual(self.rollups(), ({1: 12, 2: 9}, [(21, 30)]))
+
+
+class SubmissionDedupeTests(MigrationTestCase):
+    migrate_from = '0009_media_uploads'
+
+    def seed(self, apps):
+        User = apps.get_model('core', 'User')
+        Course = apps.get_model('core', 'Course')
+        Module = apps.get_model('core', 'Module')
+        Question = apps.get_model('core', 'Question')
+        Submission = apps.get_model('core', 'Submission')
+        MediaUpload = apps.get_model('core', 'MediaUpload')
+
+        student = User.objects.create(username='student@odaap.com', email='student@odaap.com')
+        other = User.objects.create(username='other@odaap.com', email='other@odaap.com')
+        module = Module.objects.create(
+            course=Course.objects.create(course_name='Test Course'), module_name='Module 1', module_order=1
+        )
+        first, second = (
+            Question.objects.create(
+                module=module, question_type='written', question_text=f'Question {order}',
+                question_order=order, score_total=10
+            )
+            for order in (1, 2)
+        )
+
+        now = timezone.now()
+        def submit(user, question, response, time_submitted):
+            return Submission.objects.create(
+                user=user, module=module, question=question, submission_type='written',
+                submission_response=response, time_submitted=time_submitted
+            )
+        superseded = submit(student, first, 'second', now - timedelta(hours=1))
+        submit(student, first, 'first', now - timedelta(hours=2))
+        submit(student, first, 'third', now - timedelta(hours=1))  # same time, later row
+        submit(student, second, 'only', now)
+        submit(other, first, 'other', now - timedelta(hours=3))
+        MediaUpload.objects.create(
+            user=student, question=first, submission=superseded,
+            content_type='audio/webm', total_size=10, chunk_size=10, status='completed'
+        )
+
+    def test_latest_answer_per_question_survives(self):
+        self.assertEqual(
+            sorted(Submission.objects.values_list('user__username', 'question__question_order', 'submission_response')),
+            [('other@odaap.com', 1, 'other'), ('student@odaap.com', 1, 'third'), ('student@odaap.com', 2, 'only')]
+        )
+        self.assertIsNone(MediaUpload.objects.get().submission_id)
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Submission
+from .helpers import client_for, make_course, make_module, make_user
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(teacher=self.teacher, students=[self.student])
+        self.module = make_module(self.course, 1, questions=7)
+        # Pairs of submissions share a timestamp so ties must be broken by id
+        now = timezone.now()
+        for index, question in enumerate(self.module.question_set.order_by('question_order')):
+            Submission.objects.create(
+                user=self.student, module=self.module, question=question,
+                submission_type='written', submission_response='answer',
+                time_submitted=now - timedelta(minutes=index // 2)
+            )
+        self.client = client_for(self.student)
+
+    def walk(self, url):
+        """Follow next links from url; returns the pages' results"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            pages.append(response.data['results'])
+            url = response.data['next']
+        return pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        pages = self.walk('/api/submissions/?page_size=3')
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        expected = list(Submission.objects.order_by('-time_submitted', '-id').values_list('id', flat=True))
+        self.assertEqual([row['id'] for page in pages for row in page], expected)
+
+    def test_rows_added_while_paging_are_not_repeated(self):
+        first = self.client.get('/api/submissions/?page_size=3')
+        extra = make_module(self.course, 2, questions=1).question_set.get()
+        Submission.objects.create(
+            user=self.student, module=extra.module, question=extra,
+            submission_type='written', submission_response='late'
+        )
+        rest = self.walk(first.data['next'])
+        seen = [row['id'] for row in first.data['results']] + [row['id'] for page in rest for row in page]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 7)
+
+    def test_modules_and_questions_page_by_order(self):
+        for order in range(2, 6):
+            make_module(self.course, order)
+        self.client = client_for(self.teacher)
+        pages = self.walk(f'/api/modules/?course_id={self.course.id}&page_size=2')
+        self.assertEqual([row['module_order'] for page in pages for row in page], [1, 2, 3, 4, 5])
+
+        pages = self.walk(f'/api/questions/?module_id={self.module.id}&page_size=4')
+        self.assertEqual([row['question_order'] for page in pages for row in page], list(range(1, 8)))
+
+    @override_settings(PAGINATION_PAGE_SIZE=2, PAGINATION_MAX_PAGE_SIZE=5)
+    def test_page_size_default_and_cap(self):
+        self.assertEqual(len(self.client.get('/api/submissions/').data['results']), 2)
+        self.assertEqual(len(self.client.get('/api/submissions/?page_size=50').data['results']), 5)
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', 'WzFd', 'WyJub3QgYSBkYXRlIiwxXQ'):
+            response = self.client.get(f'/api/submissions/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404)
@@ -0,0 +1,123 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Question, Submission, UserModuleProgress
+from .helpers import client_for, make_course, make_module, make_user, submit_module, warm_memberships
+
+
+class ModuleProgressTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(self.teacher, [self.student])
+        self.client = client_for(self.student)
+
+    def progress(self, module):
+        return UserModuleProgress.objects.get(user=self.student, module=module)
+
+    def submit(self, question):
+        return self.client.post('/api/submissions/', {
+            'question_id': question.id,
+            'response': 'answer'
+        }, format='json')
+
+    def test_submissions_update_progress(self):
+        module = make_module(self.course, 1, questions=2)
+        first, second = module.question_set.order_by('question_order')
+
+        self.assertEqual(self.submit(first).status_code, 201)
+        self.assertEqual(self.progress(module).answered_count, 1)
+        self.assertFalse(self.progress(module).is_completed)
+
+        # Resubmitting the same question does not count twice
+        self.submit(first)
+        self.assertEqual(self.progress(module).answered_count, 1)
+
+        self.submit(second)
+        progress = self.progress(module)
+        self.assertTrue(progress.is_completed)
+        self.assertIsNotNone(progress.completed_at)
+
+    def test_deleting_submission_reopens_module(self):
+        module = make_module(self.course, 1, questions=1)
+        response = self.submit(module.question_set.get())
+        self.assertTrue(self.progress(module).is_completed)
+
+        self.client.delete(f"/api/submissions/{response.data['id']}/")
+        progress = self.progress(module)
+        self.assertFalse(progress.is_completed)
+        self.assertIsNone(progress.completed_at)
+
+    def test_question_changes_refresh_module(self):
+        module = make_module(self.course, 1, questions=1, is_posted=False)
+        submit_module(self.student, module)
+        self.assertTrue(self.progress(module).is_completed)
+
+        teacher = client_for(self.teacher)
+        response = teacher.post(f'/api/modules/{module.id}/question/', {
+            'question_text': 'New',
+            'question_type': 'written',
+            'question_order': 2
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(self.progress(module).is_completed)
+
+        response = teacher.delete(f"/api/questions/{response.data['id']}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertTrue(self.progress(module).is_completed)
+
+    def test_accessibility_is_constant_queries(self):
+        modules = [make_module(self.course, order, questions=5) for order in range(1, 21)]
+        for module in modules[:-1]:
+            submit_module(self.student, module)
+
+        # module lookup, accessibility, completion
+        warm_memberships(self.student)
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/modules/{modules[-1].id}/is-accessible/')
+        self.assertTrue(response.data['is_accessible'])
+        self.assertFalse(response.data['is_completed'])
+
+    def test_locked_until_previous_completed(self):
+        first = make_module(self.course, 1, questions=1)
+        second = make_module(self.course, 2, questions=1)
+
+        response = self.client.get(f'/api/modules/{second.id}/questions/')
+        self.assertEqual(response.status_code, 403)
+
+        self.submit(first.question_set.get())
+        response = self.client.get(f'/api/modules/{second.id}/questions/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_rebuild_command(self):
+        module = make_module(self.course, 1, questions=2)
+        other = make_module(self.course, 2, questions=1)
+        submit_module(self.student, module)
+        submit_module(self.student, other)
+        expected = {
+            p.module_id: (p.answered_count, p.is_completed)
+            for p in UserModuleProgress.objects.all()
+        }
+
+        # Drift: rows missing or wrong
+        UserModuleProgress.objects.filter(module=module).delete()
+        UserModuleProgress.objects.filter(module=other).update(answered_count=0, is_completed=False)
+        Submission.objects.create(
+            user=self.student, module=other,
+            question=Question.objects.create(
+                module=other, question_type='written', question_text='Extra', question_order=2
+            ),
+            submission_type='written', submission_response='answer'
+        )
+        expected[other.id] = (2, True)
+
+        call_command('rebuild_module_progress', stdout=StringIO())
+
+        actual = {
+            p.module_id: (p.answered_count, p.is_completed)
+            for p in UserModuleProgress.objects.all()
+        }
+        self.assertEqual(actual, expected)
+        self.assertIsNotNone(self.progress(module).completed_at)
@@ -0,0 +1,134 @@
+from django.test import TestCase
+
+from core.grading import apply_question_grade
+from core.models import QuestionToCorrectAnswers, Submission
+from .helpers import client_for, make_course, make_module, make_user, warm_memberships
+
+
+class ListQueryCountTests(TestCase):
+    """Each list endpoint runs a fixed number of queries whatever its size"""
+
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(self.teacher, [self.student])
+        warm_memberships(self.teacher, self.student)
+
+    def populate(self, modules, questions):
+        created = []
+        start = self.course.module_set.count() + 1
+        for order in range(start, start + modules):
+            module = make_module(self.course, order, questions=questions, is_posted=False)
+            for question in module.question_set.all():
+                QuestionToCorrectAnswers.objects.create(question=question, correct_answer='a')
+                QuestionToCorrectAnswers.objects.create(question=question, correct_answer='b')
+                Submission.objects.create(
+                    user=self.student, module=module, question=question,
+                    submission_type='written', submission_response='answer'
+                )
+                apply_question_grade(question, self.student, 5, 10)
+            created.append(module)
+        return created
+
+    @staticmethod
+    def rows(response):
+        """The listed objects, whether or not the endpoint is paginated"""
+        return response.data['results'] if isinstance(response.data, dict) else response.data
+
+    def assertConstantQueries(self, client, url, grow, num):
+        """Run url, grow the data set, run it again: both must take num queries"""
+        with self.assertNumQueries(num):
+            first = client.get(url)
+        self.assertEqual(first.status_code, 200)
+        grow()
+        with self.assertNumQueries(num):
+            second = client.get(url)
+        self.assertGreater(len(self.rows(second)), len(self.rows(first)))
+        return second
+
+    def test_submission_list(self):
+        module = self.populate(1, 3)[0]
+        client = client_for(self.student)
+
+        # submissions joined with user, question and grade
+        response = self.assertConstantQueries(
+            client, '/api/submissions/', lambda: self.populate(2, 5), 1
+        )
+        self.assertEqual(response.data['results'][0]['grade'], {'score': 5, 'total': 10, 'is_overdue': False})
+        self.assertEqual(response.data['results'][0]['user_name'], self.student.get_full_name())
+
+        with self.assertNumQueries(1):
+            client.get(f'/api/submissions/?module_id={module.id}')
+
+    def test_question_list(self):
+        module = self.populate(1, 2)[0]
+
+        def grow():
+            for order in range(3, 13):
+                question = module.question_set.create(
+                    question_type='written', question_text='Q', question_order=order
+                )
+                QuestionToCorrectAnswers.objects.create(question=question, correct_answer='c')
+
+        # module's course, questions, prefetched answers; grow() changes the
+        # module, so both requests miss the content cache
+        response = self.assertConstantQueries(
+            client_for(self.teacher), f'/api/questions/?module_id={module.id}', grow, 3
+        )
+        self.assertEqual(response.data['results'][0]['correct_answers'], ['a', 'b'])
+
+    def test_student_question_lists_skip_answer_keys(self):
+        module = self.populate(1, 2)[0]
+        module.is_posted = True
+        module.save()
+        client = client_for(self.student)
+        grow = lambda: [
+            module.question_set.create(question_type='written', question_text='Q', question_order=order)
+            for order in range(3, 13)
+        ]
+
+        # module's course, questions; answer keys are never read
+        response = self.assertConstantQueries(client, f'/api/questions/?module_id={module.id}', grow, 2)
+        self.assertNotIn('correct_answers', response.data['results'][0])
+        # module, the accessibility check, questions
+        response = self.assertConstantQueries(client, f'/api/modules/{module.id}/questions/', grow, 3)
+        self.assertNotIn('correct_answers', response.data[0])
+
+        question = module.question_set.first()
+        for url in (f'/api/questions/{question.id}/', f'/api/questions/questionid={question.id}/?module_id={module.id}'):
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('correct_answers', response.data)
+            self.assertEqual(response.data['question_text'], question.question_text)
+
+    def test_module_questions(self):
+        module = self.populate(1, 2)[0]
+        grow = lambda: [
+            module.question_set.create(question_type='written', question_text='Q', question_order=order)
+            for order in range(3, 13)
+        ]
+        # module, questions, prefetched answers
+        self.assertConstantQueries(
+            client_for(self.teacher), f'/api/modules/{module.id}/questions/', grow, 3
+        )
+
+    def test_module_lists(self):
+        self.populate(2, 1)
+        client = client_for(self.teacher)
+        grow = lambda: self.populate(3, 1)
+
+        # ETag aggregate, modules joined with course
+        self.assertConstantQueries(client, f'/api/modules/?course_id={self.course.id}', grow, 2)
+        # course, modules joined with course
+        self.assertConstantQueries(client, f'/api/courses/{self.course.id}/modules/', grow, 2)
+
+    def test_course_member_lists(self):
+        client = client_for(self.teacher)
+
+        def grow():
+            for i in range(5):
+                student = make_user(f'extra{i}@odaap.com')
+                self.course.coursetostudents_set.create(user=student)
+
+        # course, students
+        self.assertConstantQueries(client, f'/api/courses/{self.course.id}/students/', grow, 2)
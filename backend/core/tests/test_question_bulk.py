@@ -0,0 +1,95 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Question, QuestionToCorrectAnswers, Submission, UserModuleProgress
+from .helpers import client_for, make_course, make_module, make_user, submit_module, warm_memberships
+
+
+class BulkQuestionEditTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(teacher=self.teacher, students=[self.student])
+        self.module = make_module(self.course, 1, questions=3, is_posted=False)
+        self.questions = list(self.module.question_set.order_by('question_order'))
+        for question in self.questions:
+            QuestionToCorrectAnswers.objects.create(question=question, correct_answer=f'key {question.id}')
+        self.url = f'/api/modules/{self.module.id}/questions/bulk/'
+        self.client = client_for(self.teacher)
+
+    def current(self):
+        """The module's questions as the editor would send them back"""
+        return [
+            {'id': q.id, 'question_text': q.question_text, 'question_type': q.question_type,
+             'score_total': q.score_total, 'correct_answers': [f'key {q.id}']}
+            for q in self.questions
+        ]
+
+    def test_applies_creates_updates_deletes_and_reorder(self):
+        first, second, third = self.current()
+        second['question_text'] = 'Reworded'
+        third['correct_answers'] = ['a', 'b']
+        new = {'question_text': 'New', 'question_type': 'multiple_choice',
+               'mcq_options': ['a', 'b'], 'score_total': 5, 'correct_answers': ['b']}
+
+        response = self.client.patch(self.url, {'questions': [third, new, second]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['summary'], {
+            'created': 1, 'updated': 1, 'deleted': 1, 'reordered': 2, 'answer_sets': 2
+        })
+        self.assertEqual(
+            [(q['question_text'], q['question_order'], q['correct_answers']) for q in response.data['questions']],
+            [('Question 3', 1, ['a', 'b']), ('New', 2, ['b']), ('Reworded', 3, [f"key {second['id']}"])]
+        )
+        self.assertFalse(Question.objects.filter(id=first['id']).exists())
+
+    def test_unchanged_list_writes_nothing(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(self.url, {'questions': self.current()}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['summary'].values()), {0})
+        writes = [q['sql'] for q in context.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertEqual(writes, [])
+
+    def test_query_count_does_not_grow_with_question_count(self):
+        warm_memberships(self.teacher)
+        def queries_for(count):
+            items = [{'question_text': f'Q{i}', 'question_type': 'written', 'correct_answers': ['x']}
+                     for i in range(count)]
+            with CaptureQueriesContext(connection) as context:
+                self.client.patch(self.url, {'questions': items}, format='json')
+            return len(context.captured_queries)
+
+        self.assertEqual(queries_for(2), queries_for(40))
+
+    def test_new_question_uncompletes_module(self):
+        submit_module(self.student, self.module)
+        items = self.current() + [{'question_text': 'Extra', 'question_type': 'written'}]
+        self.client.patch(self.url, {'questions': items}, format='json')
+        progress = UserModuleProgress.objects.get(user=self.student, module=self.module)
+        self.assertEqual((progress.answered_count, progress.is_completed), (3, False))
+
+    def test_invalid_list_changes_nothing(self):
+        other = make_module(self.course, 2, questions=1).question_set.get()
+        bad_lists = [
+            [{'question_text': 'No type'}],
+            self.current() + [{'id': other.id}],
+            self.current() + [self.current()[0]],
+        ]
+        for items in bad_lists:
+            response = self.client.patch(self.url, {'questions': items}, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Question.objects.filter(module=self.module).count(), 3)
+
+    def test_posted_module_keeps_its_questions(self):
+        self.module.is_posted = True
+        self.module.save()
+        submit_module(self.student, self.module)
+        response = self.client.patch(self.url, {'questions': self.current()[:2]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Submission.objects.filter(module=self.module).count(), 3)
+
+    def test_students_cannot_edit(self):
+        response = client_for(self.student).patch(self.url, {'questions': []}, format='json')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import CourseToStudents, CourseToTeachers, User, UserInvite
+from .helpers import client_for, make_course, make_user, warm_memberships
+
+
+class RosterImportTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.course = make_course(teacher=self.teacher)
+        self.url = f'/api/courses/{self.course.id}/roster/'
+        self.client = client_for(self.teacher)
+
+    def post_csv(self, body):
+        return self.client.post(self.url, body.encode(), content_type='text/csv')
+
+    def test_csv_roster_creates_and_enrolls_users(self):
+        response = self.post_csv(
+            'Email,First_Name,Last_Name,Role\n'
+            'Ada@Example.com,Ada,Lovelace,student\n'
+            'grace@example.com,Grace,Hopper,teacher\n'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['summary'], {
+            'rows': 2, 'created': 2, 'enrolled': 0, 'already_enrolled': 0, 'error': 0
+        })
+
+        ada = User.objects.get(email='ada@example.com')
+        self.assertEqual((ada.username, ada.first_name, ada.isStudent), ('ada@example.com', 'Ada', True))
+        self.assertFalse(ada.has_usable_password())
+        self.assertTrue(CourseToStudents.objects.filter(course=self.course, user=ada).exists())
+        grace = User.objects.get(email='grace@example.com')
+        self.assertTrue(CourseToTeachers.objects.filter(course=self.course, user=grace).exists())
+
+        row = response.data['rows'][0]
+        self.assertEqual((row['status'], row['user_id']), ('created', ada.id))
+        self.assertNotEqual(UserInvite.objects.get(user=ada).token_hash, row['invite_token'])
+
+    def test_json_rows_and_existing_users(self):
+        enrolled = make_user('enrolled@odaap.com')
+        CourseToStudents.objects.create(course=self.course, user=enrolled)
+        existing = make_user('Existing@odaap.com')
+        response = self.client.post(self.url, {'rows': [
+            {'email': 'enrolled@odaap.com'},
+            {'email': 'existing@odaap.com'},
+            {'email': 'teacher@odaap.com', 'role': 'student'},
+            {'email': 'not-an-email'},
+            {'email': 'new@odaap.com', 'role': 'admin'},
+            {'email': 'EXISTING@odaap.com'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            [row['status'] for row in response.data['rows']],
+            ['already_enrolled', 'enrolled', 'error', 'error', 'error', 'error']
+        )
+        self.assertEqual(response.data['rows'][2]['error'], 'Existing account is a teacher')
+        self.assertEqual(response.data['rows'][5]['error'], 'Duplicate email in roster')
+        self.assertTrue(CourseToStudents.objects.filter(course=self.course, user=existing).exists())
+        self.assertFalse(CourseToStudents.objects.filter(course=self.course, user=self.teacher).exists())
+        self.assertFalse(UserInvite.objects.exists())
+
+    def test_multipart_file_and_reimport(self):
+        body = b'email\nbob@example.com\n'
+        response = self.client.post(
+            self.url, {'roster': SimpleUploadedFile('roster.csv', body, 'text/csv')}, format='multipart'
+        )
+        self.assertEqual(response.data['summary']['created'], 1)
+
+        again = self.client.post(
+            self.url, {'roster': SimpleUploadedFile('roster.csv', body, 'text/csv')}, format='multipart'
+        )
+        self.assertEqual(again.data['summary']['already_enrolled'], 1)
+        self.assertEqual(User.objects.filter(email='bob@example.com').count(), 1)
+
+    def test_query_count_does_not_grow_with_roster_size(self):
+        warm_memberships(self.teacher)
+        def queries_for(count, prefix):
+            body = 'email\n' + ''.join(f'{prefix}{i}@example.com\n' for i in range(count))
+            with CaptureQueriesContext(connection) as context:
+                response = self.post_csv(body)
+            self.assertEqual(response.data['summary']['created'], count)
+            return len(context.captured_queries)
+
+        self.assertEqual(queries_for(5, 'small'), queries_for(200, 'large'))
+
+    def test_rejects_bad_rosters(self):
+        self.assertEqual(self.post_csv('name\nAda\n').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'rows': 'nope'}, format='json').status_code, 400)
+        with self.settings(ROSTER_MAX_ROWS=2):
+            response = self.post_csv('email\na@example.com\nb@example.com\nc@example.com\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(email='a@example.com').exists())
+
+    def test_only_teachers_of_the_course_can_import(self):
+        student = make_user('student@odaap.com')
+        CourseToStudents.objects.create(course=self.course, user=student)
+        other_teacher = make_user('other@odaap.com', isStudent=False)
+        for user in (student, other_teacher):
+            response = client_for(user).post(self.url, {'rows': [{'email': 'x@example.com'}]}, format='json')
+            self.assertIn(response.status_code, (403, 404))
+        self.assertFalse(User.objects.filter(email='x@example.com').exists())
+
+
+class AcceptInviteTests(TestCase):
+    def setUp(self):
+        teacher = make_user('teacher@odaap.com', isStudent=False)
+        course = make_course(teacher=teacher)
+        response = client_for(teacher).post(
+            f'/api/courses/{course.id}/roster/', {'rows': [{'email': 'ada@example.com'}]}, format='json'
+        )
+        self.token = response.data['rows'][0]['invite_token']
+
+    def test_accepting_sets_password_once(self):
+        response = self.client.post(
+            '/api/invites/accept/', {'token': self.token, 'password': 'analytical-engine'}
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertIn('access', response.data)
+        self.assertTrue(User.objects.get(email='ada@example.com').check_password('analytical-engine'))
+
+        again = self.client.post('/api/invites/accept/', {'token': self.token, 'password': 'other'})
+        self.assertEqual(again.status_code, 400)
+
+    def test_expired_invite_is_rejected(self):
+        UserInvite.objects.update(created_at=timezone.now() - timedelta(days=30))
+        response = self.client.post('/api/invites/accept/', {'token': self.token, 'password': 'pw'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.get(email='ada@example.com').has_usable_password())
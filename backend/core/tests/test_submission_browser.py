@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.grading import apply_question_grade
+from core.models import Submission
+from .helpers import client_for, make_course, make_module, make_user, warm_memberships
+
+
+class CourseSubmissionBrowserTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teacher@odaap.com', isStudent=False)
+        self.ada = make_user('ada@odaap.com')
+        self.bob = make_user('bob@odaap.com')
+        self.course = make_course(teacher=self.teacher, students=[self.ada, self.bob])
+        self.module = make_module(self.course, 1, questions=2, due_date=timezone.now() - timedelta(days=1))
+        self.later = make_module(self.course, 2, questions=1)
+        self.q1, self.q2 = self.module.question_set.order_by('question_order')
+        self.q3 = self.later.question_set.get()
+        self.url = f'/api/courses/{self.course.id}/submissions/'
+        self.client = client_for(self.teacher)
+
+    def submit(self, user, question, response='answer', submission_type='written', **kwargs):
+        return Submission.objects.create(
+            user=user, module=question.module, question=question,
+            submission_type=submission_type, submission_response=response, **kwargs
+        )
+
+    def ids(self, query=''):
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, 200, response.data)
+        return {row['id'] for row in response.data['results']}
+
+    def test_lists_previews_without_loading_bodies(self):
+        essay = self.submit(self.ada, self.q1, response='x' * 5000)
+        self.submit(self.bob, self.q1, response='short')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        listing = context.captured_queries[-1]['sql']
+        # The body is only read through the preview SUBSTRING
+        self.assertEqual(listing.count('"core_submission"."submission_response"'), 1)
+        self.assertIn('SUBSTRING("core_submission"."submission_response", 1, 201)', listing)
+
+        rows = {row['id']: row for row in response.data['results']}
+        self.assertEqual(len(rows[essay.id]['response_preview']), 200)
+        self.assertTrue(rows[essay.id]['response_truncated'])
+        self.assertEqual(rows[essay.id]['user_name'], self.ada.get_full_name())
+        self.assertTrue(rows[essay.id]['url'].endswith(f'/api/submissions/{essay.id}/'))
+        self.assertNotIn('submission_response', rows[essay.id])
+
+    def test_query_count_is_constant(self):
+        warm_memberships(self.teacher)
+        self.submit(self.ada, self.q1)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        before = len(context.captured_queries)
+        for question in (self.q2, self.q3):
+            self.submit(self.ada, question)
+            self.submit(self.bob, question)
+        with self.assertNumQueries(before):
+            self.client.get(self.url)
+
+    def test_filters(self):
+        now = timezone.now()
+        late = self.submit(self.ada, self.q1, time_submitted=now)
+        early = self.submit(self.bob, self.q1, time_submitted=now - timedelta(days=3))
+        video = self.submit(self.bob, self.q2, submission_type='video', time_submitted=now - timedelta(days=3))
+        other = self.submit(self.ada, self.q3)
+        apply_question_grade(self.q1, self.bob, 5, 10)
+
+        self.assertEqual(self.ids(), {late.id, early.id, video.id, other.id})
+        self.assertEqual(self.ids(f'?module_id={self.later.id}'), {other.id})
+        self.assertEqual(self.ids(f'?question_id={self.q1.id}'), {late.id, early.id})
+        self.assertEqual(self.ids(f'?student_id={self.bob.id}'), {early.id, video.id})
+        self.assertEqual(self.ids('?type=video'), {video.id})
+        self.assertEqual(self.ids('?ungraded=true'), {late.id, video.id, other.id})
+        self.assertEqual(self.ids('?overdue=true'), {late.id})
+        self.assertEqual(self.client.get(self.url + '?module_id=abc').status_code, 400)
+
+    def test_inline_media_is_not_previewed(self):
+        legacy = self.submit(self.ada, self.q2, response='data:audio/webm;base64,' + 'A' * 400, submission_type='audio')
+        row = self.client.get(self.url).data['results'][0]
+        self.assertEqual((row['id'], row['response_preview'], row['has_media']), (legacy.id, '', True))
+
+    def test_teacher_can_open_and_grade_listed_submission(self):
+        submission = self.submit(self.ada, self.q1, response='full answer')
+        detail = self.client.get(f'/api/submissions/{submission.id}/')
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.data['submission_response'], 'full answer')
+        graded = self.client.post(f'/api/submissions/{submission.id}/grade/', {'score': 7}, format='json')
+        self.assertEqual(graded.status_code, 200)
+
+        outsider = make_user('outsider@odaap.com', isStudent=False)
+        self.assertEqual(client_for(outsider).get(f'/api/submissions/{submission.id}/').status_code, 404)
+
+    def test_only_course_teachers_can_browse(self):
+        self.assertEqual(client_for(self.ada).get(self.url).status_code, 403)
+        outsider = make_user('outsider@odaap.com', isStudent=False)
+        self.assertEqual(client_for(outsider).get(self.url).status_code, 404)
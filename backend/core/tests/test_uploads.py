@@ -0,0 +1,160 @@
+import hashlib
+import shutil
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from core.models import MediaUpload, Submission, UserModuleProgress
+from .helpers import client_for, make_course, make_module, make_user
+
+MEDIA_ROOT = tempfile.mkdtemp()
+UPLOAD_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    MEDIA_UPLOAD_TEMP_DIR=UPLOAD_DIR,
+    MEDIA_UPLOAD_MIN_CHUNK_SIZE=1024,
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
+)
+class ChunkedUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(UPLOAD_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.student = make_user('student@odaap.com')
+        self.course = make_course(students=[self.student])
+        self.module = make_module(self.course, 1, questions=1)
+        self.question = self.module.question_set.get()
+        self.question.question_type = 'video'
+        self.question.save()
+        self.client = client_for(self.student)
+        self.payload = bytes(range(256)) * 40  # 10240 bytes
+        self.chunk_size = 4096
+
+    def initiate(self, **overrides):
+        data = {
+            'question_id': self.question.id,
+            'content_type': 'video/mp4',
+            'total_size': len(self.payload),
+            'chunk_size': self.chunk_size,
+            **overrides
+        }
+        return self.client.post('/api/uploads/', data, format='json')
+
+    def put_chunk(self, upload_id, index, body=None):
+        if body is None:
+            body = self.payload[index * self.chunk_size:(index + 1) * self.chunk_size]
+        return self.client.put(
+            f'/api/uploads/{upload_id}/chunks/{index}/', body,
+            content_type='application/octet-stream'
+        )
+
+    def test_resumable_upload_round_trip(self):
+        response = self.initiate()
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.data['id']
+        self.assertEqual(response.data['total_chunks'], 3)
+
+        # Out of order, with a retry of the same chunk
+        self.assertEqual(self.put_chunk(upload_id, 2).status_code, 200)
+        self.assertEqual(self.put_chunk(upload_id, 0).status_code, 200)
+        self.assertEqual(self.put_chunk(upload_id, 0).status_code, 200)
+
+        state = self.client.get(f'/api/uploads/{upload_id}/').data
+        self.assertEqual(
+            state['received'],
+            [{'index': 0, 'offset': 0, 'size': 4096}, {'index': 2, 'offset': 8192, 'size': 2048}]
+        )
+        self.assertEqual(state['received_bytes'], 6144)
+
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 400)
+
+        self.put_chunk(upload_id, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['media_size'], len(self.payload))
+
+        submission = Submission.objects.get()
+        self.assertEqual(submission.media_checksum, hashlib.sha256(self.payload).hexdigest())
+        with default_storage.open(submission.media_key) as stored:
+            self.assertEqual(stored.read(), self.payload)
+        self.assertTrue(UserModuleProgress.objects.get(user=self.student).is_completed)
+        self.assertEqual(MediaUpload.objects.get().submission, submission)
+
+        # Completing twice is harmless
+        again = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(again.data['id'], submission.id)
+        self.assertEqual(Submission.objects.count(), 1)
+
+    def test_completion_replaces_existing_submission_media(self):
+        first = self.initiate(total_size=100, chunk_size=100).data['id']
+        self.put_chunk(first, 0, b'a' * 100)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/uploads/{first}/complete/')
+        old_key = Submission.objects.get().media_key
+
+        second = self.initiate(total_size=50, chunk_size=100).data['id']
+        self.put_chunk(second, 0, b'b' * 50)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/uploads/{second}/complete/')
+
+        submission = Submission.objects.get()
+        self.assertEqual(submission.media_size, 50)
+        self.assertFalse(default_storage.exists(old_key))
+
+    def test_chunk_size_is_enforced(self):
+        upload_id = self.initiate().data['id']
+        self.assertEqual(self.put_chunk(upload_id, 0, b'x' * 10).status_code, 400)
+        self.assertEqual(self.put_chunk(upload_id, 0, b'x' * 5000).status_code, 400)
+        self.assertEqual(self.put_chunk(upload_id, 3, b'x').status_code, 400)
+        self.assertEqual(self.client.get(f'/api/uploads/{upload_id}/').data['received'], [])
+
+    def test_validation_and_ownership(self):
+        self.assertEqual(self.initiate(content_type='text/plain').status_code, 400)
+        self.assertEqual(self.initiate(total_size=0).status_code, 400)
+
+        upload_id = self.initiate().data['id']
+        other = client_for(make_user('other@odaap.com'))
+        self.assertEqual(other.get(f'/api/uploads/{upload_id}/').status_code, 404)
+
+        outsider_course = make_course()
+        outsider_question = make_module(outsider_course, 1, questions=1).question_set.get()
+        self.assertEqual(self.initiate(question_id=outsider_question.id).status_code, 403)
+
+    def test_chunks_have_a_minimum_size(self):
+        self.assertEqual(self.initiate(chunk_size=1000).status_code, 400)
+        # Unless the whole upload fits in the one, last chunk
+        self.assertEqual(self.initiate(total_size=100, chunk_size=100).status_code, 201)
+        self.assertEqual(self.initiate(total_size=100, chunk_size=50).status_code, 400)
+
+    def test_only_audio_and_video_questions(self):
+        self.question.question_type = 'written'
+        self.question.save()
+        self.assertEqual(self.initiate().status_code, 400)
+        self.assertFalse(MediaUpload.objects.exists())
+
+    def test_completing_after_submission_was_deleted(self):
+        upload_id = self.initiate(total_size=100, chunk_size=100).data['id']
+        self.put_chunk(upload_id, 0, b'a' * 100)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/uploads/{upload_id}/complete/')
+        Submission.objects.all().delete()
+
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_abort(self):
+        upload_id = self.initiate().data['id']
+        self.put_chunk(upload_id, 0)
+        self.assertEqual(self.client.delete(f'/api/uploads/{upload_id}/').status_code, 204)
+        self.assertFalse(MediaUpload.objects.exists())
@@ -0,0 +1,172 @@
+"""
+Resumable chunked uploads for large audio/video answers.
+
+A client initiates an upload for a question, PUTs numbered chunks in any
+order (re-sending a chunk overwrites it), asks which chunks have arrived,
+and finally completes the upload. Chunk bodies are streamed to files under
+MEDIA_UPLOAD_TEMP_DIR in CHUNK_SIZE pieces, so a worker holds at most one
+buffer per request no matter how large the recording is. Completion copies
+the chunks into the default storage backend and attaches the result to the
+student's submission in one transaction.
+"""
+import math
+import os
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .media import CHUNK_SIZE, delete_media, store_media
+from .models import MediaUpload, MediaUploadChunk, Submission, UploadStatus
+from .progress import refresh_user_progress
+from .submissions import save_submissions
+
+
+class UploadError(ValueError):
+    pass
+
+
+def total_chunks(upload):
+    return max(1, math.ceil(upload.total_size / upload.chunk_size))
+
+
+def expected_chunk_size(upload, index):
+    count = total_chunks(upload)
+    if index < 0 or index >= count:
+        raise UploadError(f'Chunk index must be between 0 and {count - 1}')
+    if index == count - 1:
+        return upload.total_size - upload.chunk_size * (count - 1)
+    return upload.chunk_size
+
+
+def chunk_dir(upload):
+    return Path(settings.MEDIA_UPLOAD_TEMP_DIR) / str(upload.id)
+
+
+def chunk_path(upload, index):
+    return chunk_dir(upload) / f'{index:06d}.part'
+
+
+def write_chunk(upload, index, stream):
+    """Stream one chunk body to disk and record it. Returns the chunk size."""
+    if upload.status != UploadStatus.PENDING:
+        raise UploadError('Upload is already completed')
+    expected = expected_chunk_size(upload, index)
+
+    path = chunk_path(upload, index)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix('.tmp')
+    size = 0
+    try:
+        with open(partial, 'wb') as out:
+            while True:
+                piece = stream.read(CHUNK_SIZE)
+                if not piece:
+                    break
+                size += len(piece)
+                if size > expected:
+                    raise UploadError(f'Chunk {index} must be {expected} bytes')
+                out.write(piece)
+        if size != expected:
+            raise UploadError(f'Chunk {index} must be {expected} bytes, got {size}')
+        # Readers never see a half-written chunk
+        os.replace(partial, path)
+    finally:
+        if partial.exists():
+            partial.unlink()
+
+    MediaUploadChunk.objects.update_or_create(
+        upload=upload, index=index, defaults={'size': size}
+    )
+    return size
+
+
+def received_chunks(upload):
+    """[(index, offset, size)] for every chunk stored so far"""
+    return [
+        (index, index * upload.chunk_size, size)
+        for index, size in upload.chunks.order_by('index').values_list('index', 'size')
+    ]
+
+
+class ChunkReader:
+    """Read a list of chunk files back as one stream"""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.current = None
+
+    def read(self, size=CHUNK_SIZE):
+        while True:
+            if self.current is None:
+                if not self.paths:
+                    return b''
+                self.current = open(self.paths.pop(0), 'rb')
+            data = self.current.read(size)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+
+
+def complete_upload(upload_id, user):
+    """
+    Assemble an upload into file storage and save it as the user's
+    submission for the question, replacing any earlier answer. Completing an
+    already completed upload returns the same submission.
+    """
+    with transaction.atomic():
+        upload = (
+            MediaUpload.objects.select_for_update()
+            .select_related('question')
+            .get(id=upload_id, user=user)
+        )
+        if upload.status == UploadStatus.COMPLETED:
+            if upload.submission is None:
+                raise UploadError('The submission made from this upload has been deleted')
+            return upload.submission
+
+        count = total_chunks(upload)
+        received = dict(upload.chunks.values_list('index', 'size'))
+        missing = [index for index in range(count) if index not in received]
+        if missing:
+            raise UploadError(f'Missing chunks: {missing[:20]}')
+
+        reader = ChunkReader(chunk_path(upload, index) for index in range(count))
+        try:
+            stored = store_media(reader, upload.content_type, user.id, upload.question_id)
+        finally:
+            reader.close()
+
+        try:
+            question = upload.question
+            submission = Submission(
+                user=user,
+                module_id=question.module_id,
+                question=question,
+                submission_type=question.question_type,
+                **stored.as_fields()
+            )
+            save_submissions([submission])
+            refresh_user_progress(user.id, question.module_id)
+
+            upload.status = UploadStatus.COMPLETED
+            upload.submission = submission
+            upload.completed_at = timezone.now()
+            upload.save(update_fields=['status', 'submission', 'completed_at'])
+        except Exception:
+            delete_media(stored.key)
+            raise
+
+        transaction.on_commit(lambda: discard_chunks(upload))
+    return submission
+
+
+def discard_chunks(upload):
+    shutil.rmtree(chunk_dir(upload), ignore_errors=True)
@@ -1,19 +1,55 @@
-from rest_framework import viewsets, status
+import csv
+import hashlib
+import io
+
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.http import Http404
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import RefreshToken
 from .models import (
-    Course, CourseToStudents, CourseToTeachers, Module, Question, 
-    Submission, UserQuestionGrade, QuestionToCorrectAnswers, User
+    Course, CourseToStudents, CourseToTeachers, MediaUpload, Module, Question, 
+    QuestionType, QueuedSubmission, Submission, UserModuleGrade, UserModuleProgress, UserQuestionGrade,
+    QuestionToCorrectAnswers, User
+)
+from .authentication import issue_tokens
+from .cloning import clone_course, clone_module
+from .conditional import conditional
+from .content_cache import cached
+from .grading import apply_question_grade, apply_submission_grades, rebuild_rollups
+from .grading_queue import claim_next, release_claim
+from .membership import (
+    TEACHER, IsCourseTeacher, course_ids, is_course_student, is_course_teacher
+)
+from .autograde import autograde_submissions, regrade_questions
+from .media import (
+    MEDIA_TYPES, NO_MEDIA, InvalidMedia, delete_media, media_from_request, parse_data_url, store_media
+)
+from .idempotency import idempotent
+from .ingestion import enqueue_submission
+from .submissions import answer_of, reopen_for_grading, save_submissions
+from .progress import (
+    has_incomplete_previous_modules, is_module_completed,
+    refresh_module_progress, refresh_progress_for, refresh_user_progress
 )
+from .pagination import KeysetPagination
+from .questions import QuestionListError, apply_question_list
+from .roster import RosterError, import_roster, read_csv, accept_invite as accept_roster_invite
+from .streaming import check_media_token, media_response
 from .serializers import (
-    CourseSerializer, ModuleSerializer, QuestionSerializer, 
-    SubmissionSerializer, UserSerializer
+    CourseSerializer, ModuleSerializer, QuestionSerializer, StudentQuestionSerializer,
+    SubmissionSerializer, SubmissionPreviewSerializer, UserSerializer, ModuleDashboardSerializer, MediaUploadSerializer,
+    BatchSubmissionItemSerializer, BulkGradeItemSerializer, BulkQuestionItemSerializer, CloneCourseSerializer, CloneModuleSerializer,
+    QueuedSubmissionSerializer
+)
+from .uploads import (
+    UploadError, complete_upload, discard_chunks, received_chunks, total_chunks, write_chunk
 )
 
 User = get_user_model()
@@ -58,7 +94,7 @@ def register(request):
     )
     
     # Generate tokens
-    refresh = RefreshToken.for_user(user)
+    refresh = issue_tokens(user)
     
     return Response({
         'access': str(refresh.access_token),
@@ -72,6 +108,41 @@ def register(request):
         }
     }, status=status.HTTP_201_CREATED)
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def accept_invite(request):
+    """
+    POST /api/invites/accept/
+    Set the password of an account created by a roster import
+    """
+    token = request.data.get('token')
+    password = request.data.get('password')
+
+    if not all([token, password]):
+        return Response(
+            {'error': 'token and password are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        user = accept_roster_invite(token, password)
+    except RosterError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    refresh = issue_tokens(user)
+
+    return Response({
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+        'user': {
+            'id': user.id,
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'isStudent': user.isStudent,
+        }
+    }, status=status.HTTP_200_OK)
+
 # ============================================================================
 # COURSE VIEWSET
 # ============================================================================
@@ -82,11 +153,29 @@ class CourseViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Get courses the user is enrolled in"""
-        user = self.request.user
-        if user.isStudent:
-            return Course.objects.filter(coursetostudents__user=user).distinct()
-        else:
-            return Course.objects.filter(coursetoteachers__user=user).distinct()
+        return Course.objects.filter(id__in=course_ids(self.request))
+
+    def list(self, request, *args, **kwargs):
+        """
+        GET /api/courses/
+        Revalidated by ETag over the user's courses and when they last changed
+        """
+        last_updated = self.get_queryset().aggregate(last_updated=Max('updated_at'))['last_updated']
+        return conditional(
+            request, ('courses', sorted(course_ids(request)), last_updated),
+            lambda: super(CourseViewSet, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        GET /api/courses/{course_id}/
+        Revalidated by ETag from course.updated_at
+        """
+        course = self.get_object()
+        return conditional(
+            request, ('course', course.id, course.updated_at),
+            lambda: Response(self.get_serializer(course).data)
+        )
     
     @action(detail=False, methods=['get'], url_path='userid=(?P<user_id>[^/.]+)')
     def get_all_enrolled_courses(self, request, user_id=None):
@@ -203,6 +292,68 @@ class CourseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    @action(detail=True, methods=['post'], url_path='roster')
+    def import_course_roster(self, request, pk=None):
+        """
+        POST /api/courses/{course_id}/roster
+        Create and enroll many users at once. Takes a CSV body (text/csv),
+        a multipart "roster" CSV file, or JSON rows; each row has email and
+        optional first_name, last_name and role ("student" or "teacher").
+        Returns a per-row report; rows with errors are skipped.
+        Only teachers of the course can import a roster.
+        """
+        course = self.get_object()
+        user = request.user
+        if user.isStudent or not is_course_teacher(request, course.id):
+            return Response(
+                {"error": "Only teachers of this course can import a roster"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            if request.content_type.startswith('text/csv'):
+                rows = read_csv(request.stream or io.BytesIO())
+            elif 'roster' in request.FILES:
+                rows = read_csv(request.FILES['roster'])
+            else:
+                rows = request.data.get('rows') if isinstance(request.data, dict) else request.data
+                if not isinstance(rows, list):
+                    raise RosterError('Send a CSV roster or a JSON list of rows')
+            report = import_roster(course, rows)
+        except (RosterError, UnicodeDecodeError, csv.Error) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], url_path='clone')
+    def duplicate_course(self, request, pk=None):
+        """
+        POST /api/courses/{course_id}/clone
+        Copy a course with all its modules, questions and answer keys, e.g.
+        for a new term. The caller becomes the copy's teacher; students and
+        submissions are not copied. Only teachers of the course can clone it.
+        """
+        course = self.get_object()
+        user = request.user
+        if user.isStudent or not is_course_teacher(request, course.id):
+            return Response(
+                {"error": "Only teachers of this course can clone it"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        options = CloneCourseSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+        copy, module_count, question_count = clone_course(
+            course,
+            course_name=options.validated_data.get('course_name'),
+            reset_schedule=options.validated_data['reset_schedule'],
+            teachers=[user]
+        )
+        return Response({
+            "course": CourseSerializer(copy).data,
+            "module_count": module_count,
+            "question_count": question_count
+        }, status=status.HTTP_201_CREATED)
+    
     @action(detail=True, methods=['put', 'patch'], url_path='zoom')
     def edit_course_zoom_link(self, request, pk=None):
         """
@@ -235,8 +386,7 @@ class CourseViewSet(viewsets.ModelViewSet):
                 )
             
             # Verify user is a teacher of this course
-            is_teacher = CourseToTeachers.objects.filter(course=course, user=user).exists()
-            if not is_teacher:
+            if not is_course_teacher(request, course.id):
                 return Response(
                     {"error": "You are not a teacher of this course"},
                     status=status.HTTP_403_FORBIDDEN
@@ -294,25 +444,83 @@ class CourseViewSet(viewsets.ModelViewSet):
         Get all modules for a specific course
         """
         course = self.get_object()
-        modules = Module.objects.filter(course=course).order_by('module_order')
-        serializer = ModuleSerializer(modules, many=True)
-        return Response(serializer.data)
+
+        def serialize():
+            modules = Module.objects.filter(course=course).select_related('course').order_by('module_order')
+            return ModuleSerializer(modules, many=True).data
+
+        return conditional(
+            request, ('course-modules', course.id, course.updated_at, course.content_updated_at),
+            lambda: Response(cached(
+                'course-modules', course.id, (course.updated_at, course.content_updated_at), 'all', serialize
+            ))
+        )
+    
+    @action(detail=True, methods=['get'], url_path='dashboard')
+    def get_course_dashboard(self, request, pk=None):
+        """
+        GET /api/courses/{course_id}/dashboard/
+        Get every module in a course together with the caller's progress.
+        Uses a fixed number of aggregate queries regardless of module count.
+        """
+        course = self.get_object()
+        user = request.user
+
+        modules = list(
+            Module.objects.filter(course=course)
+            .select_related('course')
+            .annotate(question_count=Count('question'))
+            .order_by('module_order')
+        )
+
+        # Completion is read from UserModuleProgress, the same rows the
+        # access checks use, so the dashboard cannot disagree with them
+        progress = {
+            row['module_id']: row
+            for row in UserModuleProgress.objects.filter(user=user, module__course=course)
+            .values('module_id', 'answered_count', 'is_completed')
+        }
+
+        grade_totals = {
+            row['module_id']: row
+            for row in UserModuleGrade.objects.filter(user=user, module__course=course)
+            .values('module_id', 'score', 'total')
+        }
+
+        # Same rule as _is_module_accessible, evaluated in memory: a module
+        # unlocks once every earlier posted module is done
+        previous_completed = True
+        for module in modules:
+            counts = progress.get(module.id, {})
+            module.answered_count = counts.get('answered_count', 0)
+            # One submission per question (unique_user_question_submission)
+            module.submission_count = module.answered_count
+            grades = grade_totals.get(module.id, {})
+            module.grade_score = grades.get('score')
+            module.grade_total = grades.get('total')
+            if user.isStudent:
+                module.is_completed = counts.get('is_completed', False)
+                module.is_accessible = module.is_posted and previous_completed
+                if module.is_posted and not module.is_completed:
+                    previous_completed = False
+            else:
+                # Teachers can always access modules
+                module.is_completed = False
+                module.is_accessible = True
+
+        return Response({
+            'course': CourseSerializer(course).data,
+            'modules': ModuleDashboardSerializer(modules, many=True).data
+        })
     
-    @action(detail=True, methods=['get'], url_path='students')
+    @action(detail=True, methods=['get'], url_path='students', permission_classes=[IsAuthenticated, IsCourseTeacher])
     def get_course_students(self, request, pk=None):
         """
         GET /api/courses/{course_id}/students/
-        Get all students enrolled in a course
+        Get all students enrolled in a course. Only teachers of the course
+        can list them.
         """
         course = self.get_object()
-        # Verify user is a teacher for this course
-        user = request.user
-        if not CourseToTeachers.objects.filter(course=course, user=user).exists():
-            return Response(
-                {"error": "You don't have access to this course"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         students = User.objects.filter(
             coursetostudents__course=course
         ).distinct()
@@ -334,6 +542,120 @@ class CourseViewSet(viewsets.ModelViewSet):
         serializer = UserSerializer(teachers, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='submissions')
+    def get_course_submissions(self, request, pk=None):
+        """
+        GET /api/courses/{course_id}/submissions/
+        Browse students' submissions in a course, newest first. Filters:
+        module_id, question_id, student_id, type, ungraded=true and
+        overdue=true (submitted after the module's due date). Answers are
+        listed as previews; each row links to the full submission.
+        Only teachers of the course can browse its submissions.
+        """
+        course = self.get_object()
+        user = request.user
+        if user.isStudent or not is_course_teacher(request, course.id):
+            return Response(
+                {"error": "Only teachers of this course can browse its submissions"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        params = request.query_params
+        submissions = Submission.objects.filter(module__course_id=course.id)
+        try:
+            for param, field in (('module_id', 'module_id'), ('question_id', 'question_id'), ('student_id', 'user_id')):
+                if params.get(param):
+                    submissions = submissions.filter(**{field: int(params[param])})
+        except ValueError:
+            return Response(
+                {"error": "module_id, question_id and student_id must be integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if params.get('type'):
+            submissions = submissions.filter(submission_type=params['type'])
+        if params.get('ungraded', '').lower() in ('1', 'true', 'yes'):
+            submissions = submissions.filter(is_graded=False)
+        if params.get('overdue', '').lower() in ('1', 'true', 'yes'):
+            submissions = submissions.filter(time_submitted__gt=F('module__due_date'))
+        
+        # Find the page on the narrow key columns, then load only its rows
+        paginator = KeysetPagination()
+        paginator.ordering = ('-time_submitted', '-id')
+        keys = paginator.paginate_queryset(submissions.only('id', 'time_submitted'), request, view=self)
+        rows = (
+            Submission.objects.with_grade()
+            .with_preview(SubmissionPreviewSerializer.PREVIEW_LENGTH)
+            .in_bulk([key.id for key in keys])
+        )
+        page = [rows[key.id] for key in keys]
+        serializer = SubmissionPreviewSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['post'], url_path='grading/next')
+    def claim_next_submission(self, request, pk=None):
+        """
+        POST /api/courses/{course_id}/grading/next/
+        Claim the oldest ungraded submission in the course (optionally
+        {"module_id": 1}) for the caller to grade. Concurrent graders get
+        different submissions; a claim lapses after GRADING_CLAIM_TTL
+        seconds. Returns 204 when there is nothing left to grade.
+        """
+        course = self.get_object()
+        user = request.user
+        if user.isStudent or not is_course_teacher(request, course.id):
+            return Response(
+                {"error": "Only teachers of this course can grade its submissions"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        module_id = request.data.get('module_id')
+        if module_id is not None:
+            try:
+                module_id = int(module_id)
+            except (TypeError, ValueError):
+                return Response(
+                    {"error": "module_id must be an integer"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        claimed = claim_next(course, user, module_id)
+        if claimed is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        submission = Submission.objects.with_grade().get(id=claimed.id)
+        return Response({
+            "submission": SubmissionSerializer(submission, context={'request': request}).data,
+            "claim_expires_at": claimed.claim_expires_at
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], url_path='grading/release')
+    def release_claimed_submission(self, request, pk=None):
+        """
+        POST /api/courses/{course_id}/grading/release/
+        Put a submission the caller claimed back in the grading queue
+        ({"submission_id": 1}) without grading it.
+        """
+        course = self.get_object()
+        submission_id = request.data.get('submission_id')
+        if submission_id is None:
+            return Response(
+                {"error": "submission_id is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            submission_id = int(submission_id)
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "submission_id must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not release_claim(submission_id, request.user, course):
+            return Response(
+                {"error": "You do not hold a claim on this submission"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({"message": "Submission returned to the grading queue"}, status=status.HTTP_200_OK)
+
 # ============================================================================
 # MODULE VIEWSET
 # ============================================================================
@@ -341,33 +663,54 @@ class CourseViewSet(viewsets.ModelViewSet):
 class ModuleViewSet(viewsets.ModelViewSet):
     serializer_class = ModuleSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ('module_order', 'id')
 
     def get_queryset(self):
         """Get modules filtered by course_id from query parameter"""
-        queryset = Module.objects.all()
+        queryset = Module.objects.select_related('course').filter(course_id__in=course_ids(self.request))
         course_id = self.request.query_params.get('course_id', None)
         
         if course_id:
-            user = self.request.user
-            if user.isStudent:
-                user_courses = Course.objects.filter(coursetostudents__user=user)
-            else:
-                user_courses = Course.objects.filter(coursetoteachers__user=user)
-            
-            if user_courses.filter(id=course_id).exists():
-                queryset = queryset.filter(course_id=course_id)
-            else:
-                return Module.objects.none()
-        else:
-            user = self.request.user
-            if user.isStudent:
-                user_courses = Course.objects.filter(coursetostudents__user=user)
-            else:
-                user_courses = Course.objects.filter(coursetoteachers__user=user)
-            queryset = queryset.filter(course__in=user_courses)
+            queryset = queryset.filter(course_id=course_id)
         
         return queryset.order_by('module_order')
-    
+
+    def list(self, request, *args, **kwargs):
+        """
+        GET /api/modules/?course_id={id}
+        Revalidated by ETag over when the listed modules and their courses last changed
+        """
+        versions = self.get_queryset().aggregate(
+            count=Count('id'),
+            updated=Max('updated_at'),
+            course_updated=Max('course__updated_at'),
+            content_updated=Max('course__content_updated_at'),
+        )
+        return conditional(
+            request, ('modules', sorted(versions.items()), request.get_full_path()),
+            lambda: super(ModuleViewSet, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        GET /api/modules/{module_id}/
+        Revalidated by ETag from the module's and its course's updated_at
+        """
+        module = self.get_object()
+        return conditional(
+            request, ('module', module.id, module.updated_at, module.course.updated_at),
+            lambda: Response(self.get_serializer(module).data),
+            published=request.user.isStudent and module.is_posted
+        )
+
+    def perform_destroy(self, instance):
+        course_id = instance.course_id
+        with transaction.atomic():
+            instance.delete()
+            # The module's grades were cascade-deleted with it
+            rebuild_rollups(course_ids=[course_id])
+
     @action(detail=True, methods=['get'], url_path='questions')
     def get_all_questions(self, request, pk=None):
         """
@@ -379,10 +722,7 @@ class ModuleViewSet(viewsets.ModelViewSet):
         # Verify user has access to this module's course
         user = self.request.user
         if user.isStudent:
-            has_access = CourseToStudents.objects.filter(
-                course=module.course, user=user
-            ).exists()
-            if not has_access:
+            if not is_course_student(request, module.course_id):
                 return Response(
                     {"error": "You don't have access to this module"},
                     status=status.HTTP_403_FORBIDDEN
@@ -395,18 +735,26 @@ class ModuleViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_403_FORBIDDEN
                 )
         else:
-            has_access = CourseToTeachers.objects.filter(
-                course=module.course, user=user
-            ).exists()
-            if not has_access:
+            if not is_course_teacher(request, module.course_id):
                 return Response(
                     {"error": "You don't have access to this module"},
                     status=status.HTTP_403_FORBIDDEN
                 )
         
-        questions = Question.objects.filter(module=module).order_by('question_order')
-        serializer = QuestionSerializer(questions, many=True)
-        return Response(serializer.data)
+        # Students never receive (or load) the answer keys
+        def serialize():
+            if user.isStudent:
+                questions = Question.objects.filter(module=module).for_students().order_by('question_order')
+                return StudentQuestionSerializer(questions, many=True).data
+            questions = Question.objects.filter(module=module).with_correct_answers().order_by('question_order')
+            return QuestionSerializer(questions, many=True).data
+
+        variant = 'student' if user.isStudent else 'teacher'
+        return conditional(
+            request, ('module-questions', module.id, variant, module.content_updated_at),
+            lambda: Response(cached('module-questions', module.id, (module.content_updated_at,), variant, serialize)),
+            published=user.isStudent and module.is_posted
+        )
     
     def _is_module_accessible(self, module, user):
         """
@@ -418,40 +766,14 @@ class ModuleViewSet(viewsets.ModelViewSet):
         if not module.is_posted:
             return False
         
-        # Get all modules in the same course with lower order
-        previous_modules = Module.objects.filter(
-            course=module.course,
-            module_order__lt=module.module_order,
-            is_posted=True
-        ).order_by('module_order')
-        
-        # Check if all previous modules are completed
-        for prev_module in previous_modules:
-            if not self._is_module_completed(prev_module, user):
-                return False
-        
-        return True
+        return not has_incomplete_previous_modules(module, user)
     
     def _is_module_completed(self, module, user):
         """
         Check if a student has completed a module.
         A module is completed if all questions have submissions.
         """
-        # Get all questions in the module
-        questions = Question.objects.filter(module=module)
-        if not questions.exists():
-            return False  # No questions means not completed
-        
-        # Check if all questions have submissions
-        for question in questions:
-            submission_exists = Submission.objects.filter(
-                question=question,
-                user=user
-            ).exists()
-            if not submission_exists:
-                return False
-        
-        return True
+        return is_module_completed(module, user)
     
     @action(detail=True, methods=['get'], url_path='is-accessible')
     def check_module_accessibility(self, request, pk=None):
@@ -506,15 +828,19 @@ class ModuleViewSet(viewsets.ModelViewSet):
             
             serializer = QuestionSerializer(data=question_data)
             serializer.is_valid(raise_exception=True)
-            question = serializer.save()
-            
-            # Create correct answer entries
-            for answer in correct_answers:
-                if answer:  # Only create if answer is not empty
-                    QuestionToCorrectAnswers.objects.create(
-                        question=question,
-                        correct_answer=answer
-                    )
+            with transaction.atomic():
+                question = serializer.save()
+                
+                # Create correct answer entries
+                for answer in correct_answers:
+                    if answer:  # Only create if answer is not empty
+                        QuestionToCorrectAnswers.objects.create(
+                            question=question,
+                            correct_answer=answer
+                        )
+                
+                # A new question un-completes the module for everyone
+                refresh_module_progress(module.id)
             
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -530,6 +856,189 @@ class ModuleViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=True, methods=['post'], url_path='clone')
+    def duplicate_module(self, request, pk=None):
+        """
+        POST /api/modules/{module_id}/clone
+        Copy a module with its questions and answer keys to the end of a
+        course (its own by default). The caller must teach both courses.
+        """
+        module = self.get_object()
+        user = request.user
+        
+        options = CloneModuleSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+        course_id = options.validated_data.get('course_id', module.course_id)
+        
+        try:
+            course = Course.objects.get(id=course_id)
+        except Course.DoesNotExist:
+            return Response(
+                {"error": "Course not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        teaches = is_course_teacher(request, module.course_id) and is_course_teacher(request, course.id)
+        if user.isStudent or not teaches:
+            return Response(
+                {"error": "Only teachers of both courses can clone this module"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        copy = clone_module(module, course, reset_schedule=options.validated_data['reset_schedule'])
+        return Response(ModuleSerializer(copy).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['patch'], url_path='questions/bulk')
+    def bulk_edit_questions(self, request, pk=None):
+        """
+        PATCH /api/modules/{module_id}/questions/bulk
+        Replace a module's question list in one transaction. Takes every
+        question in the desired order: items with an id are updated, items
+        without one are created and questions left out are deleted.
+        """
+        module = self.get_object()
+        user = request.user
+        
+        if user.isStudent or not is_course_teacher(request, module.course_id):
+            return Response(
+                {"error": "Only teachers of this course can edit questions"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        items = request.data.get('questions')
+        if not isinstance(items, list):
+            return Response(
+                {"error": "questions must be a list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        item_serializer = BulkQuestionItemSerializer(data=items, many=True)
+        if not item_serializer.is_valid():
+            return Response(
+                {"error": "No changes were saved", "errors": item_serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            summary = apply_question_list(module, item_serializer.validated_data)
+        except QuestionListError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        questions = Question.objects.filter(module=module).with_correct_answers().order_by('question_order')
+        return Response({
+            "summary": summary,
+            "questions": QuestionSerializer(questions, many=True).data
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], url_path='submissions/batch')
+    @idempotent
+    def submit_module(self, request, pk=None):
+        """
+        POST /api/modules/{module_id}/submissions/batch
+        Submit answers to every question in a module at once. Either all
+        answers are saved or none are; results are reported per question.
+        """
+        module = self.get_object()
+        user = request.user
+        
+        if not user.isStudent:
+            return Response(
+                {"error": "Only students can submit answers"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        items = request.data.get('submissions')
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "submissions must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        item_serializer = BatchSubmissionItemSerializer(data=items, many=True)
+        item_serializer.is_valid()
+        item_errors = item_serializer.errors if item_serializer.errors else [{}] * len(items)
+        
+        # Validate every answer against one fetch of the module's questions
+        questions = {question.id: question for question in module.question_set.all()}
+        results = []
+        seen = set()
+        for item, errors in zip(items, item_errors):
+            question_id = item.get('question_id') if isinstance(item, dict) else None
+            errors = dict(errors)
+            if not errors:
+                if question_id not in questions:
+                    errors['question_id'] = ["Question is not in this module"]
+                elif question_id in seen:
+                    errors['question_id'] = ["Question is answered more than once"]
+                seen.add(question_id)
+            results.append({'question_id': question_id, 'errors': errors})
+        
+        if any(result['errors'] for result in results):
+            for result in results:
+                result['status'] = 'error' if result['errors'] else 'not_submitted'
+                if not result['errors']:
+                    del result['errors']
+            return Response(
+                {"error": "No answers were submitted", "results": results},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Recordings go to file storage before the transaction opens
+        submissions = []
+        stored_keys = []
+        try:
+            for data in item_serializer.validated_data:
+                question = questions[data['question_id']]
+                submission_type = data.get('submission_type', question.question_type)
+                submission = Submission(
+                    user=user,
+                    module=module,
+                    question=question,
+                    submission_type=submission_type,
+                    submission_response=data['response']
+                )
+                parsed = parse_data_url(data['response']) if submission_type in MEDIA_TYPES else None
+                if parsed:
+                    stored = store_media(parsed[1], parsed[0], user.id, question.id)
+                    stored_keys.append(stored.key)
+                    for field, value in stored.as_fields().items():
+                        setattr(submission, field, value)
+                submissions.append(submission)
+            
+            with transaction.atomic():
+                save_submissions(submissions)
+                refresh_user_progress(user.id, module.id)
+        except InvalidMedia as e:
+            for key in stored_keys:
+                delete_media(key)
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception:
+            for key in stored_keys:
+                delete_media(key)
+            raise
+        
+        # Attach existing grades so serializing needs no further queries
+        grades = {
+            grade.question_id: grade for grade in UserQuestionGrade.objects.filter(
+                user=user, question_id__in=questions
+            )
+        }
+        for submission in submissions:
+            grade = grades.get(submission.question_id)
+            submission.grade_id = grade.id if grade else None
+            submission.grade_score = grade.score if grade else None
+            submission.grade_total = grade.total if grade else None
+            submission.grade_is_overdue = grade.is_overdue if grade else None
+        
+        data = SubmissionSerializer(submissions, many=True, context={'request': request}).data
+        return Response({
+            "module_id": module.id,
+            "results": [
+                {"question_id": submission.question_id, "status": "created", "submission": item}
+                for submission, item in zip(submissions, data)
+            ]
+        }, status=status.HTTP_201_CREATED)
+
 # ============================================================================
 # QUESTION VIEWSET
 # ============================================================================
@@ -537,32 +1046,71 @@ class ModuleViewSet(viewsets.ModelViewSet):
 class QuestionViewSet(viewsets.ModelViewSet):
     serializer_class = QuestionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ('question_order', 'id')
+
+    def get_serializer_class(self):
+        """Students read questions without their answer keys"""
+        if self.request.user.isStudent and self.action in ('list', 'retrieve', 'get_question'):
+            return StudentQuestionSerializer
+        return QuestionSerializer
 
     def get_queryset(self):
         """Get questions filtered by module_id"""
-        queryset = Question.objects.all()
+        if self.request.user.isStudent:
+            queryset = Question.objects.for_students()
+        else:
+            queryset = Question.objects.with_correct_answers()
         module_id = self.request.query_params.get('module_id', None)
         
         if module_id:
-            queryset = queryset.filter(module_id=module_id)
-            # Verify user has access
-            try:
-                module = Module.objects.get(id=module_id)
-                user = self.request.user
-                if user.isStudent:
-                    has_access = CourseToStudents.objects.filter(
-                        course=module.course, user=user
-                    ).exists()
-                else:
-                    has_access = CourseToTeachers.objects.filter(
-                        course=module.course, user=user
-                    ).exists()
-                if not has_access:
-                    return Question.objects.none()
-            except Module.DoesNotExist:
-                return Question.objects.none()
+            # Only modules of the user's own courses
+            queryset = queryset.filter(module_id=module_id, module__course_id__in=course_ids(self.request))
         
         return queryset.order_by('question_order')
+
+    def list(self, request, *args, **kwargs):
+        """
+        GET /api/questions/?module_id={id}
+        Pages of a module's questions are served from the content cache and
+        revalidated by ETag from module.content_updated_at
+        """
+        try:
+            module_id = int(request.query_params['module_id'])
+        except (KeyError, ValueError):
+            return super().list(request, *args, **kwargs)
+
+        module = Module.objects.filter(id=module_id).values('course_id', 'is_posted', 'content_updated_at').first()
+        if module is None or module['course_id'] not in course_ids(request):
+            return super().list(request, *args, **kwargs)
+
+        role = 'student' if request.user.isStudent else 'teacher'
+        page_url = request.build_absolute_uri()
+        page_key = hashlib.sha256(page_url.encode()).hexdigest()
+        return conditional(
+            request, ('module-question-page', module_id, role, module['content_updated_at'], page_url),
+            lambda: Response(cached(
+                'module-question-page', module_id, (module['content_updated_at'],), f'{role}:{page_key}',
+                lambda: super(QuestionViewSet, self).list(request, *args, **kwargs).data
+            )),
+            published=request.user.isStudent and module['is_posted']
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        GET /api/questions/{question_id}/
+        Revalidated by ETag from question.updated_at and, for teachers, its answer key
+        """
+        return self._conditional_question(request, self.get_object())
+
+    def _conditional_question(self, request, question):
+        # Answer keys are rewritten, never edited in place, so their ids change with them
+        answers = [answer.id for answer in getattr(question, 'prefetched_correct_answers', ())]
+        role = 'student' if request.user.isStudent else 'teacher'
+        return conditional(
+            request, ('question', question.id, role, question.updated_at, answers),
+            lambda: Response(self.get_serializer(question).data)
+        )
     
     @action(detail=False, methods=['get'], url_path='questionid=(?P<question_id>[^/.]+)')
     def get_question(self, request, question_id=None):
@@ -587,15 +1135,15 @@ class QuestionViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            question = Question.objects.get(id=question_id, module=module)
+            questions = Question.objects.for_students() if request.user.isStudent else Question.objects.with_correct_answers()
+            question = questions.get(id=question_id, module=module)
         except Question.DoesNotExist:
             return Response(
                 {"error": "Question not found in this module"},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        serializer = self.get_serializer(question)
-        return Response(serializer.data)
+        return self._conditional_question(request, question)
     
     def create(self, request, *args, **kwargs):
         """
@@ -634,14 +1182,17 @@ class QuestionViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(data=question_data)
         serializer.is_valid(raise_exception=True)
-        question = serializer.save()
-        
-        # Create correct answer entries
-        for answer in correct_answers:
-            QuestionToCorrectAnswers.objects.create(
-                question=question,
-                correct_answer=answer
-            )
+        with transaction.atomic():
+            question = serializer.save()
+            
+            # Create correct answer entries
+            for answer in correct_answers:
+                QuestionToCorrectAnswers.objects.create(
+                    question=question,
+                    correct_answer=answer
+                )
+            
+            refresh_module_progress(module.id)
         
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
@@ -662,18 +1213,37 @@ class QuestionViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(question, data=request_data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        
-        # Update correct answers if provided
-        if correct_answers is not None:
-            QuestionToCorrectAnswers.objects.filter(question=question).delete()
-            if correct_answers:  # Only create if list is not empty
-                for answer in correct_answers:
-                    if answer:  # Only create if answer is not empty
-                        QuestionToCorrectAnswers.objects.create(
-                            question=question,
-                            correct_answer=answer
-                        )
+        key_fields = (question.question_type, question.score_total)
+        previous_module_id = question.module_id
+        with transaction.atomic():
+            serializer.save()
+            if question.module_id != previous_module_id:
+                # Answers and their grades move with the question
+                answers = Submission.objects.filter(question=question)
+                answers.update(module_id=question.module_id)
+                for module_id in (previous_module_id, question.module_id):
+                    refresh_module_progress(module_id)
+                refresh_progress_for(
+                    (user_id, question.module_id) for user_id in answers.values_list('user_id', flat=True)
+                )
+                rebuild_rollups([previous_module_id, question.module_id])
+            
+            # Update correct answers if provided
+            if correct_answers is not None:
+                QuestionToCorrectAnswers.objects.filter(question=question).delete()
+                if correct_answers:  # Only create if list is not empty
+                    for answer in correct_answers:
+                        if answer:  # Only create if answer is not empty
+                            QuestionToCorrectAnswers.objects.create(
+                                question=question,
+                                correct_answer=answer
+                            )
+                # Drop the answers prefetched by get_queryset so the response is current
+                question.__dict__.pop('prefetched_correct_answers', None)
+            
+            # Stored answers are re-graded against the new key
+            if correct_answers is not None or key_fields != (question.question_type, question.score_total):
+                regrade_questions([question.id])
         
         return Response(serializer.data)
 
@@ -692,6 +1262,14 @@ class QuestionViewSet(viewsets.ModelViewSet):
         
         return super().destroy(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        module_id = instance.module_id
+        with transaction.atomic():
+            instance.delete()
+            refresh_module_progress(module_id)
+            # The question's grades were cascade-deleted with it
+            rebuild_rollups([module_id])
+
 # ============================================================================
 # SUBMISSION VIEWSET
 # ============================================================================
@@ -699,11 +1277,20 @@ class QuestionViewSet(viewsets.ModelViewSet):
 class SubmissionViewSet(viewsets.ModelViewSet):
     serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ('-time_submitted', '-id')
 
     def get_queryset(self):
-        """Get submissions for the current user"""
+        """
+        Get submissions for the current user. Teachers can also open and
+        grade their students' submissions in the courses they teach.
+        """
         user = self.request.user
-        queryset = Submission.objects.filter(user=user)
+        if not user.isStudent and self.action in ('retrieve', 'grade_submission'):
+            return Submission.objects.with_grade().filter(
+                Q(user=user) | Q(module__course_id__in=course_ids(self.request, TEACHER))
+            )
+        queryset = Submission.objects.with_grade().filter(user=user)
         
         # Filter by question_id if provided
         question_id = self.request.query_params.get('question_id', None)
@@ -717,10 +1304,12 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('-time_submitted')
     
+    @idempotent
     def create(self, request, *args, **kwargs):
         """
         POST /api/questions/ or POST /api/submissions/
-        Submit an answer to a question
+        Submit an answer to a question. A student has one submission per
+        question, so submitting again replaces it (200 instead of 201).
         """
         question_id = request.data.get('question_id')
         module_id = request.data.get('module_id')
@@ -742,8 +1331,7 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         
         # Always use the question's module to ensure consistency
         # The module_id from request is optional and used for validation only
-        module = question.module
-        module_id = module.id
+        module_id = question.module_id
         
         # If module_id is provided in request, validate it matches the question's module
         request_module_id = request.data.get('module_id')
@@ -766,52 +1354,171 @@ class SubmissionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        submission_type = request.data.get('submission_type', question.question_type)
+        # Audio/video payloads go to file storage, not into submission_response
+        media = media_from_request(request, submission_type)
+        
         # Create submission - always use the question's module
         # Pass the module ID (Django REST Framework will handle the ForeignKey)
         submission_data = {
             'user': user_id,
             'module': module_id,  # Pass the module ID (DRF will convert to module object)
             'question': question_id,
-            'submission_type': request.data.get('submission_type', question.question_type),
-            'submission_response': request.data.get('response', '')
+            'submission_type': submission_type
         }
+        if not media:
+            submission_data['submission_response'] = request.data.get('response', '')
+        
+        if settings.SUBMISSION_QUEUE_ENABLED:
+            # Validated exactly like an inline answer. user, module and
+            # question were resolved above, so only the answer fields are
+            # checked, without looking the relations up again.
+            serializer = self.get_serializer(data={
+                field: value for field, value in submission_data.items()
+                if field in ('submission_type', 'submission_response')
+            }, partial=True)
+            try:
+                serializer.is_valid(raise_exception=True)
+            except ValidationError as e:
+                return Response(
+                    {"error": str(e), "details": serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return self._enqueue(request, question, submission_type, media)
         
         try:
             serializer = self.get_serializer(data=submission_data)
             serializer.is_valid(raise_exception=True)
-            submission = serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            stored = store_media(*media, user_id, question.id) if media else None
+            submission = Submission(**serializer.validated_data, **(stored.as_fields() if stored else {}))
+            try:
+                with transaction.atomic():
+                    # Resubmitting (or retrying) replaces the existing answer
+                    replaced = save_submissions([submission])
+                    refresh_user_progress(submission.user_id, submission.module_id)
+            except Exception:
+                if stored:
+                    delete_media(stored.key)
+                raise
+            return Response(
+                self.get_serializer(submission).data,
+                status=status.HTTP_200_OK if replaced else status.HTTP_201_CREATED
+            )
         except Exception as e:
             return Response(
                 {"error": str(e), "details": serializer.errors if 'serializer' in locals() else None},
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    def _enqueue(self, request, question, submission_type, media):
+        """
+        Queue mode for create: accept the answer with a single INSERT and let
+        drain_submission_queue write it (see core.ingestion)
+        """
+        try:
+            stored = store_media(*media, request.user.id, question.id) if media else None
+        except InvalidMedia as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queued = enqueue_submission(
+            request.user, question, submission_type,
+            response=request.data.get('response', ''), stored=stored
+        )
+        return Response(
+            QueuedSubmissionSerializer(queued).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+    
+    @action(detail=False, methods=['get'], url_path=r'receipts/(?P<receipt>[0-9a-f-]+)')
+    def get_receipt(self, request, receipt=None):
+        """
+        GET /api/submissions/receipts/{receipt}
+        Status of an answer accepted by the submission queue
+        """
+        queued = QueuedSubmission.objects.filter(receipt=receipt, user=request.user).first()
+        if queued is None:
+            return Response(
+                {"error": "Receipt not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        data = QueuedSubmissionSerializer(queued).data
+        if queued.submission_id:
+            submission = Submission.objects.with_grade().get(id=queued.submission_id)
+            data['submission'] = self.get_serializer(submission).data
+        return Response(data)
+    
     def update(self, request, *args, **kwargs):
         """
         PUT /api/submissions/{submission_id}/
         Update a submission
         """
-        partial = kwargs.pop('partial', False)
         submission = self.get_object()
         
         # Map 'response' to 'submission_response' for consistency with create
-        request_data = request.data.copy() if hasattr(request.data, 'copy') else dict(request.data)
+        request_data = request.data.dict() if hasattr(request.data, 'dict') else dict(request.data)
         if 'response' in request_data and 'submission_response' not in request_data:
             request_data['submission_response'] = request_data.pop('response')
         
+        # A new recording replaces the stored file; a text answer drops it
+        media = media_from_request(
+            request, request_data.get('submission_type', submission.submission_type)
+        )
+        request_data.pop('media', None)
+        if media:
+            request_data.pop('submission_response', None)
+        
         # Remove read-only fields that might be sent from frontend
         request_data.pop('question_id', None)
         request_data.pop('module_id', None)
         request_data.pop('user_id', None)
         request_data.pop('id', None)
         
-        serializer = self.get_serializer(submission, data=request_data, partial=partial)
+        # user/module/question are fixed once submitted, so a PUT without
+        # them is still a valid update of the answer
+        serializer = self.get_serializer(submission, data=request_data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        previous_module_id = submission.module_id
+        previous_media_key = submission.media_key
+        previous_answer = answer_of(submission)
+        
+        save_fields = {}
+        stored = None
+        if media:
+            try:
+                stored = store_media(*media, submission.user_id, submission.question_id)
+            except InvalidMedia as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            save_fields = stored.as_fields()
+        elif previous_media_key and 'submission_response' in request_data:
+            # Replaced by a text answer
+            save_fields = dict(NO_MEDIA)
+        
+        try:
+            with transaction.atomic():
+                submission = serializer.save(**save_fields)
+                if answer_of(submission) != previous_answer:
+                    reopen_for_grading([submission])
+                    autograde_submissions([submission])
+                refresh_user_progress(submission.user_id, submission.module_id)
+                if previous_module_id != submission.module_id:
+                    refresh_user_progress(submission.user_id, previous_module_id)
+                if previous_media_key and 'media_key' in save_fields:
+                    transaction.on_commit(lambda: delete_media(previous_media_key))
+        except Exception:
+            if stored:
+                delete_media(stored.key)
+            raise
         
         return Response(serializer.data)
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            refresh_user_progress(instance.user_id, instance.module_id)
+            if instance.media_key:
+                transaction.on_commit(lambda: delete_media(instance.media_key))
+
     @action(detail=False, methods=['post'], url_path='questions/(?P<question_id>[^/.]+)/submit')
     def submit_to_question(self, request, question_id=None):
         """
@@ -828,7 +1535,7 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         Get submission for a specific user and question
         """
         try:
-            submission = Submission.objects.get(
+            submission = Submission.objects.with_grade().get(
                 user_id=user_id,
                 question_id=question_id
             )
@@ -840,6 +1547,37 @@ class SubmissionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
     
+    @action(detail=True, methods=['get'], url_path='media', permission_classes=[AllowAny])
+    def media(self, request, pk=None):
+        """
+        GET /api/submissions/{submission_id}/media
+        Stream the submission's audio/video (Range requests supported). Open
+        to the submitting student and the course's teachers, or to anyone
+        holding the signed ?token= from the submission's media_url
+        """
+        submission = Submission.objects.select_related('module').filter(pk=pk).first()
+        if submission is None:
+            return Response(
+                {"error": "Submission not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        token = request.query_params.get('token')
+        user = request.user
+        if token:
+            allowed = check_media_token(submission, token)
+        else:
+            allowed = user.is_authenticated and (
+                submission.user_id == user.id or is_course_teacher(request, submission.module.course_id)
+            )
+        if not allowed:
+            return Response(
+                {"error": "You don't have access to this submission"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return media_response(request, submission)
+    
     @action(detail=True, methods=['post'], url_path='grade')
     def grade_submission(self, request, pk=None):
         """
@@ -863,15 +1601,9 @@ class SubmissionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create or update grade
-        grade, created = UserQuestionGrade.objects.update_or_create(
-            question=submission.question,
-            user=submission.user,
-            defaults={
-                'score': score,
-                'total': total,
-                'is_overdue': is_overdue
-            }
+        # Create or update grade, keeping module/course rollups in step
+        grade = apply_question_grade(
+            submission.question, submission.user, score, total, is_overdue
         )
         
         return Response({
@@ -882,3 +1614,184 @@ class SubmissionViewSet(viewsets.ModelViewSet):
                 "is_overdue": grade.is_overdue
             }
         }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='grade/bulk')
+    def grade_submissions_bulk(self, request):
+        """
+        POST /api/submissions/grade/bulk
+        Grade many submissions in one request:
+        {"grades": [{"submission_id": 1, "score": 8, "total": 10, "is_overdue": false}]}.
+        Either every grade is saved or, when any item is invalid, none are.
+        Only teachers of the submissions' courses can grade them.
+        """
+        user = request.user
+        if user.isStudent:
+            return Response(
+                {"error": "Only teachers can grade submissions"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        items = request.data.get('grades')
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "grades must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        item_serializer = BulkGradeItemSerializer(data=items, many=True)
+        if not item_serializer.is_valid():
+            return Response(
+                {"error": "No grades were saved", "errors": item_serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        items = item_serializer.validated_data
+        
+        # One query for every submission and its question's score_total
+        submissions = (
+            Submission.objects.filter(
+                id__in={item['submission_id'] for item in items},
+                module__course_id__in=course_ids(request, TEACHER)
+            )
+            .select_related('question')
+            .only('id', 'user_id', 'module_id', 'question_id', 'question__score_total')
+            .in_bulk()
+        )
+        
+        entries, errors, seen = [], [], set()
+        for item in items:
+            submission = submissions.get(item['submission_id'])
+            total = item.get('total', submission.question.score_total if submission else None)
+            if submission is None:
+                errors.append({"submission_id": ["Submission not found"]})
+            elif (submission.user_id, submission.question_id) in seen:
+                errors.append({"submission_id": ["Submission is graded more than once"]})
+            elif total is not None and item['score'] > total:
+                errors.append({"score": ["Score cannot be greater than total"]})
+            else:
+                errors.append({})
+                seen.add((submission.user_id, submission.question_id))
+                entries.append((submission, item['score'], total, item['is_overdue']))
+        
+        if any(errors):
+            return Response(
+                {"error": "No grades were saved", "errors": errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        apply_submission_grades(entries)
+        return Response({
+            "message": "Grades saved successfully",
+            "graded": len(entries),
+            "grades": [
+                {"submission_id": submission.id, "score": score, "total": total, "is_overdue": is_overdue}
+                for submission, score, total, is_overdue in entries
+            ]
+        }, status=status.HTTP_200_OK)
+
+# ============================================================================
+# MEDIA UPLOAD VIEWSET
+# ============================================================================
+
+class MediaUploadViewSet(mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable chunked uploads for large audio/video answers (see core.uploads)
+    """
+    serializer_class = MediaUploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Uploads belong to the student who started them"""
+        return MediaUpload.objects.filter(user=self.request.user)
+
+    def _status(self, upload):
+        data = self.get_serializer(upload).data
+        received = received_chunks(upload)
+        data['total_chunks'] = total_chunks(upload)
+        data['received'] = [
+            {'index': index, 'offset': offset, 'size': size}
+            for index, offset, size in received
+        ]
+        data['received_bytes'] = sum(size for _, _, size in received)
+        return data
+
+    def create(self, request, *args, **kwargs):
+        """
+        POST /api/uploads/
+        Start an upload for a question: question_id, content_type, total_size
+        and optionally chunk_size
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            question = Question.objects.select_related('module').get(
+                id=serializer.validated_data['question_id']
+            )
+        except Question.DoesNotExist:
+            return Response(
+                {"error": "Question not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        if not is_course_student(request, question.module.course_id):
+            return Response(
+                {"error": "You don't have access to this question"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if question.question_type not in (QuestionType.AUDIO, QuestionType.VIDEO):
+            return Response(
+                {"error": "Uploads are only accepted for audio and video questions"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        upload = serializer.save(
+            user=request.user,
+            chunk_size=serializer.validated_data.get('chunk_size', settings.MEDIA_UPLOAD_CHUNK_SIZE)
+        )
+        return Response(self._status(upload), status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        GET /api/uploads/{upload_id}/
+        Upload state with the chunks (index, offset, size) received so far
+        """
+        return Response(self._status(self.get_object()))
+
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<index>\d+)')
+    def put_chunk(self, request, pk=None, index=None):
+        """
+        PUT /api/uploads/{upload_id}/chunks/{index}
+        Raw chunk bytes as the request body. Re-sending a chunk replaces it.
+        """
+        upload = self.get_object()
+        try:
+            # Read the body straight from the request stream rather than
+            # request.data so it is never buffered in memory
+            write_chunk(upload, int(index), request.stream or io.BytesIO())
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self._status(upload), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], url_path='complete')
+    def complete(self, request, pk=None):
+        """
+        POST /api/uploads/{upload_id}/complete
+        Assemble the chunks and attach the file to the user's submission
+        """
+        upload = self.get_object()
+        try:
+            submission = complete_upload(upload.id, request.user)
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        submission = Submission.objects.with_grade().get(id=submission.id)
+        return Response(SubmissionSerializer(submission).data, status=status.HTTP_200_OK)
+
+    def perform_destroy(self, instance):
+        """
+        DELETE /api/uploads/{upload_id}/
+        Abandon an upload and remove its staged chunks
+        """
+        discard_chunks(instance)
+        instance.delete()
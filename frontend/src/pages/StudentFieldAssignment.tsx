@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import Header from '../components/Header';
-import { moduleAPI, questionAPI, submissionAPI } from '../services/api';
+import { moduleAPI, uploadAPI } from '../services/api';
 import type { Module, Question } from '../types';
 import './StudentFieldAssignment.css';
 
@@ -12,6 +12,7 @@ const StudentFieldAssignment: React.FC = () => {
   const [question, setQuestion] = useState<Question | null>(null);
   const [file, setFile] = useState<File | null>(null);
   const [loading, setLoading] = useState(true);
+  const [progress, setProgress] = useState<number | null>(null);
 
   useEffect(() => {
     if (moduleId) {
@@ -50,15 +51,8 @@ const StudentFieldAssignment: React.FC = () => {
     }
 
     try {
-      // TODO: Upload file to S3 and get URL
-      // For now, we'll use a placeholder
-      const fileUrl = `s3://bucket/${file.name}`;
-
-      await submissionAPI.submit({
-        question_id: question.id,
-        module_id: Number(moduleId),
-        submission_type: 'video',
-        response: fileUrl,
+      await uploadAPI.uploadFile(question.id, file, (sent, total) => {
+        setProgress(Math.round((sent / total) * 100));
       });
 
       alert('Field assignment submitted successfully!');
@@ -66,6 +60,8 @@ const StudentFieldAssignment: React.FC = () => {
     } catch (error) {
       console.error('Error submitting:', error);
       alert('Error submitting assignment. Please try again.');
+    } finally {
+      setProgress(null);
     }
   };
 
@@ -114,8 +110,8 @@ const StudentFieldAssignment: React.FC = () => {
         </div>
 
         <div className="submit-section">
-          <button onClick={handleSubmit} className="submit-button">
-            Submit Assignment
+          <button onClick={handleSubmit} className="submit-button" disabled={progress !== null}>
+            {progress !== null ? `Uploading... ${progress}%` : 'Submit Assignment'}
           </button>
         </div>
       </div>
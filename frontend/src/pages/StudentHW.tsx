@@ -3,7 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom';
 import Header from '../components/Header';
 import { moduleAPI, questionAPI, submissionAPI } from '../services/api';
 import { useAuth } from '../contexts/AuthContext';
-import type { Module, Question, Submission } from '../types';
+import type { BatchSubmissionResult, Module, Question, Submission } from '../types';
 import './StudentHW.css';
 
 const StudentHW: React.FC = () => {
@@ -93,13 +93,13 @@ const StudentHW: React.FC = () => {
           submissionsData.forEach((sub: Submission) => {
             if (sub.user_id === user.id) {
               submissionsMap[sub.question_id] = sub;
-              initialResponses[sub.question_id] = sub.submission_response;
+              // Recordings are streamed from media_url rather than sent inline
+              initialResponses[sub.question_id] = sub.media_url || sub.submission_response;
               initialTypes[sub.question_id] = sub.submission_type as 'written' | 'audio';
               
               // If it's an audio submission, mark it as recorded
-              if (sub.submission_type === 'audio' && sub.submission_response) {
-                // Audio is stored as base64, so we can mark it as recorded
-                setAudioRecordings(prev => ({ ...prev, [sub.question_id]: null })); // null means we have the base64 but not the blob
+              if (sub.submission_type === 'audio' && initialResponses[sub.question_id]) {
+                setAudioRecordings(prev => ({ ...prev, [sub.question_id]: null })); // null means we have the URL but not the blob
               }
             }
           });
@@ -218,8 +218,8 @@ const StudentHW: React.FC = () => {
     return `${mins}:${secs.toString().padStart(2, '0')}`;
   };
 
-  const playAudio = (base64Audio: string) => {
-    const audio = new Audio(base64Audio);
+  const playAudio = (audioSrc: string) => {
+    const audio = new Audio(audioSrc);
     audio.play();
   };
 
@@ -281,18 +281,19 @@ const StudentHW: React.FC = () => {
         throw new Error('Validation failed');
       }
 
-      // Submit all responses
-      const submitResults = await Promise.allSettled(
+      // Already-submitted questions cannot be resubmitted
+      const resubmitted = questions.findIndex(question => submissions[question.id]);
+      if (resubmitted !== -1) {
+        throw new Error(`Question ${resubmitted + 1}: This question has already been submitted and cannot be resubmitted.`);
+      }
+
+      // Collect every answer, then submit them together in one request
+      const answers = await Promise.all(
         questions.map(async (question, index) => {
           const response = responses[question.id];
           const responseType = question.question_type === 'multiple_choice' 
             ? 'multiple_choice' 
             : (responseTypes[question.id] || question.question_type);
-          
-          // Skip if no response (shouldn't happen after validation, but just in case)
-          if (!response && responseType !== 'audio' && responseType !== 'multiple_choice') {
-            return { question: question.id, skipped: true };
-          }
 
           // For audio, make sure we have the base64 data
           let finalResponse = response || '';
@@ -321,48 +322,27 @@ const StudentHW: React.FC = () => {
             throw new Error(`No response provided for Question ${index + 1}`);
           }
 
-          // Use moduleId from URL params, or fall back to module.id if available
-          // The backend will use the question's module anyway, but we send it for validation
-          const validModuleId = moduleId ? Number(moduleId) : (module?.id || null);
-          
-          const submissionData = {
+          return {
             question_id: question.id,
-            module_id: validModuleId, // Backend will use question's module if this is None
             submission_type: responseType,
             response: finalResponse,
           };
-
-          try {
-          // Check if submission already exists - if it does, don't allow resubmission
-          if (submissions[question.id]) {
-            throw new Error(`Question ${index + 1}: This question has already been submitted and cannot be resubmitted.`);
-          }
-          
-          // Create new submission
-          await submissionAPI.submit(submissionData);
-          } catch (apiError: any) {
-            // Re-throw with more context
-            const errorMsg = apiError?.response?.data?.error || 
-                           apiError?.response?.data?.detail || 
-                           apiError?.message || 
-                           'Unknown error';
-            throw new Error(`Question ${index + 1}: ${errorMsg}`);
-          }
-          
-          return { question: question.id, success: true };
         })
       );
 
-      // Check for any failures
-      const failures = submitResults
-        .filter((result): result is PromiseRejectedResult => result.status === 'rejected')
-        .map((result, index) => {
-          const question = questions[index];
-          const error = result.reason;
-          return `Question ${index + 1}: ${error?.response?.data?.error || error?.response?.data?.detail || error?.message || 'Unknown error'}`;
-        });
-
-      if (failures.length > 0) {
+      // The whole module is saved or nothing is
+      try {
+        await submissionAPI.submitBatch(Number(moduleId), answers);
+      } catch (apiError: any) {
+        const results: BatchSubmissionResult[] | undefined = apiError?.response?.data?.results;
+        if (!results) throw apiError;
+        const failures = results
+          .map((result, index) => ({ result, index }))
+          .filter(({ result }) => result.status === 'error')
+          .map(({ result, index }) => {
+            const messages = Object.values(result.errors || {}).flat().join(', ');
+            return `Question ${index + 1}: ${messages}`;
+          });
         throw new Error(failures.join('\n'));
       }
       alert('Assignment submitted successfully!');
@@ -585,13 +565,6 @@ const StudentHW: React.FC = () => {
                   </>
                 )}
 
-                {/* Show correct answer for multiple choice in review mode */}
-                {isReviewMode && hasSubmission && question.question_type === 'multiple_choice' && question.correct_answers && question.correct_answers.length > 0 && (
-                  <div className="correct-answer">
-                    <strong>Correct Answer{question.correct_answers.length > 1 ? 's' : ''}:</strong> {question.correct_answers.join(', ')}
-                  </div>
-                )}
-
                 {/* Show grade if available */}
                 {submission?.grade && (
                   <div className="submission-grade">
@@ -2,8 +2,8 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import Header from '../components/Header';
 import { useAuth } from '../contexts/AuthContext';
-import { courseAPI, submissionAPI, moduleAPI } from '../services/api';
-import type { Course, Module, Submission } from '../types';
+import { courseAPI } from '../services/api';
+import type { Course, DashboardModule } from '../types';
 import './StudentMain.css';
 
 const formatDate = (dateString?: string) => {
@@ -20,10 +20,7 @@ const StudentMain: React.FC = () => {
   const navigate = useNavigate();
   const { user } = useAuth();
   const [courses, setCourses] = useState<Course[]>([]);
-  const [modules, setModules] = useState<Module[]>([]);
-  const [submissions, setSubmissions] = useState<Record<number, Submission[]>>({});
-  const [moduleQuestions, setModuleQuestions] = useState<Record<number, number>>({}); // module_id -> question_count
-  const [moduleAccessibility, setModuleAccessibility] = useState<Record<number, { is_accessible: boolean; is_completed: boolean }>>({});
+  const [modules, setModules] = useState<DashboardModule[]>([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -42,76 +39,11 @@ const StudentMain: React.FC = () => {
       const enrolledCourses = await courseAPI.getEnrolledCourses(user.id);
       setCourses(enrolledCourses);
 
-        if (enrolledCourses.length > 0) {
-        // Load modules for the first course (or you could show all)
-        const courseModules = await courseAPI.getModules(enrolledCourses[0].id);
-        setModules(courseModules.sort((a, b) => a.module_order - b.module_order));
-
-        // Load submissions and question counts for all modules
-        const submissionsMap: Record<number, Submission[]> = {};
-        const questionsMap: Record<number, number> = {};
-        
-        const accessibilityMap: Record<number, { is_accessible: boolean; is_completed: boolean }> = {};
-        
-        for (const module of courseModules) {
-          try {
-            // Get submissions
-            const moduleSubmissions = await submissionAPI.getAll(undefined, module.id);
-            submissionsMap[module.id] = moduleSubmissions.filter(s => s.user_id === user.id);
-            
-            // Check module accessibility first (only for students)
-            if (user.isStudent) {
-              try {
-                const accessibility = await moduleAPI.checkAccessibility(module.id);
-                accessibilityMap[module.id] = {
-                  is_accessible: accessibility.is_accessible,
-                  is_completed: accessibility.is_completed
-                };
-                
-                // Only get questions if module is accessible
-                if (accessibility.is_accessible) {
-                  try {
-                    const questions = await moduleAPI.getQuestions(module.id);
-                    questionsMap[module.id] = questions.length;
-                  } catch (error) {
-                    questionsMap[module.id] = 0;
-                  }
-                } else {
-                  questionsMap[module.id] = 0;
-                }
-              } catch (error) {
-                // If check fails, assume not accessible
-                accessibilityMap[module.id] = {
-                  is_accessible: false,
-                  is_completed: false
-                };
-                questionsMap[module.id] = 0;
-              }
-            } else {
-              // Teachers can always access
-              accessibilityMap[module.id] = {
-                is_accessible: true,
-                is_completed: false
-              };
-              try {
-                const questions = await moduleAPI.getQuestions(module.id);
-                questionsMap[module.id] = questions.length;
-              } catch (error) {
-                questionsMap[module.id] = 0;
-              }
-            }
-          } catch (error) {
-            submissionsMap[module.id] = [];
-            questionsMap[module.id] = 0;
-            accessibilityMap[module.id] = {
-              is_accessible: false,
-              is_completed: false
-            };
-          }
-        }
-        setSubmissions(submissionsMap);
-        setModuleQuestions(questionsMap);
-        setModuleAccessibility(accessibilityMap);
+      if (enrolledCourses.length > 0) {
+        // One request returns every module with question counts, the
+        // student's submission counts, completion and accessibility
+        const dashboard = await courseAPI.getDashboard(enrolledCourses[0].id);
+        setModules(dashboard.modules.sort((a, b) => a.module_order - b.module_order));
       }
     } catch (error) {
       console.error('Error loading data:', error);
@@ -120,15 +52,9 @@ const StudentMain: React.FC = () => {
     }
   };
 
-  const getModuleStatus = (module: Module) => {
-    const moduleSubmissions = submissions[module.id] || [];
-    const questionCount = moduleQuestions[module.id] || 0;
-    const submissionCount = moduleSubmissions.length;
-    const allQuestionsSubmitted = questionCount > 0 && submissionCount >= questionCount;
-    const accessibility = moduleAccessibility[module.id];
-    
+  const getModuleStatus = (module: DashboardModule) => {
     // Check if module is accessible (sequential requirement)
-    if (accessibility && !accessibility.is_accessible) {
+    if (module.is_posted && !module.is_accessible) {
       return { status: 'locked', label: 'Locked - Complete previous modules', icon: '🔒' };
     }
     
@@ -136,27 +62,20 @@ const StudentMain: React.FC = () => {
       return { status: 'locked', label: 'Locked', icon: '🔒' };
     }
     
-    if (allQuestionsSubmitted) {
+    if (module.is_completed) {
       // All questions have submissions
-      const totalScore = moduleSubmissions.reduce((sum, sub) => {
-        return sum + (sub.grade?.score || 0);
-      }, 0);
-      const totalPossible = moduleSubmissions.reduce((sum, sub) => {
-        return sum + (sub.grade?.total || 0);
-      }, 0);
-      
       return {
         status: 'completed',
         label: 'Completed',
         icon: '✓',
-        grade: totalPossible > 0 ? `${totalScore}/${totalPossible}` : null
+        grade: module.grade_total ? `${module.grade_score || 0}/${module.grade_total}` : null
       };
     }
     
     return { status: 'active', label: 'Start Module', icon: module.module_order.toString() };
   };
 
-  const handleModuleClick = (module: Module) => {
+  const handleModuleClick = (module: DashboardModule) => {
     const moduleStatus = getModuleStatus(module);
     if (moduleStatus.status === 'active' || moduleStatus.status === 'completed') {
       navigate(`/student/hw/${module.id}`);
@@ -180,10 +99,7 @@ const StudentMain: React.FC = () => {
   // Get upcoming assignments: modules that are posted and not fully completed
   const upcomingModules = modules.filter(m => {
     if (!m.is_posted) return false;
-    const moduleSubmissions = submissions[m.id] || [];
-    const questionCount = moduleQuestions[m.id] || 0;
-    const submissionCount = moduleSubmissions.length;
-    return questionCount === 0 || submissionCount < questionCount;
+    return m.question_count === 0 || !m.is_completed;
   }).sort((a, b) => {
     // Sort by due date if available, then by module_order
     if (a.due_date && b.due_date) {
@@ -204,12 +204,28 @@ const TeacherEditModule: React.FC = () => {
     }
   };
 
+  // Saves every question edit, in the order shown, with one request
+  const saveAllQuestions = async () => {
+    await moduleAPI.bulkUpdateQuestions(Number(moduleId), questions.map(question => {
+      const questionData = editingQuestions[question.id] || {};
+      return {
+        id: question.id,
+        question_text: questionData.question_text,
+        question_type: questionData.question_type,
+        mcq_options: questionData.mcq_options || [],
+        correct_answers: questionData.correct_answers || [],
+        score_total: questionData.score_total,
+      };
+    }));
+  };
+
   const handleUpdateModule = async () => {
     try {
       const updateData: Partial<Module> = {
         ...moduleData,
         due_date: moduleData.due_date ? new Date(moduleData.due_date).toISOString() : undefined,
       };
+      await saveAllQuestions();
       await moduleAPI.update(Number(moduleId), updateData);
       alert('Module updated successfully!');
       navigate('/teacher/modules');
@@ -2,8 +2,8 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import Header from '../components/Header';
 import { useAuth } from '../contexts/AuthContext';
-import { courseAPI, moduleAPI, submissionAPI, questionAPI } from '../services/api';
-import type { Course, Module, Submission, User } from '../types';
+import { courseAPI, moduleAPI, questionAPI } from '../services/api';
+import type { Course, Module, SubmissionPreview, User } from '../types';
 import './TeacherMain.css';
 
 const TeacherMain: React.FC = () => {
@@ -40,7 +40,7 @@ const TeacherMain: React.FC = () => {
           setTeachers(courseTeachers);
           
           // Calculate module progress and student grades
-          await calculateModuleProgress(courseModules, courseStudents);
+          await calculateModuleProgress(courseId, courseModules, courseStudents);
         }
       }
     } catch (error) {
@@ -50,10 +50,18 @@ const TeacherMain: React.FC = () => {
     }
   };
 
-  const calculateModuleProgress = async (courseModules: Module[], courseStudents: User[]) => {
+  const calculateModuleProgress = async (courseId: number, courseModules: Module[], courseStudents: User[]) => {
     const progressMap: Record<number, number> = {};
     const gradesMap: Record<number, { grade: number; overdue: number }> = {};
     
+    // Every student's submissions per posted module, fetched once
+    const moduleSubmissions: Record<number, SubmissionPreview[]> = {};
+    for (const module of courseModules) {
+      if (module.is_posted) {
+        moduleSubmissions[module.id] = await courseAPI.getSubmissions(courseId, { module_id: module.id });
+      }
+    }
+    
     for (const module of courseModules) {
       if (!module.is_posted) {
         progressMap[module.id] = 0;
@@ -73,7 +81,7 @@ const TeacherMain: React.FC = () => {
       let completedCount = 0;
       
       for (const student of courseStudents) {
-        const submissions = await submissionAPI.getAll(undefined, module.id);
+        const submissions = moduleSubmissions[module.id];
         const studentSubmissions = submissions.filter(s => s.user_id === student.id);
         const uniqueQuestions = new Set(studentSubmissions.map(s => s.question_id));
         
@@ -96,7 +104,7 @@ const TeacherMain: React.FC = () => {
       for (const module of courseModules) {
         if (!module.is_posted) continue;
         
-        const submissions = await submissionAPI.getAll(undefined, module.id);
+        const submissions = moduleSubmissions[module.id];
         const studentSubmissions = submissions.filter(s => s.user_id === student.id);
         
         for (const submission of studentSubmissions) {
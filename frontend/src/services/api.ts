@@ -1,7 +1,8 @@
 import axios from 'axios';
 import type { 
-  Course, Module, Question, Submission, User,
-  LoginCredentials, RegisterData, AuthResponse 
+  BatchSubmissionResult, BulkGradeItem, BulkQuestionItem, BulkQuestionResult, Course, CourseDashboard, GradingClaim, MediaUploadStatus, Module, Question, Submission, User,
+  LoginCredentials, RegisterData, AuthResponse, RosterImportResult, RosterRow,
+  SubmissionBrowserFilters, SubmissionPreview 
 } from '../types';
 
 const API_BASE_URL = 'http://localhost:8000/api';
@@ -14,6 +15,28 @@ const api = axios.create({
   },
 });
 
+// Writes sent with the same Idempotency-Key are applied once, so the retry
+// after a token refresh (below) or a double click cannot duplicate them
+const idempotencyHeaders = () => ({ 'Idempotency-Key': crypto.randomUUID() });
+
+// Submission, module and question lists are keyset-paginated: follow the
+// opaque `next` links until the last page
+interface Page<T> {
+  next: string | null;
+  results: T[];
+}
+
+const getAllPages = async <T>(url: string): Promise<T[]> => {
+  const results: T[] = [];
+  let next: string | null = url;
+  while (next) {
+    const response: { data: Page<T> } = await api.get(next);
+    results.push(...response.data.results);
+    next = response.data.next;
+  }
+  return results;
+};
+
 // Add token to requests if available
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('access_token');
@@ -77,6 +100,11 @@ export const authAPI = {
     const response = await api.post('/token/refresh/', { refresh });
     return response.data;
   },
+
+  acceptInvite: async (token: string, password: string): Promise<AuthResponse> => {
+    const response = await api.post('/invites/accept/', { token, password });
+    return response.data;
+  },
 };
 
 // Course API
@@ -114,6 +142,14 @@ export const courseAPI = {
     await api.delete(`/courses/${courseId}/users`, { data: { user_id: userId } });
   },
 
+  // Accepts a CSV file (sent as-is) or parsed rows
+  importRoster: async (courseId: number, roster: File | RosterRow[]): Promise<RosterImportResult> => {
+    const response = roster instanceof File
+      ? await api.post(`/courses/${courseId}/roster/`, roster, { headers: { 'Content-Type': 'text/csv' } })
+      : await api.post(`/courses/${courseId}/roster/`, { rows: roster });
+    return response.data;
+  },
+
   updateZoomLink: async (courseId: number, zoomLink: string): Promise<Course> => {
     const response = await api.put(`/courses/${courseId}/zoom/`, { zoom_link: zoomLink });
     return response.data;
@@ -124,6 +160,40 @@ export const courseAPI = {
     return response.data;
   },
 
+  getDashboard: async (courseId: number): Promise<CourseDashboard> => {
+    const response = await api.get(`/courses/${courseId}/dashboard/`);
+    return response.data;
+  },
+
+  // Copies modules, questions and answer keys (not students) into a new course
+  clone: async (
+    courseId: number,
+    options: { course_name?: string; reset_schedule?: boolean } = {}
+  ): Promise<{ course: Course; module_count: number; question_count: number }> => {
+    const response = await api.post(`/courses/${courseId}/clone/`, options);
+    return response.data;
+  },
+
+  // Students' submissions in a course (teachers only), newest first
+  getSubmissions: async (courseId: number, filters: SubmissionBrowserFilters = {}): Promise<SubmissionPreview[]> => {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value !== undefined && value !== false) params.append(key, String(value));
+    });
+    const query = params.toString();
+    return getAllPages<SubmissionPreview>(`/courses/${courseId}/submissions/${query ? `?${query}` : ''}`);
+  },
+
+  // Claim the oldest ungraded submission (teachers only); null when none are left
+  claimNextToGrade: async (courseId: number, moduleId?: number): Promise<GradingClaim | null> => {
+    const response = await api.post(`/courses/${courseId}/grading/next/`, moduleId ? { module_id: moduleId } : {});
+    return response.status === 204 ? null : response.data;
+  },
+
+  releaseGradingClaim: async (courseId: number, submissionId: number): Promise<void> => {
+    await api.post(`/courses/${courseId}/grading/release/`, { submission_id: submissionId });
+  },
+
   getStudents: async (courseId: number): Promise<User[]> => {
     const response = await api.get(`/courses/${courseId}/students/`);
     return response.data;
@@ -139,8 +209,7 @@ export const courseAPI = {
 export const moduleAPI = {
   getAll: async (courseId?: number): Promise<Module[]> => {
     const url = courseId ? `/modules/?course_id=${courseId}` : '/modules/';
-    const response = await api.get(url);
-    return response.data;
+    return getAllPages<Module>(url);
   },
 
   getById: async (id: number): Promise<Module> => {
@@ -172,18 +241,32 @@ export const moduleAPI = {
     return response.data;
   },
 
+  clone: async (
+    moduleId: number,
+    options: { course_id?: number; reset_schedule?: boolean } = {}
+  ): Promise<Module> => {
+    const response = await api.post(`/modules/${moduleId}/clone/`, options);
+    return response.data;
+  },
+
   createQuestion: async (moduleId: number, question: Partial<Question>): Promise<Question> => {
     const response = await api.post(`/modules/${moduleId}/question/`, question);
     return response.data;
   },
+
+  // Replaces the module's question list: items without an id are created,
+  // questions left out are deleted and list order becomes question_order
+  bulkUpdateQuestions: async (moduleId: number, questions: BulkQuestionItem[]): Promise<BulkQuestionResult> => {
+    const response = await api.patch(`/modules/${moduleId}/questions/bulk/`, { questions });
+    return response.data;
+  },
 };
 
 // Question API
 export const questionAPI = {
   getAll: async (moduleId?: number): Promise<Question[]> => {
     const url = moduleId ? `/questions/?module_id=${moduleId}` : '/questions/';
-    const response = await api.get(url);
-    return response.data;
+    return getAllPages<Question>(url);
   },
 
   getById: async (questionId: number, moduleId: number): Promise<Question> => {
@@ -215,8 +298,7 @@ export const submissionAPI = {
     if (moduleId) params.append('module_id', moduleId.toString());
     if (params.toString()) url += `?${params.toString()}`;
     
-    const response = await api.get(url);
-    return response.data;
+    return getAllPages<Submission>(url);
   },
 
   getByUserAndQuestion: async (userId: number, questionId: number): Promise<Submission> => {
@@ -230,16 +312,32 @@ export const submissionAPI = {
     submission_type: string;
     response: string;
   }): Promise<Submission> => {
-    const response = await api.post('/submissions/', submission);
+    const response = await api.post('/submissions/', submission, { headers: idempotencyHeaders() });
     return response.data;
   },
 
+  // Submit answers to every question in a module atomically
+  submitBatch: async (moduleId: number, submissions: {
+    question_id: number;
+    submission_type: string;
+    response: string;
+  }[]): Promise<BatchSubmissionResult[]> => {
+    const response = await api.post(
+      `/modules/${moduleId}/submissions/batch/`,
+      { submissions },
+      { headers: idempotencyHeaders() },
+    );
+    return response.data.results;
+  },
+
   submitToQuestion: async (questionId: number, submission: {
     module_id: number;
     submission_type: string;
     response: string;
   }): Promise<Submission> => {
-    const response = await api.post(`/submissions/questions/${questionId}/submit`, submission);
+    const response = await api.post(`/submissions/questions/${questionId}/submit`, submission, {
+      headers: idempotencyHeaders(),
+    });
     return response.data;
   },
 
@@ -260,6 +358,78 @@ export const submissionAPI = {
   }): Promise<void> => {
     await api.post(`/submissions/${submissionId}/grade`, grade);
   },
+
+  // Grade many submissions at once; nothing is saved if any grade is invalid
+  gradeBulk: async (grades: BulkGradeItem[]): Promise<{ graded: number; grades: BulkGradeItem[] }> => {
+    const response = await api.post('/submissions/grade/bulk', { grades });
+    return response.data;
+  },
+};
+
+// Upload API (resumable chunked uploads for large audio/video answers)
+export const uploadAPI = {
+  start: async (upload: {
+    question_id: number;
+    content_type: string;
+    total_size: number;
+    chunk_size?: number;
+  }): Promise<MediaUploadStatus> => {
+    const response = await api.post('/uploads/', upload);
+    return response.data;
+  },
+
+  getStatus: async (uploadId: string): Promise<MediaUploadStatus> => {
+    const response = await api.get(`/uploads/${uploadId}/`);
+    return response.data;
+  },
+
+  putChunk: async (uploadId: string, index: number, chunk: Blob): Promise<MediaUploadStatus> => {
+    const response = await api.put(`/uploads/${uploadId}/chunks/${index}/`, chunk, {
+      headers: { 'Content-Type': 'application/octet-stream' },
+    });
+    return response.data;
+  },
+
+  complete: async (uploadId: string): Promise<Submission> => {
+    const response = await api.post(`/uploads/${uploadId}/complete/`);
+    return response.data;
+  },
+
+  abort: async (uploadId: string): Promise<void> => {
+    await api.delete(`/uploads/${uploadId}/`);
+  },
+
+  // Upload a file, sending only the chunks the server does not already have.
+  // Pass the id of an earlier upload to resume it.
+  uploadFile: async (
+    questionId: number,
+    file: File,
+    onProgress?: (sentBytes: number, totalBytes: number) => void,
+    uploadId?: string,
+  ): Promise<Submission> => {
+    const upload = uploadId
+      ? await uploadAPI.getStatus(uploadId)
+      : await uploadAPI.start({
+          question_id: questionId,
+          content_type: file.type || 'application/octet-stream',
+          total_size: file.size,
+        });
+
+    const received = new Set(upload.received.map(chunk => chunk.index));
+    let sent = upload.received_bytes;
+    onProgress?.(sent, file.size);
+
+    for (let index = 0; index < upload.total_chunks; index++) {
+      if (received.has(index)) continue;
+      const start = index * upload.chunk_size;
+      const chunk = file.slice(start, start + upload.chunk_size);
+      await uploadAPI.putChunk(upload.id, index, chunk);
+      sent += chunk.size;
+      onProgress?.(sent, file.size);
+    }
+
+    return uploadAPI.complete(upload.id);
+  },
 };
 
 export default api;
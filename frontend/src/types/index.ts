@@ -29,6 +29,21 @@ export interface Module {
   due_date?: string;
 }
 
+export interface DashboardModule extends Module {
+  question_count: number;
+  submission_count: number;
+  answered_count: number;
+  is_completed: boolean;
+  is_accessible: boolean;
+  grade_score: number | null;
+  grade_total: number | null;
+}
+
+export interface CourseDashboard {
+  course: Course;
+  modules: DashboardModule[];
+}
+
 export interface Question {
   id: number;
   module_id: number;
@@ -49,6 +64,9 @@ export interface Submission {
   question_text: string;
   submission_type: 'multiple_choice' | 'audio' | 'written' | 'video';
   submission_response: string;
+  media_content_type?: string;
+  media_size?: number | null;
+  media_url?: string | null;
   time_submitted: string;
   grade?: {
     score: number;
@@ -57,6 +75,113 @@ export interface Submission {
   };
 }
 
+export interface BulkQuestionItem {
+  id?: number;
+  question_text?: string;
+  question_type?: Question['question_type'];
+  mcq_options?: string[];
+  score_total?: number;
+  correct_answers?: string[];
+}
+
+export interface BulkQuestionResult {
+  summary: {
+    created: number;
+    updated: number;
+    deleted: number;
+    reordered: number;
+    answer_sets: number;
+  };
+  questions: Question[];
+}
+
+// A row of the teacher submission browser: the answer is only previewed
+export interface SubmissionPreview {
+  id: number;
+  user_id: number;
+  user_name: string;
+  module_id: number;
+  question_id: number;
+  question_text: string;
+  submission_type: Submission['submission_type'];
+  response_preview: string;
+  response_truncated: boolean;
+  has_media: boolean;
+  media_content_type?: string;
+  media_size?: number | null;
+  time_submitted: string;
+  grade?: Submission['grade'];
+  url: string;
+}
+
+export interface SubmissionBrowserFilters {
+  module_id?: number;
+  question_id?: number;
+  student_id?: number;
+  type?: Submission['submission_type'];
+  ungraded?: boolean;
+  overdue?: boolean;
+}
+
+export interface BulkGradeItem {
+  submission_id: number;
+  score: number;
+  total?: number;
+  is_overdue?: boolean;
+}
+
+// A submission claimed from a course's grading queue
+export interface GradingClaim {
+  submission: Submission;
+  claim_expires_at: string;
+}
+
+export interface BatchSubmissionResult {
+  question_id: number;
+  status: 'created' | 'error' | 'not_submitted';
+  submission?: Submission;
+  errors?: Record<string, string[]>;
+}
+
+export interface RosterRow {
+  email: string;
+  first_name?: string;
+  last_name?: string;
+  role?: 'student' | 'teacher';
+}
+
+export interface RosterImportResult {
+  summary: {
+    rows: number;
+    created: number;
+    enrolled: number;
+    already_enrolled: number;
+    error: number;
+  };
+  rows: {
+    row: number;
+    email: string;
+    role: string;
+    status: 'created' | 'enrolled' | 'already_enrolled' | 'error';
+    user_id?: number;
+    invite_token?: string;
+    error?: string;
+  }[];
+}
+
+export interface MediaUploadStatus {
+  id: string;
+  question_id: number;
+  submission: number | null;
+  content_type: string;
+  total_size: number;
+  chunk_size: number;
+  status: 'pending' | 'completed';
+  total_chunks: number;
+  received: { index: number; offset: number; size: number }[];
+  received_bytes: number;
+}
+
 export interface LoginCredentials {
   email: string;
   password: string;